@@ -0,0 +1,366 @@
+"""
+音訊輸入來源
+
+把「從哪裡讀音訊」抽象成 AudioSource 介面，讓錄音執行緒不綁定 PyAudio：
+- MicrophoneSource：麥克風（PyAudio）
+- FileSource：WAV 檔或 raw PCM 檔（16kHz mono int16）
+- StdinSource：從標準輸入讀 raw PCM（例如 ffmpeg / sox 的輸出）
+- FfmpegSource：用 ffmpeg 邊解碼邊讀 mp3、m4a、mp4 等壓縮格式
+- SyntheticSource：合成的純音、噪音或類語音訊號
+- RecordingSource：重播 --record 錄下的目錄（recording.py，mmap 讀取）
+
+除了麥克風以外，都可以選擇依實際時間播放（重現現場情況）或盡快讀完（壓力測試）。
+read() 一律返回 16-bit little-endian mono PCM bytes，讀完時返回 b""。
+
+使用方式：
+    with open_source("recording.wav", realtime=False) as source:
+        while data := source.read(2048):
+            for segment in vad.feed(data):
+                ...
+"""
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+RATE = 16000
+SYNTHETIC_KINDS = ["tone", "noise", "speech"]
+# 交給 ffmpeg 解碼的副檔名（其他副檔名視為 raw PCM）
+DECODED_SUFFIXES = {
+    ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".wma",
+    ".mp4", ".mkv", ".mov", ".webm", ".avi",
+}
+
+
+class AudioSource:
+    """音訊輸入來源基底類別"""
+    
+    # 讀完輸入後會返回 b""；麥克風永遠不會結束
+    finite = True
+    # 依實際時間播放時的倍速
+    speed = 1.0
+    
+    def __init__(self, realtime: bool = True):
+        self.realtime = realtime
+        self.sample_rate = RATE
+        self._start_time = None
+        self._frames_read = 0
+    
+    def read(self, frames: int) -> bytes:
+        """讀取最多 frames 個樣本，輸入結束時返回空 bytes"""
+        data = self._read(frames)
+        if self.realtime and data:
+            self._pace(len(data) // 2)
+        return data
+    
+    def _read(self, frames: int) -> bytes:
+        raise NotImplementedError
+    
+    def _pace(self, frames: int):
+        """依實際時間播放：等到這些樣本「錄完」的時間點才返回"""
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+        self._frames_read += frames
+        delay = self._start_time + self._frames_read / (self.sample_rate * self.speed) - now
+        if delay > 0:
+            time.sleep(delay)
+    
+    def close(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def describe(self) -> str:
+        """顯示用的名稱"""
+        return type(self).__name__
+
+
+class CaptureTimer:
+    """
+    錄音迴圈的時間抖動
+    
+    每次 read() 返回時呼叫 tick()，記錄與上一次的間隔和區塊長度（應有的間隔）的差。
+    辨識或 VAD 佔住 CPU 時間隔會變長；間隔超過兩倍區塊長度時，
+    麥克風的緩衝區可能已經溢位（PyAudio 以 exception_on_overflow=False 讀取，不會報錯）。
+    只有依實際時間讀取的來源（麥克風、沒有 --fast 的檔案）才有意義。
+    """
+    
+    def __init__(self, frames: int, sample_rate: int = RATE, history: int = 36000):
+        self.expected = frames / sample_rate
+        self._last = None
+        # 最近的抖動（秒），預設保留約一小時
+        self.jitter: deque[float] = deque(maxlen=history)
+        self.late = 0  # 間隔超過兩倍區塊長度的次數
+    
+    def tick(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            gap = now - self._last
+            self.jitter.append(abs(gap - self.expected))
+            if gap > 2 * self.expected:
+                self.late += 1
+        self._last = now
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        if not self.jitter:
+            return "錄音間隔抖動: 無資料"
+        p95 = float(np.percentile(self.jitter, 95)) * 1000
+        worst = max(self.jitter) * 1000
+        return (
+            f"錄音間隔抖動: p95 {p95:.1f} ms，最大 {worst:.1f} ms，"
+            f"超過兩倍區塊長度 {self.late} 次"
+        )
+
+
+class MicrophoneSource(AudioSource):
+    """麥克風輸入（PyAudio）"""
+    
+    finite = False
+    
+    def __init__(self, frames_per_buffer: int = 2048):
+        # 裝置本身就是即時的，不需要再控制速度
+        super().__init__(realtime=False)
+        import pyaudio
+        
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=RATE,
+            input=True,
+            frames_per_buffer=frames_per_buffer,
+        )
+    
+    def _read(self, frames: int) -> bytes:
+        return self._stream.read(frames, exception_on_overflow=False)
+    
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+    
+    def describe(self) -> str:
+        return "麥克風"
+
+
+class FileSource(AudioSource):
+    """
+    WAV 檔或 raw PCM 檔
+    
+    WAV 必須是 16kHz、16-bit（多聲道會混成單聲道）；
+    其他副檔名視為 16kHz mono 16-bit little-endian raw PCM。
+    """
+    
+    def __init__(self, path: str, realtime: bool = True):
+        super().__init__(realtime)
+        self.path = Path(path)
+        self._wav = None
+        self._file = None
+        self.channels = 1
+        
+        if self.path.suffix.lower() == ".wav":
+            self._wav = wave.open(str(self.path), "rb")
+            if self._wav.getsampwidth() != 2 or self._wav.getframerate() != RATE:
+                self._wav.close()
+                raise ValueError(
+                    f"WAV 需為 {RATE}Hz 16-bit：{path}"
+                    f"（可用 ffmpeg -i {path} -ar {RATE} -ac 1 -sample_fmt s16 out.wav 轉換）"
+                )
+            self.channels = self._wav.getnchannels()
+        else:
+            self._file = open(self.path, "rb")
+    
+    def _read(self, frames: int) -> bytes:
+        if self._file is not None:
+            return self._file.read(frames * 2)
+        
+        data = self._wav.readframes(frames)
+        if self.channels > 1 and data:
+            samples = np.frombuffer(data, dtype="<i2").reshape(-1, self.channels)
+            data = samples.mean(axis=1).astype("<i2").tobytes()
+        return data
+    
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+        if self._file is not None:
+            self._file.close()
+    
+    def describe(self) -> str:
+        return str(self.path)
+
+
+class StdinSource(AudioSource):
+    """
+    從標準輸入讀 16kHz mono 16-bit raw PCM
+    
+    例如：ffmpeg -i input.mp4 -f s16le -ar 16000 -ac 1 - | uv run python realtime.py --input -
+    """
+    
+    def __init__(self, realtime: bool = False):
+        super().__init__(realtime)
+        self._stream = sys.stdin.buffer
+        self._remainder = b""
+    
+    def _read(self, frames: int) -> bytes:
+        # pipe 可能一次只給一部分，讀滿或讀到結束為止
+        size = frames * 2
+        data = self._remainder
+        while len(data) < size:
+            more = self._stream.read(size - len(data))
+            if not more:
+                break
+            data += more
+        # 保持樣本對齊（奇數 bytes 留到下次）
+        cut = len(data) - len(data) % 2
+        self._remainder = data[cut:]
+        return data[:cut]
+    
+    def describe(self) -> str:
+        return "標準輸入"
+
+
+class FfmpegSource(StdinSource):
+    """
+    用 ffmpeg 把任何格式解碼成 16kHz mono PCM，邊解碼邊讀（不會把整個檔案讀進記憶體）
+    
+    需要系統上有 ffmpeg（brew install ffmpeg）。
+    """
+    
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(realtime)
+        if shutil.which("ffmpeg") is None:
+            raise FileNotFoundError(f"解碼 {Path(path).suffix} 需要 ffmpeg：brew install ffmpeg")
+        self.path = Path(path)
+        self._process = subprocess.Popen(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(self.path),
+                "-f", "s16le", "-ac", "1", "-ar", str(RATE), "-",
+            ],
+            stdout=subprocess.PIPE,
+        )
+        self._stream = self._process.stdout
+    
+    def close(self):
+        # 提早結束時 ffmpeg 還在解碼
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.stdout.close()
+        self._process.wait()
+    
+    def describe(self) -> str:
+        return str(self.path)
+
+
+def synthetic_audio(kind: str, seconds: float, seed: int = 0) -> np.ndarray:
+    """
+    產生合成測試音訊（float32，16kHz）
+    
+    Args:
+        kind: tone（440Hz 純音）/ noise（白噪音）/ speech（有基頻與音節起伏的合成聲，與靜音交錯）
+        seconds: 長度（秒）
+        seed: 亂數種子（相同種子產生相同音訊）
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE)
+    
+    if kind == "tone":
+        t = np.arange(n) / RATE
+        return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    
+    if kind == "noise":
+        return (rng.standard_normal(n) * 0.05).astype(np.float32)
+    
+    if kind == "speech":
+        audio = np.zeros(n, dtype=np.float32)
+        pos = 0
+        speaking = False
+        while pos < n:
+            length = min(int(rng.uniform(0.5, 2.5) * RATE), n - pos)
+            if speaking:
+                t = np.arange(length) / RATE
+                f0 = rng.uniform(100, 220)
+                envelope = np.sin(2 * np.pi * rng.uniform(2, 5) * t) ** 2
+                audio[pos:pos + length] = 0.3 * envelope * (
+                    np.sin(2 * np.pi * f0 * t) + 0.5 * np.sin(2 * np.pi * 2 * f0 * t)
+                )
+            pos += length
+            speaking = not speaking
+        audio += rng.standard_normal(n).astype(np.float32) * 0.002
+        return audio
+    
+    raise ValueError(f"未知的合成音訊: {kind}（可用: {', '.join(SYNTHETIC_KINDS)}）")
+
+
+class SyntheticSource(AudioSource):
+    """合成音訊（純音、噪音或類語音）"""
+    
+    def __init__(self, kind: str = "speech", seconds: float = 60.0, seed: int = 0, realtime: bool = True):
+        super().__init__(realtime)
+        self.kind = kind
+        self.seconds = seconds
+        audio = synthetic_audio(kind, seconds, seed)
+        self._pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        self._offset = 0
+    
+    def _read(self, frames: int) -> bytes:
+        data = self._pcm[self._offset:self._offset + frames * 2]
+        self._offset += len(data)
+        return data
+    
+    def describe(self) -> str:
+        return f"合成音訊 {self.kind}（{self.seconds:g} 秒）"
+
+
+def open_source(spec: str = "mic", realtime: bool = True, frames_per_buffer: int = 2048) -> AudioSource:
+    """
+    依 --input 參數建立音訊來源
+    
+    Args:
+        spec:
+            mic                 麥克風（預設）
+            -                   標準輸入（raw PCM）
+            synth:KIND[:SECONDS] 合成音訊，KIND 為 tone / noise / speech
+            replay:DIR[:SPEED]  重播 --record 錄下的目錄，SPEED 為倍速（預設 1）
+            其他                WAV 檔、ffmpeg 能解碼的檔案（mp3、m4a、mp4…）或 raw PCM 檔路徑
+        realtime: 檔案、標準輸入與合成音訊是否依實際時間播放（False 為盡快讀完）
+        frames_per_buffer: 麥克風的緩衝大小
+    """
+    if spec == "mic":
+        return MicrophoneSource(frames_per_buffer)
+    if spec == "-":
+        return StdinSource(realtime)
+    if spec.startswith("synth:"):
+        parts = spec.split(":")
+        kind = parts[1]
+        seconds = float(parts[2]) if len(parts) > 2 else 60.0
+        if kind not in SYNTHETIC_KINDS:
+            raise ValueError(f"未知的合成音訊: {kind}（可用: {', '.join(SYNTHETIC_KINDS)}）")
+        return SyntheticSource(kind, seconds, realtime=realtime)
+    if spec.startswith("replay:"):
+        from recording import RecordingSource
+        
+        directory, speed = spec[len("replay:"):], 1.0
+        head, _, tail = directory.rpartition(":")
+        if head:
+            try:
+                directory, speed = head, float(tail)
+            except ValueError:
+                pass  # 路徑本身含有冒號
+        return RecordingSource(directory, realtime, speed)
+    if not Path(spec).exists():
+        raise FileNotFoundError(f"找不到輸入檔案: {spec}")
+    if Path(spec).suffix.lower() in DECODED_SUFFIXES:
+        return FfmpegSource(spec, realtime)
+    return FileSource(spec, realtime)
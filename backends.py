@@ -0,0 +1,356 @@
+"""
+語音辨識後端
+
+把「音訊 -> 文字」抽象成 TranscriptionBackend 介面，讓佇列、VAD、介面等部分
+可以在沒有 Apple Silicon 的機器上測試與量測效能。
+
+- MLXBackend：mlx-whisper（Apple Silicon GPU，預設）
+- FasterWhisperBackend：faster-whisper（CTranslate2，CPU）
+- FakeBackend：不跑模型，延遲依音訊長度計算，輸出固定格式的文字
+"""
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Protocol
+
+# numpy 只在辨識時才需要，這裡不 import：
+# 前端的 --help / --list 會讀取 BACKENDS，不需要為此載入 numpy（約 0.1 秒）
+if TYPE_CHECKING:
+    import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class Word:
+    """帶時間戳記的字詞（秒，相對於音訊開頭）"""
+    text: str
+    start: float
+    end: float
+
+
+@dataclass
+class TranscriptionResult:
+    """辨識結果"""
+    text: str
+    # 辨識出（或指定）的語言
+    language: str | None = None
+    # word_timestamps=True 時的逐字時間戳記
+    words: list[Word] | None = None
+    # 自動偵測語言時：偵測結果的機率與偵測耗時（秒），後端無法提供時為 None
+    language_probability: float | None = None
+    detect_seconds: float | None = None
+    # 平均 log 機率（越低越沒信心）
+    avg_logprob: float | None = None
+
+
+class TranscriptionBackend(Protocol):
+    """
+    語音辨識後端介面
+    
+    audio 一律是 16kHz mono float32（-1.0~1.0）。
+    """
+    # 後端名稱
+    name: str
+    # 是否支援翻譯成英文（task="translate"）
+    supports_translate: bool
+    # 是否能自動偵測語言
+    supports_language_detection: bool
+    # 是否能輸出逐字時間戳記（打包辨識需要）
+    supports_word_timestamps: bool
+    # 載入模型與預熱的耗時（秒），還沒做過時為 0
+    load_seconds: float
+    warmup_seconds: float
+    
+    def load(self) -> float:
+        """載入模型（已載入時不做任何事），返回耗時（秒）"""
+        ...
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        """載入模型並依代表性的片段長度跑幾次推論"""
+        ...
+    
+    def transcribe(
+        self,
+        audio: "np.ndarray",
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        """辨識一段音訊（word_timestamps=True 時一併返回逐字時間戳記）"""
+        ...
+
+
+class MLXBackend:
+    """mlx-whisper 後端（Apple Silicon GPU，模型常駐在 TranscriptionEngine）"""
+    name = "mlx"
+    supports_language_detection = True
+    supports_word_timestamps = True
+    
+    def __init__(self, model: str):
+        from engine import TranscriptionEngine
+        
+        self.model = model
+        self.engine = TranscriptionEngine(model)
+        # turbo 模型沒有訓練翻譯任務
+        self.supports_translate = "turbo" not in model
+    
+    @property
+    def load_seconds(self) -> float:
+        return self.engine.load_seconds
+    
+    @property
+    def warmup_seconds(self) -> float:
+        return self.engine.warmup_seconds
+    
+    def load(self) -> float:
+        return self.engine.load()
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        self.engine.warmup(language, task)
+    
+    def transcribe(
+        self,
+        audio: "np.ndarray",
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        return self.engine.transcribe(audio, language, task, word_timestamps)
+
+
+class FasterWhisperBackend:
+    """faster-whisper 後端（CPU，需要另外安裝 faster-whisper）"""
+    name = "faster-whisper"
+    supports_translate = True
+    supports_language_detection = True
+    supports_word_timestamps = True
+    
+    def __init__(
+        self,
+        model: str = "small",
+        compute_type: str = "int8",
+        beam_size: int = 1,
+        cpu_threads: int = 0,
+    ):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "CPU 後端需要 faster-whisper：uv pip install faster-whisper"
+            ) from e
+        
+        self._WhisperModel = WhisperModel
+        self.model = model
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        # 0 為使用 CTranslate2 的預設值（多個實例時由 create_pool() 平均分配）
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+    
+    def load(self) -> float:
+        if self._model is not None:
+            return 0.0
+        start = time.perf_counter()
+        self._model = self._WhisperModel(
+            self.model, device="cpu", compute_type=self.compute_type, cpu_threads=self.cpu_threads
+        )
+        self.load_seconds = time.perf_counter() - start
+        return self.load_seconds
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        self.load()
+        start = time.perf_counter()
+        for audio in warmup_audio():
+            self.transcribe(audio, language, task)
+        self.warmup_seconds = time.perf_counter() - start
+    
+    def transcribe(
+        self,
+        audio: "np.ndarray",
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        self.load()
+        segments, info = self._model.transcribe(
+            audio, language=language, task=task, beam_size=self.beam_size,
+            word_timestamps=word_timestamps,
+        )
+        # segments 是 generator，實際解碼在這裡發生
+        segments = list(segments)
+        text = "".join(segment.text for segment in segments).strip()
+        words = None
+        if word_timestamps:
+            words = [
+                Word(w.word, w.start, w.end)
+                for segment in segments
+                for w in segment.words or []
+            ]
+        avg_logprob = sum(s.avg_logprob for s in segments) / len(segments) if segments else None
+        return TranscriptionResult(
+            text, info.language, words,
+            # 語言偵測包含在 transcribe() 裡，無法單獨計時
+            language_probability=info.language_probability if language is None else None,
+            avg_logprob=avg_logprob,
+        )
+
+
+class FakeBackend:
+    """
+    假的辨識後端（不需要模型，結果可重現）
+    
+    延遲 = base_latency + realtime_factor × 音訊秒數（window > 0 時音訊秒數先補到 window 的整數倍，
+    模擬 Whisper 每次都處理完整 30 秒窗口），沒有指定語言時再加上 detect_latency（語言偵測），
+    輸出的文字記錄音訊長度，方便檢查片段有沒有遺漏或錯序。
+    音訊中間有 0.1 秒以上完全為 0 的部分（打包時插入的靜音）會分成不同的「字」。
+    busy=True 時以忙碌迴圈代替 sleep，模擬推論中持有 GIL 的部分（量測錄音抖動用）。
+    """
+    name = "fake"
+    supports_translate = True
+    supports_language_detection = True
+    supports_word_timestamps = True
+    
+    def __init__(
+        self,
+        base_latency: float = 0.05,
+        realtime_factor: float = 0.1,
+        window: float = 0.0,
+        language: str = "zh",
+        detect_latency: float = 0.02,
+        busy: bool = False,
+        sleep=time.sleep,
+    ):
+        self.model = "fake"
+        self.base_latency = base_latency
+        self.realtime_factor = realtime_factor
+        self.window = window
+        self.language = language
+        self.detect_latency = detect_latency
+        self._sleep = busy_wait if busy else sleep
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+    
+    def latency(self, audio: "np.ndarray") -> float:
+        """這段音訊的模擬辨識時間（秒）"""
+        seconds = len(audio) / SAMPLE_RATE
+        if self.window > 0:
+            seconds = max(1, math.ceil(seconds / self.window)) * self.window
+        return self.base_latency + self.realtime_factor * seconds
+    
+    def load(self) -> float:
+        return 0.0
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        start = time.perf_counter()
+        self._sleep(self.base_latency)
+        self.warmup_seconds = time.perf_counter() - start
+    
+    def transcribe(
+        self,
+        audio: "np.ndarray",
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        detect_seconds = None
+        if language is None:
+            detect_seconds = self.detect_latency
+            self._sleep(detect_seconds)
+        self._sleep(self.latency(audio))
+        words = [
+            Word(self._text(end - start, task), start / SAMPLE_RATE, end / SAMPLE_RATE)
+            for start, end in self._runs(audio)
+        ]
+        text = "".join(w.text for w in words)
+        return TranscriptionResult(
+            text, language or self.language, words if word_timestamps else None,
+            language_probability=None if language else 1.0,
+            detect_seconds=detect_seconds,
+        )
+    
+    @staticmethod
+    def _text(samples: int, task: str) -> str:
+        duration = samples / SAMPLE_RATE
+        return f"[{duration:.2f}s]" if task == "translate" else f"〔語音 {duration:.2f} 秒〕"
+    
+    @staticmethod
+    def _runs(audio: "np.ndarray") -> list[tuple[int, int]]:
+        """以 0.1 秒以上的完全靜音分段，返回 [(開始, 結束), ...]（樣本）"""
+        import numpy as np
+        
+        min_gap = SAMPLE_RATE // 10
+        silent = np.concatenate(([False], audio == 0, [False]))
+        edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+        # edges 兩兩成對：靜音的開始與結束
+        runs = []
+        pos = 0
+        for a, b in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            if b - a < min_gap:
+                continue
+            if a > pos:
+                runs.append((pos, a))
+            pos = b
+        if pos < len(audio):
+            runs.append((pos, len(audio)))
+        return runs or [(0, len(audio))]
+
+
+_busy_rate = None  # sum(range(n)) 每秒可以跑的 n
+
+
+def busy_wait(seconds: float, hold: float = 0.05):
+    """
+    持有 GIL 的忙碌迴圈（FakeBackend busy=True）
+    
+    每次在 C 裡連續計算約 hold 秒：Python 每 5ms 切換執行緒的機制只在 bytecode 之間生效，
+    和原生擴充套件不釋放 GIL 的長呼叫一樣，期間其他執行緒完全拿不到 GIL。
+    """
+    global _busy_rate
+    if _busy_rate is None:
+        start = time.perf_counter()
+        sum(range(1_000_000))
+        _busy_rate = 1_000_000 / (time.perf_counter() - start)
+    end = time.perf_counter() + seconds
+    while (remaining := end - time.perf_counter()) > 0:
+        sum(range(int(min(remaining, hold) * _busy_rate)))
+
+
+def warmup_audio(durations: tuple[float, ...] = (1.0, 5.0, 15.0)) -> "list[np.ndarray]":
+    """預熱用的低音量噪音：短句、一般句子、接近 --max-speech-duration 的長句各一段"""
+    import numpy as np
+    
+    rng = np.random.default_rng(0)
+    return [
+        (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.01).astype(np.float32)
+        for seconds in durations
+    ]
+
+
+def startup_summary(backend: TranscriptionBackend) -> str:
+    """模型載入與預熱的耗時"""
+    return f"模型載入 {backend.load_seconds:.2f} 秒，預熱 {backend.warmup_seconds:.2f} 秒"
+
+
+BACKENDS = ["mlx", "faster-whisper", "fake"]
+
+
+def create_backend(name: str, model: str | None = None, **options) -> TranscriptionBackend:
+    """
+    依名稱建立辨識後端
+    
+    Args:
+        name: mlx / faster-whisper / fake
+        model: 模型（mlx 為 HF repo 或本地路徑，faster-whisper 為模型大小或路徑）
+        options: faster-whisper 後端的 cpu_threads；
+            fake 後端的參數（base_latency、realtime_factor、window、detect_latency、busy）
+    """
+    if name == "mlx":
+        return MLXBackend(model)
+    if name == "faster-whisper":
+        return FasterWhisperBackend(model or "small", **options)
+    if name == "fake":
+        return FakeBackend(**options)
+    raise ValueError(f"未知的辨識後端: {name}（可用: {', '.join(BACKENDS)}）")
@@ -0,0 +1,298 @@
+"""
+整個目錄的批次辨識（可中斷後續跑）
+
+每晚處理數百個檔案用：走訪目錄，把檔案分給多個子行程（每個子行程載入一份模型），
+每個檔案以 transcribe_file.py 相同的串流流程（分塊讀取 → VAD 切段 → 辨識）寫出 SRT / JSONL。
+
+輸出目錄中的 manifest.json 記錄每個檔案的狀態、內容雜湊（SHA-256）與處理時間，
+中斷後再執行一次會略過已經完成、內容沒有變動、設定（模型、語言、格式等）相同的檔案；
+大小與修改時間都沒變時不重新計算雜湊。字幕先寫到 .partial，完成後才改名，
+中斷時不會留下看起來完整的半成品。
+
+使用方式:
+  # 輸出到每個檔案旁邊（lecture.wav -> lecture.srt）
+  uv run python batch_transcribe.py recordings/
+  
+  # 2 個子行程、輸出到另一個目錄
+  uv run python batch_transcribe.py recordings/ --workers 2 --output-dir subtitles/
+  
+  # 中斷後直接再執行同一個指令即可續跑
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from audio_source import DECODED_SUFFIXES
+from backends import BACKENDS, TranscriptionBackend
+from realtime import BLOCK
+from transcribe_file import (
+    FORMATS, SubtitleWriter, add_vad_arguments, format_timestamp, make_vad_config,
+    resolve_backend_model, transcribe_stream,
+)
+from worker_pool import create_pool
+
+AUDIO_SUFFIXES = {".wav"} | DECODED_SUFFIXES
+MANIFEST_FILE = "manifest.json"
+HASH_BLOCK = 1024 * 1024
+
+# 子行程中載入的後端與設定（_init_worker 設定）
+_backend: TranscriptionBackend | None = None
+_settings: dict = {}
+
+
+def file_sha256(path: Path) -> str:
+    """分塊計算檔案的 SHA-256（不把整個檔案讀進記憶體）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: Path) -> dict:
+    """檔案的大小、修改時間與 SHA-256（同一個時間點取得，寫進 manifest）"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+
+
+def output_path(output_dir: Path, key: str, fmt: str) -> Path:
+    """輸出檔路徑（lecture.wav -> lecture.srt）"""
+    return (output_dir / key).with_suffix(f".{fmt}")
+
+
+def find_output_collisions(keys: list[str], output_dir: Path, fmt: str) -> dict[Path, list[str]]:
+    """找出會寫到同一個輸出檔的檔案（例如 talk.wav 與 talk.mp3 都會寫到 talk.srt）"""
+    outputs: dict[Path, list[str]] = {}
+    for key in keys:
+        outputs.setdefault(output_path(output_dir, key, fmt), []).append(key)
+    return {output: sources for output, sources in outputs.items() if len(sources) > 1}
+
+
+def find_audio_files(root: Path) -> list[Path]:
+    """遞迴列出目錄中的音訊檔（依路徑排序）"""
+    return [
+        path for path in sorted(root.rglob("*"))
+        if path.suffix.lower() in AUDIO_SUFFIXES and path.is_file()
+    ]
+
+
+class Manifest:
+    """
+    每個檔案的處理狀態（只在主行程讀寫，每次更新都整個寫回）
+    
+    files: 相對路徑 -> {status, sha256, size, mtime_ns, settings, output, audio_seconds, wall_seconds, error}
+    status 為 done / failed；沒有紀錄的檔案還沒處理過。
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: dict[str, dict] = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.files = data.get("files", {})
+    
+    def is_done(self, key: str, path: Path, settings: dict) -> bool:
+        """檔案是否已經以相同設定完成，且內容沒有變動"""
+        entry = self.files.get(key)
+        if not entry or entry.get("status") != "done" or entry.get("settings") != settings:
+            return False
+        if not Path(entry["output"]).exists():
+            return False
+        stat = path.stat()
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        # 修改時間變了（例如複製過），內容相同就不用重做
+        if stat.st_size == entry.get("size") and file_sha256(path) == entry.get("sha256"):
+            self.update(key, mtime_ns=stat.st_mtime_ns)
+            return True
+        return False
+    
+    def update(self, key: str, **fields):
+        self.files.setdefault(key, {}).update(fields)
+        self.save()
+    
+    def save(self):
+        """寫到暫存檔再改名，中斷時不會留下寫到一半的 manifest"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"version": 1, "files": self.files}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+
+
+def _init_worker(backend_name: str, model: str, options: dict, settings: dict):
+    """子行程：載入並預熱一份模型，之後處理的每個檔案都共用"""
+    global _backend, _settings
+    _settings = settings
+    _backend = create_pool(backend_name, model, **options)
+    _backend.load()
+    _backend.warmup(language=settings["language"], task=settings["task"])
+
+
+def _transcribe_one(path: str, output: str) -> dict:
+    """子行程：辨識一個檔案，返回要寫進 manifest 的欄位"""
+    from audio_source import open_source
+    
+    # 解碼前記錄大小、修改時間與雜湊：辨識途中檔案有變動時，下次執行會重新辨識
+    fingerprint = file_fingerprint(Path(path))
+    partial = Path(output + ".partial")
+    partial.parent.mkdir(parents=True, exist_ok=True)
+    source = open_source(path, realtime=False, frames_per_buffer=BLOCK)
+    try:
+        with open(partial, "w", encoding="utf-8") as f:
+            stats = transcribe_stream(
+                source, _backend, SubtitleWriter(f, _settings["format"]), _settings["vad_config"],
+                _settings["language"], _settings["task"], _settings["convert_tw"], _settings["pack"],
+            )
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, output)
+    return {
+        **fingerprint,
+        "audio_seconds": round(stats.audio_seconds, 3),
+        "wall_seconds": round(stats.wall_seconds, 3),
+        "entries": stats.entries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="整個目錄的批次辨識（多個子行程、可中斷後續跑）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="要辨識的目錄（遞迴尋找 WAV 與 ffmpeg 能解碼的檔案）")
+    parser.add_argument("--output-dir", "-o", type=str, default=None, help="輸出目錄（保留子目錄結構，預設寫在每個檔案旁邊）")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="子行程數量，每個子行程載入一份模型（預設: 1）")
+    parser.add_argument("--model", "-m", type=str, default=None, help="模型名稱：HF repo 或本地模型名稱（同 realtime.py）")
+    parser.add_argument("--backend", "-b", choices=BACKENDS, default="mlx", help="辨識後端（預設: mlx）")
+    parser.add_argument("--task", "-t", choices=["transcribe", "translate"], default="transcribe", help="任務類型")
+    parser.add_argument("--language", "-l", type=str, default=None, help="語言代碼（如 zh、en、ja），不指定則自動偵測")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="srt", help="輸出格式（預設: srt）")
+    parser.add_argument("--manifest", type=str, default=None, help=f"進度紀錄檔（預設: 輸出目錄中的 {MANIFEST_FILE}）")
+    add_vad_arguments(parser)
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers 至少為 1")
+    if args.max_speech_duration <= 0:
+        parser.error("--max-speech-duration 必須大於 0")
+    
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_dir():
+        parser.error(f"找不到目錄: {input_dir}")
+    output_dir = Path(args.output_dir) if args.output_dir else input_dir
+    manifest = Manifest(Path(args.manifest) if args.manifest else output_dir / MANIFEST_FILE)
+    
+    model, convert_tw = resolve_backend_model(args.backend, args.model, args.task)
+    if args.task == "translate" and not args.language:
+        args.language = "zh"
+    vad_config = make_vad_config(args)
+    # 影響輸出的設定：和 manifest 中的紀錄不同時重新辨識
+    settings = {
+        "backend": args.backend, "model": model, "language": args.language,
+        "task": args.task, "format": args.format, "pack": args.pack, "vad": asdict(vad_config),
+    }
+    
+    files = find_audio_files(input_dir)
+    collisions = find_output_collisions(
+        [path.relative_to(input_dir).as_posix() for path in files], output_dir, args.format,
+    )
+    if collisions:
+        for output, sources in collisions.items():
+            print(f"❌ {'、'.join(sources)} 都會輸出到 {output}", file=sys.stderr)
+        parser.error("有多個檔案的輸出檔名相同，請改名或移到不同目錄後再執行")
+    todo = []
+    for path in files:
+        key = path.relative_to(input_dir).as_posix()
+        if not manifest.is_done(key, path, settings):
+            todo.append((key, path))
+    skipped = len(files) - len(todo)
+    print(f"📂 {input_dir}: {len(files)} 個檔案，已完成 {skipped} 個，待處理 {len(todo)} 個")
+    if not todo:
+        return
+    # 大的檔案先做，最後不會只剩一個子行程在跑長檔案
+    todo.sort(key=lambda item: item[1].stat().st_size, reverse=True)
+    
+    options = {}
+    if args.backend == "faster-whisper" and args.workers > 1:
+        # 每個子行程平均分到 CPU 核心
+        options["cpu_threads"] = max(1, (os.cpu_count() or 1) // args.workers)
+    worker_settings = {**settings, "convert_tw": convert_tw, "vad_config": vad_config}
+    print(f"⏳ 啟動 {args.workers} 個子行程，各載入一份模型 {model}...")
+    
+    wall_start = time.perf_counter()
+    audio_seconds = 0.0
+    done = failed = 0
+    # macOS 預設就是 spawn；明確指定，避免 fork 時複製模型與執行緒狀態
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(args.backend, model, options, worker_settings),
+    )
+    try:
+        futures = {}
+        for key, path in todo:
+            output = output_path(output_dir, key, args.format)
+            future = executor.submit(_transcribe_one, str(path), str(output))
+            futures[future] = (key, path, output)
+        
+        for future in concurrent.futures.as_completed(futures):
+            key, path, output = futures[future]
+            index = done + failed + 1
+            try:
+                result = future.result()
+            except concurrent.futures.process.BrokenProcessPool as e:
+                print(f"❌ 子行程異常結束（模型載入失敗？）: {e}")
+                sys.exit(1)
+            except Exception as e:
+                failed += 1
+                manifest.update(key, status="failed", error=str(e), settings=settings)
+                print(f"❌ [{index}/{len(todo)}] {key}: {e}")
+                continue
+            
+            done += 1
+            audio_seconds += result["audio_seconds"]
+            manifest.update(
+                key, status="done", error=None, settings=settings, output=str(output), **result,
+            )
+            speed = result["audio_seconds"] / result["wall_seconds"] if result["wall_seconds"] else 0
+            print(
+                f"✅ [{index}/{len(todo)}] {key}  音訊 {format_timestamp(result['audio_seconds'])[:8]}，"
+                f"{result['entries']} 筆（{speed:.1f} 倍速）"
+            )
+    except KeyboardInterrupt:
+        print("\n\n正在關閉...（已完成的檔案都記錄在 manifest，再執行一次即可續跑）")
+        executor.shutdown(wait=False, cancel_futures=True)
+        # 正在辨識的檔案不等它做完（輸出只會留下 .partial，下次重新辨識）
+        for process in mp.active_children():
+            process.terminate()
+            process.join()
+        executor.shutdown()
+        sys.exit(130)
+    executor.shutdown()
+    
+    wall_seconds = time.perf_counter() - wall_start
+    throughput = audio_seconds / wall_seconds if wall_seconds else 0
+    print("-" * 50)
+    print(
+        f"完成 {done} 個、失敗 {failed} 個、略過 {skipped} 個；"
+        f"音訊 {audio_seconds / 3600:.2f} 小時，耗時 {wall_seconds / 3600:.2f} 小時"
+    )
+    print(f"吞吐量: 每小時處理 {throughput:.1f} 小時音訊（含模型載入，{args.workers} 個子行程）")
+    print(f"進度紀錄: {manifest.path}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
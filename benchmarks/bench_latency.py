@@ -0,0 +1,346 @@
+"""
+即時辨識流程的延遲與吞吐量測試
+
+把 WAV 檔（或合成音訊）送進與 realtime.py 相同的流程：
+音訊來源 -> SileroVAD -> 佇列 -> 辨識執行緒，記錄每個片段的時間：
+
+- vad_delay：說完話到 VAD 送出片段（依實際時間播放時為實際時間；
+  --fast 時為音訊時間，只包含等待靜音的部分）
+- queue_wait：片段在佇列中等待的時間
+- transcribe：辨識耗時
+- rtf：辨識耗時 / 片段長度（real-time factor）
+- e2e：說完話到文字出現（只有依實際時間播放時才有意義）
+- first_partial：開始說話到第一次出現暫時結果（--partials，只有依實際時間播放時才有）
+- capture_jitter：每次讀取音訊的間隔與區塊長度的差（只有依實際時間播放時才有；
+  --fake-busy 模擬推論持有 GIL，比較 --inference-process 前後）
+
+結果以 JSON 輸出 p50/p95/p99，方便比對改動前後的數字。
+
+使用方式（從專案根目錄執行）:
+  # 不需要模型：合成音訊 + 假的辨識後端
+  uv run python benchmarks/bench_latency.py
+  
+  # 重播錄音檔（可給多個檔案或目錄）
+  uv run python benchmarks/bench_latency.py corpus/ --backend mlx --output before.json
+  
+  # 盡快處理，測吞吐量
+  uv run python benchmarks/bench_latency.py corpus/ --fast
+  
+  # 打包辨識的效果（fake 後端模擬 Whisper 每次處理 30 秒窗口）
+  uv run python benchmarks/bench_latency.py --fast --fake-window 30 --pack
+  
+  # 多個辨識執行緒（queue_wait 應隨執行緒數下降）
+  uv run python benchmarks/bench_latency.py --fast --workers 2
+  
+  # 辨識前的片段品質檢查（quality_gate 記錄略過的片段數與估計省下的時間）
+  uv run python benchmarks/bench_latency.py corpus/ --fast --quality-gate
+"""
+import argparse
+import functools
+import json
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 加入父目錄到 path 以便 import vad
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from audio_source import CaptureTimer, open_source
+from backends import BACKENDS
+from packing import PACK_GAP, PACK_MAX_DURATION, transcribe_packed
+from partials import PartialTranscriber
+from segment_gate import SegmentGate
+from segment_queue import SegmentQueue
+from sticky_language import StickyLanguageBackend
+from vad import SileroVAD, VADConfig
+from worker_pool import ReorderBuffer, create_pool
+
+RATE = 16000
+CHUNK = 512
+BLOCK = CHUNK * 4
+METRICS = ["vad_delay", "queue_wait", "transcribe", "rtf", "e2e", "first_partial"]
+
+
+def expand_inputs(inputs: list[str]) -> list[str]:
+    """展開目錄中的 WAV / PCM 檔"""
+    specs = []
+    for spec in inputs:
+        path = Path(spec)
+        if path.is_dir():
+            specs.extend(
+                str(p) for p in sorted(path.rglob("*"))
+                if p.suffix.lower() in (".wav", ".pcm", ".raw")
+            )
+        else:
+            specs.append(spec)
+    return specs
+
+
+def summarize(values: list[float]) -> dict:
+    """單一指標的統計"""
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "count": len(arr),
+        "mean": round(float(arr.mean()), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "p99": round(float(p99), 4),
+        "max": round(float(arr.max()), 4),
+    }
+
+
+def run(
+    specs: list[str], backend, vad_config: VADConfig, realtime: bool, language, task,
+    pack: bool = False, partials: PartialTranscriber | None = None, workers: int = 1,
+    capture_timer: CaptureTimer | None = None, gate: SegmentGate | None = None,
+) -> tuple[list[dict], float, float]:
+    """
+    依序重播每個輸入，返回 (每個片段的紀錄, 音訊總長度, 實際耗時)
+    
+    所有輸入接續送進同一個 VAD（每個檔案結束時 finalize），樣本位置不會重複。
+    """
+    records = []
+    # id(片段) -> 該片段的紀錄
+    pending = {}
+    # 語音開始樣本 -> 開始說話的時間 / 第一次出現暫時結果的延遲
+    onsets = {}
+    first_partials = {}
+    pad_samples = int(vad_config.speech_pad_duration * RATE)
+    # 不限長度，量測的是堆積本身
+    transcription_queue = SegmentQueue(maxsize=0)
+    reorder = ReorderBuffer()
+    pack_samples = int(PACK_MAX_DURATION * RATE) if pack else 0
+    
+    def worker(index: int):
+        # 暫時結果只由第一個辨識執行緒處理
+        worker_partials = partials if index == 0 else None
+        while True:
+            try:
+                ticket, batch = transcription_queue.get_batch(
+                    0.05 if worker_partials else None,
+                    pack_samples, int(PACK_GAP * RATE),
+                )
+            except queue.Empty:
+                snapshot = worker_partials.take()
+                if snapshot is not None:
+                    start, audio = snapshot
+                    text = backend.transcribe(audio, language=language, task=task).text
+                    with reorder.lock:
+                        if any(partials.update(start, text)) and start in onsets:
+                            first_partials.setdefault(start, time.perf_counter() - onsets[start])
+                continue
+            if batch[0] is None:
+                reorder.complete(ticket)
+                break
+            started = time.perf_counter()
+            transcribe_packed(backend, [s.audio for s in batch], language, task)
+            finished = time.perf_counter()
+            if gate:
+                gate.observe(finished - started)
+            # 依語音順序「顯示」：e2e 包含等待前面句子的時間
+            reorder.complete(ticket, functools.partial(finish, batch, started, finished))
+    
+    def finish(batch: list, started: float, finished: float):
+        """依序記錄一批片段（在 reorder.lock 內呼叫）"""
+        shown = time.perf_counter()
+        if partials:
+            partials.finish(batch[-1])
+        
+        # 打包辨識時，同一批的片段共用一次辨識時間
+        audio_seconds = sum(len(s.audio) for s in batch) / RATE
+        for s in batch:
+            record = pending.pop(id(s))
+            record["batch"] = len(batch)
+            record["queue_wait"] = started - record["_enqueued"]
+            record["transcribe"] = finished - started
+            record["rtf"] = record["transcribe"] / audio_seconds
+            if realtime:
+                record["e2e"] = shown - record["_speech_end"]
+            if s.start_sample in first_partials:
+                record["first_partial"] = first_partials.pop(s.start_sample)
+            records.append(record)
+    
+    t_workers = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for t in t_workers:
+        t.start()
+    
+    vad = SileroVAD(vad_config)
+    audio_seconds = 0.0
+    wall_start = time.perf_counter()
+    
+    for spec in specs:
+        samples_read = 0
+        base = vad.position
+        with open_source(spec, realtime=realtime) as source:
+            stream_start = time.perf_counter()
+            while True:
+                data = source.read(BLOCK)
+                if capture_timer:
+                    capture_timer.tick()
+                samples_read += len(data) // 2
+                segments = vad.feed(data)
+                if not data:
+                    segments.append(vad.finalize())
+                now = time.perf_counter()
+                
+                if partials:
+                    current = vad.current_audio()
+                    if realtime and current is not None and current[0] not in onsets:
+                        onsets[current[0]] = stream_start + (current[0] + pad_samples - base) / RATE
+                    partials.offer(vad)
+                
+                for segment in segments:
+                    if segment is None or len(segment.audio) <= CHUNK * 5:
+                        continue
+                    if gate and not gate.accept(segment):
+                        continue
+                    record = {
+                        "input": spec,
+                        "start": round((segment.start_sample - base) / RATE, 3),
+                        "duration": round(segment.duration, 3),
+                        "_enqueued": now,
+                    }
+                    if realtime:
+                        speech_end = stream_start + (segment.speech_end_sample - base) / RATE
+                        record["_speech_end"] = speech_end
+                        record["vad_delay"] = now - speech_end
+                    else:
+                        record["vad_delay"] = (base + samples_read - segment.speech_end_sample) / RATE
+                    pending[id(segment)] = record
+                    transcription_queue.put(segment)
+                
+                if not data:
+                    break
+        audio_seconds += samples_read / RATE
+    
+    for _ in t_workers:
+        transcription_queue.put(None)
+    for t in t_workers:
+        t.join()
+    wall_seconds = time.perf_counter() - wall_start
+    
+    for record in records:
+        record.pop("_enqueued")
+        record.pop("_speech_end", None)
+    return records, audio_seconds, wall_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="即時辨識流程的延遲與吞吐量測試")
+    parser.add_argument("inputs", nargs="*", default=["synth:speech:60"], help="WAV/PCM 檔、目錄或 synth:KIND[:秒數]")
+    parser.add_argument("--backend", "-b", choices=BACKENDS, default="fake", help="辨識後端")
+    parser.add_argument("--model", "-m", type=str, default=None, help="模型（mlx / faster-whisper 後端使用）")
+    parser.add_argument("--fake-window", type=float, default=0.0, help="fake 後端依 Whisper 窗口（如 30）計算延遲")
+    parser.add_argument("--fake-busy", action="store_true", help="fake 後端以忙碌迴圈模擬推論（持有 GIL）")
+    parser.add_argument("--inference-process", action="store_true", help="在獨立行程中辨識（共用記憶體傳遞音訊）")
+    parser.add_argument("--language", "-l", type=str, default=None, help="語言代碼")
+    parser.add_argument("--task", "-t", choices=["transcribe", "translate"], default="transcribe")
+    parser.add_argument("--fast", action="store_true", help="盡快處理（測吞吐量），不依實際時間播放")
+    parser.add_argument("--silence-duration", type=float, default=0.6, help="語音結束後的靜音時長（秒）")
+    parser.add_argument("--max-speech-duration", type=float, default=20.0, help="最長語音長度（秒）")
+    parser.add_argument("--energy-gate", action="store_true", help="開啟能量預先過濾")
+    parser.add_argument("--pack", action="store_true", help="打包辨識（佇列堆積時多句一次辨識）")
+    parser.add_argument("--partials", action="store_true", help="邊說邊顯示（量測第一次出現暫時結果的延遲）")
+    parser.add_argument("--partial-interval", type=float, default=0.5, help="暫時結果的間隔（秒）")
+    parser.add_argument("--workers", type=int, default=1, help="辨識執行緒數量（每個執行緒一份模型）")
+    parser.add_argument("--sticky-language", action="store_true", help="沒有指定語言時自動鎖定語言（量測略過偵測的比例）")
+    parser.add_argument("--quality-gate", action="store_true", help="辨識前丟掉不像語音的短片段（量測略過的比例）")
+    parser.add_argument("--segments", action="store_true", help="輸出每個片段的紀錄")
+    parser.add_argument("--output", "-o", type=str, default=None, help="JSON 輸出檔（預設印到標準輸出）")
+    args = parser.parse_args()
+    
+    specs = expand_inputs(args.inputs)
+    if not specs:
+        parser.error("沒有找到可用的輸入檔")
+    
+    model = args.model
+    if args.backend == "mlx" and model is None:
+        model = "mlx-community/whisper-large-v3-mlx"
+    options = {"window": args.fake_window, "busy": args.fake_busy} if args.backend == "fake" else {}
+    backend = create_pool(args.backend, model, args.workers, process=args.inference_process, **options)
+    # 冷啟動：載入與預熱分開計時
+    backend.load()
+    backend.warmup(language=args.language, task=args.task)
+    if args.sticky_language and not args.language:
+        backend = StickyLanguageBackend(backend)
+    
+    vad_config = VADConfig(
+        min_silence_duration=args.silence_duration,
+        sample_rate=RATE,
+        max_speech_duration=args.max_speech_duration,
+        energy_gate=args.energy_gate,
+    )
+    
+    capture_timer = None if args.fast else CaptureTimer(BLOCK, RATE)
+    gate = SegmentGate() if args.quality_gate else None
+    print(f"重播 {len(specs)} 個輸入（{'盡快處理' if args.fast else '實際時間'}）...", file=sys.stderr)
+    records, audio_seconds, wall_seconds = run(
+        specs, backend, vad_config, not args.fast, args.language, args.task, args.pack,
+        PartialTranscriber(args.partial_interval, RATE) if args.partials else None,
+        args.workers, capture_timer, gate,
+    )
+    
+    report = {
+        "backend": backend.name,
+        "model": getattr(backend, "model", None),
+        "realtime": not args.fast,
+        "pack": args.pack,
+        "partials": args.partials,
+        "workers": args.workers,
+        "inference_process": args.inference_process,
+        "load_seconds": round(backend.load_seconds, 3),
+        "warmup_seconds": round(backend.warmup_seconds, 3),
+        "inputs": len(specs),
+        "segments": len(records),
+        "audio_seconds": round(audio_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput": round(audio_seconds / wall_seconds, 3) if wall_seconds else None,
+        "metrics": {
+            name: summarize([r[name] for r in records if name in r])
+            for name in METRICS
+        },
+    }
+    if capture_timer:
+        report["metrics"]["capture_jitter"] = summarize(list(capture_timer.jitter))
+        report["capture_late"] = capture_timer.late
+    if isinstance(backend, StickyLanguageBackend):
+        report["sticky_language"] = {
+            "language": backend.language,
+            "hits": backend.hits,
+            "detections": backend.detections,
+            "hit_rate": round(backend.hit_rate, 3),
+            "unlocks": backend.unlocks,
+            "rechecks": backend.rechecks,
+            "saved_seconds": None if backend.saved_seconds is None else round(backend.saved_seconds, 3),
+        }
+    if gate:
+        report["quality_gate"] = {
+            "passed": gate.passed,
+            "dropped": gate.dropped,
+            "drop_rate": round(gate.drop_rate, 3),
+            "dropped_audio_seconds": round(gate.dropped_seconds, 3),
+            "reasons": gate.reasons,
+            "estimated_saved_seconds": None if gate.saved_seconds is None else round(gate.saved_seconds, 3),
+        }
+    if args.segments:
+        report["records"] = [
+            {k: round(v, 4) if isinstance(v, float) else v for k, v in r.items()}
+            for r in records
+        ]
+    
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"已寫入 {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+多路 VAD 效能測試
+
+比較三種做法在 1、4、16 路音訊下的 CPU 用量：
+- 每一路各自一個 SileroVAD（目前的做法）
+- MultiStreamVAD + pysilero-vad（逐路推論）
+- MultiStreamVAD + onnxruntime（整批推論，需要 --onnx 指定 silero_vad.onnx）
+
+使用方式（從專案根目錄執行）:
+  uv run python benchmarks/bench_multistream.py
+  uv run python benchmarks/bench_multistream.py --onnx silero_vad.onnx --duration 60
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 加入父目錄到 path 以便 import vad
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from audio_source import synthetic_audio
+from multistream import MultiStreamVAD, OnnxSileroBatchModel, PySileroBatchModel
+from vad import SileroVAD, VADConfig
+
+RATE = 16000
+BLOCK = 2048  # 每次餵入的樣本數（約 128 ms）
+
+
+def run_separate(streams: list[np.ndarray], config: VADConfig) -> int:
+    """每一路各自一個 SileroVAD"""
+    vads = [SileroVAD(config) for _ in streams]
+    count = 0
+    for offset in range(0, len(streams[0]), BLOCK):
+        for vad, audio in zip(vads, streams):
+            count += len(vad.feed(audio[offset:offset + BLOCK]))
+    return count
+
+
+def run_multi(streams: list[np.ndarray], config: VADConfig, model) -> int:
+    """MultiStreamVAD 批次推論"""
+    mvad = MultiStreamVAD(config, model=model)
+    for i in range(len(streams)):
+        mvad.add_stream(i)
+    count = 0
+    for offset in range(0, len(streams[0]), BLOCK):
+        count += len(mvad.feed({
+            i: audio[offset:offset + BLOCK] for i, audio in enumerate(streams)
+        }))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多路 VAD 效能測試")
+    parser.add_argument("--duration", type=float, default=30.0, help="每一路的音訊長度（秒）")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 4, 16], help="測試的音訊路數")
+    parser.add_argument("--onnx", type=str, default=None, help="silero_vad.onnx 路徑（測試整批推論）")
+    parser.add_argument("--energy-gate", action="store_true", help="開啟能量預先過濾")
+    args = parser.parse_args()
+    
+    config = VADConfig(sample_rate=RATE, energy_gate=args.energy_gate)
+    methods = [
+        ("separate", lambda s: run_separate(s, config)),
+        ("multi-pysilero", lambda s: run_multi(s, config, PySileroBatchModel())),
+    ]
+    if args.onnx:
+        onnx_model = OnnxSileroBatchModel(args.onnx)
+        methods.append(("multi-onnx", lambda s: run_multi(s, config, onnx_model)))
+    
+    print(f"每一路 {args.duration:.0f} 秒音訊，數值為 CPU 秒數 / 音訊秒數（越小越好）")
+    scaling_label = f"{args.streams[-1]} 路/{args.streams[0]} 路"
+    print(f"{'方法':<16}" + "".join(f"{n:>10} 路" for n in args.streams) + f"{scaling_label:>12}")
+    
+    for name, run in methods:
+        costs = []
+        for n in args.streams:
+            streams = [synthetic_audio("speech", args.duration, seed) for seed in range(n)]
+            start = time.process_time()
+            run(streams)
+            elapsed = time.process_time() - start
+            costs.append(elapsed / args.duration)
+        scaling = costs[-1] / costs[0] if costs[0] else 0.0
+        print(f"{name:<16}" + "".join(f"{c:>12.4f}" for c in costs) + f"{scaling:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+簡繁轉換效能測試
+
+比較 OpenCC('s2twp') 與 tw_convert：
+- 啟動成本：OpenCC 建構（import 時）與 tw_convert 第一次載入（無快取 / 有快取）
+- 每句成本：不重複的句子（無 LRU 命中）與重複的短句（字幕常見的「好的」「謝謝」）
+- 正確性：以字典中的詞隨機組合、截斷產生的句子，比對兩者輸出是否完全相同
+
+使用方式（從專案根目錄執行）:
+  uv run python benchmarks/bench_tw_convert.py
+  uv run python benchmarks/bench_tw_convert.py --sentences 20000
+"""
+import argparse
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from opencc import OpenCC
+
+# 加入父目錄到 path 以便 import tw_convert
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import tw_convert
+
+SEPARATORS = ["，", "。", "？", " ", "", "", ""]
+COMMON = ["好的", "谢谢", "对", "没问题", "那么我们开始吧", "大家好"]
+
+
+def first_load_ms(use_cache: bool) -> float:
+    """在新的行程中量測 tw_convert 第一次轉換（含載入字典）的時間"""
+    if not use_cache:
+        shutil.rmtree(tw_convert.CACHE_DIR, ignore_errors=True)
+    code = (
+        "import time; t = time.perf_counter(); import tw_convert; "
+        "tw_convert.convert_to_tw('软件'); print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout)
+
+
+def opencc_init_ms() -> float:
+    """在新的行程中量測 import opencc 與 OpenCC('s2twp') 建構的時間"""
+    code = (
+        "import time; t = time.perf_counter(); from opencc import OpenCC; "
+        "OpenCC('s2twp').convert('软件'); print((time.perf_counter() - t) * 1000)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+
+def make_sentences(count: int, seed: int) -> list[str]:
+    """以字典中的詞與常見字隨機組合出句子"""
+    root = tw_convert._opencc_dir() / "dictionary"
+    words = []
+    for name in ("STPhrases.txt", "STCharacters.txt", "TWPhrases.txt", "TWVariants.txt"):
+        with open(root / name, encoding="utf-8") as f:
+            words += [line.split("\t")[0] for line in f]
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        text = "".join(rng.choice(words) + rng.choice(SEPARATORS) for _ in range(rng.randint(2, 12)))
+        if rng.random() < 0.5:
+            # 截斷，讓句子的開頭與結尾落在詞的中間
+            a = rng.randint(0, len(text))
+            b = rng.randint(a, len(text))
+            text = text[a:b] + rng.choice(["OK", " 123", ""])
+        sentences.append(text)
+    return sentences
+
+
+def per_sentence_us(convert, sentences: list[str]) -> float:
+    start = time.perf_counter()
+    for text in sentences:
+        convert(text)
+    return (time.perf_counter() - start) / len(sentences) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="簡繁轉換效能測試")
+    parser.add_argument("--sentences", type=int, default=5000, help="比對與計時用的句子數量")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    parser.add_argument("--repeats", type=int, default=5, help="啟動成本的量測次數（取中位數）")
+    args = parser.parse_args()
+    
+    def median(values):
+        return sorted(values)[len(values) // 2]
+    
+    print("⏱️  啟動成本（新的行程，取中位數）")
+    print(f"   OpenCC('s2twp') 建構:       {median([opencc_init_ms() for _ in range(args.repeats)]):7.1f} ms（每次啟動）")
+    print(f"   tw_convert 首次載入（無快取）: {median([first_load_ms(False) for _ in range(args.repeats)]):7.1f} ms（只有第一次）")
+    print(f"   tw_convert 首次載入（有快取）: {median([first_load_ms(True) for _ in range(args.repeats)]):7.1f} ms（背景載入）")
+    
+    cc = OpenCC("s2twp")
+    sentences = make_sentences(args.sentences, args.seed)
+    
+    mismatches = [text for text in sentences if tw_convert.convert_to_tw(text) != cc.convert(text)]
+    print(f"\n🔍 正確性: {len(sentences) - len(mismatches)}/{len(sentences)} 句與 OpenCC 完全相同")
+    for text in mismatches[:5]:
+        print(f"   ❌ {text!r}: {tw_convert.convert_to_tw(text)!r} != {cc.convert(text)!r}")
+    
+    unique = make_sentences(args.sentences, args.seed + 1)
+    tw_convert._convert_piece.cache_clear()
+    print("\n⏱️  每句成本")
+    print(f"   不重複的句子: OpenCC {per_sentence_us(cc.convert, unique):6.1f} µs，"
+          f"tw_convert {per_sentence_us(tw_convert.convert_to_tw, unique):6.1f} µs")
+    rng = random.Random(args.seed)
+    repeated = [rng.choice(COMMON) for _ in range(args.sentences)]
+    print(f"   重複的短句:   OpenCC {per_sentence_us(cc.convert, repeated):6.1f} µs，"
+          f"tw_convert {per_sentence_us(tw_convert.convert_to_tw, repeated):6.1f} µs")
+    print(f"\n{tw_convert.summary()}")
+    
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+常駐的 Whisper 辨識引擎（mlx-whisper）
+
+mlx_whisper.transcribe() 每次呼叫都要查模型快取、重新建立解碼選項、
+走一遍為長音訊設計的分段流程。即時辨識的片段都在 30 秒以內，
+TranscriptionEngine 只載入一次模型，直接把 mel 交給 model.decode()：
+
+- load()：明確載入模型並記錄耗時
+- warmup()：用幾種代表性的長度各跑一次，讓 GPU kernel 先編譯好
+- transcribe()：30 秒以內直接解碼（沿用 transcribe() 的溫度退回與靜音判斷），
+  超過 30 秒或需要逐字時間戳記時才改用 mlx_whisper.transcribe()（共用同一個模型）
+- 沒有指定語言時先自行偵測，結果附上語言的機率與偵測耗時（給 StickyLanguage 使用）
+"""
+import time
+
+import numpy as np
+
+from backends import TranscriptionResult, Word, warmup_audio
+
+# 與 mlx_whisper.transcribe() 的預設值相同
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# 溫度大於 0 時取樣的候選數（與 mlx_whisper 命令列的預設值相同）
+BEST_OF = 5
+
+
+class TranscriptionEngine:
+    """
+    載入一次、常駐記憶體的 Whisper 模型
+    
+    使用方式：
+        engine = TranscriptionEngine("mlx-community/whisper-large-v3-mlx")
+        engine.load()
+        engine.warmup(language="zh")
+        print(engine.summary())
+        result = engine.transcribe(audio, language="zh")
+    """
+    
+    def __init__(self, model_path: str, fp16: bool = True):
+        import mlx.core as mx
+        import mlx_whisper
+        from mlx_whisper import audio as whisper_audio
+        from mlx_whisper.decoding import DecodingOptions
+        from mlx_whisper.load_models import load_model
+        from mlx_whisper.transcribe import ModelHolder
+        
+        self._mx = mx
+        self._mlx_whisper = mlx_whisper
+        self._audio = whisper_audio
+        self._DecodingOptions = DecodingOptions
+        self._load_model = load_model
+        self._ModelHolder = ModelHolder
+        
+        self.model_path = model_path
+        self.fp16 = fp16
+        self.dtype = mx.float16 if fp16 else mx.float32
+        self.model = None
+        # (language, task) -> 每個溫度的 DecodingOptions
+        self._options: dict[tuple[str | None, str], list] = {}
+        
+        # 統計
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        self.calls = 0
+        self.detections = 0  # 語言偵測的次數
+        self.fallbacks = 0  # 溫度退回的次數
+        self.total_seconds = 0.0
+    
+    def load(self) -> float:
+        """載入模型，返回耗時（秒）；已載入時不做任何事"""
+        if self.model is not None:
+            return 0.0
+        start = time.perf_counter()
+        self.model = self._load_model(self.model_path, dtype=self.dtype)
+        # 讓 mlx_whisper.transcribe() 直接使用同一個模型，不會再載入一次
+        self._ModelHolder.model = self.model
+        self._ModelHolder.model_path = self.model_path
+        self.load_seconds = time.perf_counter() - start
+        return self.load_seconds
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> float:
+        """依代表性的片段長度各辨識一次，返回耗時（秒）"""
+        self.load()
+        start = time.perf_counter()
+        for audio in warmup_audio():
+            self.transcribe(audio, language, task)
+        self.warmup_seconds = time.perf_counter() - start
+        # 預熱不算在統計裡
+        self.calls = self.detections = self.fallbacks = 0
+        self.total_seconds = 0.0
+        return self.warmup_seconds
+    
+    def _decoding_options(self, language: str | None, task: str) -> list:
+        """取得（並快取）每個溫度的解碼選項"""
+        key = (language, task)
+        options = self._options.get(key)
+        if options is None:
+            options = [
+                self._DecodingOptions(
+                    task=task,
+                    language=language,
+                    temperature=t,
+                    # 與 decode_with_fallback() 相同：只有溫度大於 0 時才取樣多個候選
+                    best_of=BEST_OF if t > 0 else None,
+                    fp16=self.fp16,
+                    without_timestamps=True,
+                )
+                for t in TEMPERATURES
+            ]
+            self._options[key] = options
+        return options
+    
+    def _mel(self, audio: np.ndarray):
+        """音訊 -> 補到 30 秒窗口的 log-mel"""
+        mel = self._audio.log_mel_spectrogram(
+            audio, n_mels=self.model.dims.n_mels, padding=self._audio.N_SAMPLES
+        )
+        return self._audio.pad_or_trim(mel, self._audio.N_FRAMES, axis=-2).astype(self.dtype)
+    
+    def detect_language(self, mel) -> tuple[str, float, float]:
+        """
+        偵測語言（與 mlx_whisper.transcribe() 相同，只看前 30 秒）
+        
+        Returns:
+            (語言, 機率, 耗時秒數)
+        """
+        start = time.perf_counter()
+        _, probs = self.model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, probs[language], time.perf_counter() - start
+    
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        """辨識一段音訊（16kHz mono float32）"""
+        self.load()
+        start = time.perf_counter()
+        self.calls += 1
+        
+        mel = probability = detect_seconds = None
+        if language is None and self.model.is_multilingual:
+            mel = self._mel(audio[:self._audio.N_SAMPLES])
+            language, probability, detect_seconds = self.detect_language(mel)
+            self.detections += 1
+        
+        if word_timestamps or len(audio) > self._audio.N_SAMPLES:
+            kwargs = {"path_or_hf_repo": self.model_path, "task": task, "fp16": self.fp16}
+            if language:
+                kwargs["language"] = language
+            if word_timestamps:
+                kwargs["word_timestamps"] = True
+            result = self._mlx_whisper.transcribe(audio, **kwargs)
+            segments = result["segments"]
+            words = None
+            if word_timestamps:
+                words = [
+                    Word(w["word"], w["start"], w["end"])
+                    for segment in segments
+                    for w in segment.get("words", [])
+                ]
+            avg_logprob = float(np.mean([s["avg_logprob"] for s in segments])) if segments else None
+            self.total_seconds += time.perf_counter() - start
+            return TranscriptionResult(
+                result["text"].strip(), result.get("language"), words,
+                language_probability=probability, detect_seconds=detect_seconds,
+                avg_logprob=avg_logprob,
+            )
+        
+        if mel is None:
+            mel = self._mel(audio)
+        result = None
+        for i, options in enumerate(self._decoding_options(language, task)):
+            if i:
+                self.fallbacks += 1
+            result = self.model.decode(mel, options)
+            # 與 decode_with_fallback() 相同的退回條件
+            needs_fallback = (
+                result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                or result.avg_logprob < LOGPROB_THRESHOLD
+            )
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                needs_fallback = False  # 靜音，不需要退回
+            if not needs_fallback:
+                break
+        
+        text = result.text.strip()
+        # 與 transcribe() 相同：判斷為靜音且信心不足時不輸出
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and not result.avg_logprob > LOGPROB_THRESHOLD:
+            text = ""
+        
+        self.total_seconds += time.perf_counter() - start
+        return TranscriptionResult(
+            text, result.language,
+            language_probability=probability, detect_seconds=detect_seconds,
+            avg_logprob=result.avg_logprob,
+        )
+    
+    def summary(self) -> str:
+        """載入、預熱與辨識的時間統計"""
+        mean = self.total_seconds / self.calls if self.calls else 0.0
+        return (
+            f"模型載入 {self.load_seconds:.2f} 秒，預熱 {self.warmup_seconds:.2f} 秒，"
+            f"辨識 {self.calls} 次（平均 {mean:.2f} 秒，語言偵測 {self.detections} 次，"
+            f"溫度退回 {self.fallbacks} 次）"
+        )
@@ -0,0 +1,137 @@
+"""
+機器可讀的事件輸出（--output jsonl）
+
+每個辨識完成的片段輸出一行 JSON（依語音順序），下游的字幕或分析流程不用再解析
+帶 emoji 與 ANSI 控制碼的文字輸出。事件欄位：
+
+- type：事件種類（目前只有 "segment"）
+- index：第幾個片段（從 0 開始）
+- start_sample / end_sample / speech_end_sample：在音訊串流中的樣本位置
+- start / end：同上，換算成秒（音訊時間）
+- finalized_at：VAD 送出片段的時間（Unix 時間，秒）
+- dequeued_at：辨識執行緒取出片段的時間
+- emitted_at：輸出事件的時間
+- queue_wait：finalized_at 到 dequeued_at（秒）
+- inference：辨識耗時（秒）；打包辨識時為同一批共用的時間，沿用推測結果時為 0
+- batch：同一次辨識的片段數
+- speculative_hit：是否直接沿用推測結果
+- text / language：辨識結果與語言（無法得知時為 null）
+
+寫入在背景執行緒進行：emit() 只把事件放進有上限的佇列，下游讀得慢時
+不會卡住辨識執行緒；佇列滿時丟掉新的事件並計數。
+
+使用方式：
+    events = EventWriter(sys.stdout)
+    events.emit(segment_event(index, segment, text, language, dequeued_at, inference))
+    events.close()
+    print(events.summary())
+"""
+import json
+import queue
+import threading
+import time
+from typing import TextIO
+
+from vad import Segment
+
+# 佇列上限（事件數），約等於下游停住時還能暫存的片段數
+MAX_PENDING = 1024
+
+
+def segment_event(
+    index: int,
+    segment: Segment,
+    text: str,
+    language: str | None,
+    dequeued_at: float,
+    inference: float,
+    batch: int = 1,
+    speculative_hit: bool = False,
+) -> dict:
+    """建立一個片段事件（時間為 time.time()，耗時為秒）"""
+    rate = segment.sample_rate
+    return {
+        "type": "segment",
+        "index": index,
+        "start_sample": segment.start_sample,
+        "end_sample": segment.end_sample,
+        "speech_end_sample": segment.speech_end_sample,
+        "start": round(segment.start_sample / rate, 3),
+        "end": round(segment.end_sample / rate, 3),
+        "finalized_at": round(segment.finalized_at, 3),
+        "dequeued_at": round(dequeued_at, 3),
+        "emitted_at": round(time.time(), 3),
+        "queue_wait": round(max(0.0, dequeued_at - segment.finalized_at), 4),
+        "inference": round(inference, 4),
+        "batch": batch,
+        "speculative_hit": speculative_hit,
+        "text": text,
+        "language": language,
+    }
+
+
+class EventWriter:
+    """
+    在背景執行緒把事件寫成 JSON Lines（emit() 不會阻塞）
+    
+    Args:
+        stream: 輸出的文字串流（例如 sys.stdout）
+        max_pending: 還沒寫出的事件上限，超過時丟掉新的事件
+    """
+    
+    def __init__(self, stream: TextIO, max_pending: int = MAX_PENDING):
+        self.stream = stream
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        
+        # 統計
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0  # 寫入失敗（例如下游關閉了管線）
+        
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+    
+    def emit(self, event: dict):
+        """放入一個事件（佇列滿時直接丟掉）"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+    
+    def _run(self):
+        """寫入執行緒：一次寫出佇列中所有的事件，再 flush 一次"""
+        while True:
+            events = [self._queue.get()]
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            done = events[-1] is None
+            lines = [json.dumps(e, ensure_ascii=False) + "\n" for e in events if e is not None]
+            if lines and not self.errors:
+                try:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+                    self.written += len(lines)
+                except (OSError, ValueError):
+                    # 下游已經關閉：之後的事件都丟掉，不影響辨識
+                    self.errors += 1
+            if done:
+                return
+    
+    def close(self, timeout: float = 2.0):
+        """寫完佇列中剩下的事件後停止"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        text = f"事件輸出: 寫出 {self.written} 筆，丟棄 {self.dropped} 筆"
+        if self.errors:
+            text += "（下游已關閉）"
+        return text
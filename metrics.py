@@ -0,0 +1,234 @@
+"""
+本機的 Prometheus 指標端點（--metrics-port）
+
+長時間運作的字幕站平常只看得到「堆積 N 句」這一行；開啟後在 127.0.0.1 提供
+http://127.0.0.1:PORT/metrics（Prometheus 文字格式），用來監控與告警：
+
+- whisper_queue_depth / whisper_queue_oldest_age_seconds：辨識佇列的長度與最舊片段的等待時間
+- whisper_segments_processed_total：辨識完成的片段數
+- whisper_segments_dropped_total{reason}：沒有辨識的片段（佇列丟棄、合併、品質檢查）；
+  reason="queue" 只算最終片段，丟掉的推測片段另計為 reason="speculative"（不是遺失）
+- whisper_audio_seconds_total{kind} / whisper_inference_seconds_total{kind}：音訊長度與辨識耗時，
+  兩者的 rate() 相除就是一段時間內的 real-time factor；
+  kind="final" 為最終片段，kind="speculative" 為推測片段（--speculative）的辨識
+- whisper_real_time_factor{kind}：片段的辨識耗時 / 片段長度（直方圖）
+- whisper_stage_latency_seconds{stage}：各階段的延遲（直方圖）
+  - vad：最後一個語音 chunk 到 VAD 送出片段（音訊時間，主要是等待靜音）
+  - queue_wait：VAD 送出片段到辨識執行緒取出
+  - inference：辨識耗時（打包辨識時依片段長度分攤同一批的時間）
+  - e2e：VAD 送出片段到文字顯示
+- whisper_vad_model_calls_total / whisper_vad_gated_chunks_total：VAD 模型呼叫次數與能量過濾略過次數
+- whisper_capture_late_total：錄音讀取間隔超過兩倍區塊長度的次數（麥克風緩衝區可能溢位）
+
+只用標準函式庫（http.server），不需要 prometheus_client。
+時間序列的值大多在抓取時才向各元件讀取（佇列、VAD、CaptureTimer 原本就有這些統計）。
+
+使用方式：
+    metrics = MetricsServer(9464)
+    metrics.gauge("whisper_queue_depth", "辨識佇列中的片段數", transcription_queue.qsize)
+    metrics.start()
+    
+    # 辨識執行緒
+    metrics.observe_segment(segment, dequeued_at, inference)
+    metrics.close()
+"""
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vad import Segment
+
+# 延遲的直方圖區間（秒）：涵蓋短句的辨識時間到嚴重堆積
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+# real-time factor 的直方圖區間
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0)
+STAGES = ("vad", "queue_wait", "inference", "e2e")
+# 辨識的種類：最終片段與推測片段（推測片段的辨識也佔用模型時間）
+KINDS = ("final", "speculative")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """累積的直方圖（與 Prometheus 相同：每個區間計算小於等於上限的次數）"""
+    
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+    
+    def samples(self, name: str, labels: dict[str, str]) -> list[str]:
+        """輸出 _bucket / _sum / _count"""
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            bucket = _format_labels({**labels, "le": _format_value(upper)})
+            lines.append(f"{name}_bucket{bucket} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricsServer:
+    """
+    Prometheus 指標與本機 HTTP 端點（執行緒安全）
+    
+    Args:
+        port: 監聽的埠號（0 為自動選擇，實際埠號見 self.port）
+        host: 監聽的位址，預設只接受本機連線
+    """
+    
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        # 名稱 -> (類型, 說明, [(標籤, 讀取函式)])，抓取時才讀取
+        self._collected: dict[str, tuple[str, str, list[tuple[dict[str, str], Callable[[], float]]]]] = {}
+        
+        # 辨識執行緒更新的統計
+        self.processed = 0
+        self.audio_seconds = dict.fromkeys(KINDS, 0.0)
+        self.inference_seconds = dict.fromkeys(KINDS, 0.0)
+        self.stages = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.rtf = {kind: Histogram(RTF_BUCKETS) for kind in KINDS}
+        
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+    
+    def gauge(self, name: str, help: str, read: Callable[[], float], **labels: str):
+        """登記一個抓取時才讀取的 gauge"""
+        self._register(name, "gauge", help, read, labels)
+    
+    def counter(self, name: str, help: str, read: Callable[[], float], **labels: str):
+        """登記一個抓取時才讀取的 counter（讀取函式返回累計值）"""
+        self._register(name, "counter", help, read, labels)
+    
+    def _register(self, name: str, kind: str, help: str, read: Callable[[], float], labels: dict[str, str]):
+        with self._lock:
+            entry = self._collected.setdefault(name, (kind, help, []))
+            entry[2].append((labels, read))
+    
+    def observe(self, stage: str, seconds: float):
+        """記錄一個階段的延遲（STAGES 之一）"""
+        with self._lock:
+            self.stages[stage].observe(seconds)
+    
+    def observe_segment(self, segment: Segment, dequeued_at: float, inference: float | None):
+        """
+        記錄一個辨識完成的片段（辨識執行緒呼叫）
+        
+        inference 為 None 時表示沒有另外辨識（直接沿用推測結果），不計入辨識耗時。
+        """
+        rate = segment.sample_rate
+        with self._lock:
+            self.processed += 1
+            self.stages["vad"].observe((segment.end_sample - segment.speech_end_sample) / rate)
+            self.stages["queue_wait"].observe(max(0.0, dequeued_at - segment.finalized_at))
+            if inference is not None:
+                self.stages["inference"].observe(inference)
+                self._observe_inference("final", segment, inference)
+    
+    def observe_speculative(self, segment: Segment, inference: float):
+        """記錄一次推測片段的辨識（不算辨識完成的片段，只計入模型耗時）"""
+        with self._lock:
+            self._observe_inference("speculative", segment, inference)
+    
+    def _observe_inference(self, kind: str, segment: Segment, inference: float):
+        """呼叫前需要持有 self._lock"""
+        self.audio_seconds[kind] += segment.duration
+        self.inference_seconds[kind] += inference
+        if segment.duration > 0:
+            self.rtf[kind].observe(inference / segment.duration)
+    
+    def render(self) -> str:
+        """Prometheus 文字格式"""
+        lines = []
+        
+        def header(name: str, kind: str, help: str):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        with self._lock:
+            collected = {name: (kind, help, list(entries)) for name, (kind, help, entries) in self._collected.items()}
+            header("whisper_segments_processed_total", "counter", "辨識完成的片段數")
+            lines.append(f"whisper_segments_processed_total {self.processed}")
+            header("whisper_audio_seconds_total", "counter", "已辨識的音訊長度（秒）")
+            for kind, value in self.audio_seconds.items():
+                lines.append(f"whisper_audio_seconds_total{_format_labels({'kind': kind})} {_format_value(value)}")
+            header("whisper_inference_seconds_total", "counter", "辨識耗時（秒）")
+            for kind, value in self.inference_seconds.items():
+                lines.append(f"whisper_inference_seconds_total{_format_labels({'kind': kind})} {_format_value(value)}")
+            header("whisper_real_time_factor", "histogram", "片段的辨識耗時 / 片段長度")
+            for kind, histogram in self.rtf.items():
+                lines += histogram.samples("whisper_real_time_factor", {"kind": kind})
+            header("whisper_stage_latency_seconds", "histogram", "各階段的延遲（秒）")
+            for stage, histogram in self.stages.items():
+                lines += histogram.samples("whisper_stage_latency_seconds", {"stage": stage})
+        
+        for name, (kind, help, entries) in collected.items():
+            header(name, kind, help)
+            for labels, read in entries:
+                try:
+                    value = read()
+                except Exception:
+                    continue  # 讀取失敗（例如元件已經關閉）時略過這個值
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+    
+    def start(self):
+        """在背景執行緒開始提供 /metrics"""
+        metrics = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # 不要把每次抓取印到畫面上
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+    
+    def close(self):
+        """停止 HTTP 端點"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
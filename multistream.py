@@ -0,0 +1,237 @@
+"""
+多路音訊的 VAD 管理
+
+每一路音訊（多支麥克風、網路傳進來的音訊）都有自己的 SileroVAD 狀態機，
+但每個 tick 會把所有音訊來源的 chunk 湊成一批，一次算完語音機率。
+
+語音機率模型：
+- PySileroBatchModel（預設）：使用 pysilero-vad，每一路各有一個模型狀態，
+  逐路推論（pysilero-vad 沒有批次介面），和分別建立多個 SileroVAD 的成本差不多
+- OnnxSileroBatchModel：使用 onnxruntime 與官方 silero_vad.onnx，
+  所有音訊來源共用同一個模型，每個 tick 只呼叫一次
+"""
+from collections.abc import Hashable, Mapping
+
+import numpy as np
+from pysilero_vad import SileroVoiceActivityDetector
+
+from vad import Segment, SileroVAD, VADConfig, to_float32
+
+# Silero VAD 在 16kHz 下的 chunk 大小與 ONNX 模型需要的前文長度
+CHUNK_SAMPLES = 512
+ONNX_CONTEXT_SAMPLES = 64
+
+
+class PySileroBatchModel:
+    """
+    pysilero-vad 模型：每一路一個模型狀態，逐路推論
+    
+    MultiStreamVAD 的預設模型，不需要額外套件，但沒有批次推論的效果：
+    每個 tick 仍然是每一路呼叫一次模型。需要整批推論時改用 OnnxSileroBatchModel
+    （onnxruntime + silero_vad.onnx，效能比較見 benchmarks/bench_multistream.py --onnx）。
+    """
+    
+    def create_detector(self) -> SileroVoiceActivityDetector:
+        """建立一路音訊使用的偵測器"""
+        return SileroVoiceActivityDetector()
+    
+    def batch_probs(self, detectors: list, frames: np.ndarray) -> np.ndarray:
+        """計算一批 chunk 的語音機率（每一路一個 chunk）"""
+        return np.fromiter(
+            (detector.process_samples(frame) for detector, frame in zip(detectors, frames)),
+            dtype=np.float64,
+            count=len(detectors),
+        )
+
+
+class OnnxSileroBatchModel:
+    """
+    onnxruntime 版本的 Silero VAD：所有音訊來源共用一個模型，一次推論整批
+    
+    需要另外安裝 onnxruntime，並提供官方的 silero_vad.onnx（v5 以後的版本）。
+    """
+    
+    def __init__(self, model_path: str):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "批次 VAD 推論需要 onnxruntime：uv pip install onnxruntime"
+            ) from e
+        
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._sample_rate = np.array(16000, dtype=np.int64)
+    
+    def create_detector(self) -> "OnnxSileroDetector":
+        """建立一路音訊使用的偵測器（只保存該路的模型狀態）"""
+        return OnnxSileroDetector(self)
+    
+    def batch_probs(self, detectors: list, frames: np.ndarray) -> np.ndarray:
+        """計算一批 chunk 的語音機率（每一路一個 chunk）"""
+        if not detectors:
+            return np.empty(0, dtype=np.float64)
+        
+        # 每一路的前文接在 chunk 前面，狀態疊成 (2, batch, 128)
+        inputs = np.concatenate(
+            (np.stack([d.context for d in detectors]), frames), axis=1
+        ).astype(np.float32, copy=False)
+        state = np.stack([d.state for d in detectors], axis=1)
+        
+        out, state = self.session.run(
+            None, {"input": inputs, "state": state, "sr": self._sample_rate}
+        )
+        
+        for i, detector in enumerate(detectors):
+            detector.state = state[:, i]
+            detector.context = inputs[i, -ONNX_CONTEXT_SAMPLES:]
+        return out[:, 0].astype(np.float64)
+
+
+class OnnxSileroDetector:
+    """OnnxSileroBatchModel 中一路音訊的模型狀態，介面與 SileroVoiceActivityDetector 相同"""
+    
+    def __init__(self, model: OnnxSileroBatchModel):
+        self.model = model
+        self.reset()
+    
+    @staticmethod
+    def chunk_samples() -> int:
+        return CHUNK_SAMPLES
+    
+    @staticmethod
+    def chunk_bytes() -> int:
+        return CHUNK_SAMPLES * 2
+    
+    def reset(self):
+        self.state = np.zeros((2, 128), dtype=np.float32)
+        self.context = np.zeros(ONNX_CONTEXT_SAMPLES, dtype=np.float32)
+    
+    def process_samples(self, samples: np.ndarray) -> float:
+        """單獨計算一個 chunk（不和其他音訊來源一起批次推論時使用）"""
+        return float(self.model.batch_probs([self], samples.reshape(1, -1))[0])
+
+
+class _Stream:
+    """一路音訊：狀態機與尚未處理的樣本"""
+    
+    def __init__(self, key: Hashable, vad: SileroVAD):
+        self.key = key
+        self.vad = vad
+        self.pending = np.empty(0, dtype=np.float32)
+        self.offset = 0
+    
+    def available(self) -> int:
+        return len(self.pending) - self.offset
+
+
+class MultiStreamVAD:
+    """
+    多路音訊 VAD
+    
+    使用方式：
+        mvad = MultiStreamVAD(config, model=OnnxSileroBatchModel("silero_vad.onnx"))
+        mvad.add_stream("mic-1")
+        mvad.add_stream("mic-2")
+        
+        while True:
+            blocks = {"mic-1": read_mic1(), "mic-2": read_mic2()}
+            for key, segment in mvad.feed(blocks):
+                transcribe(key, segment.audio)
+    """
+    
+    def __init__(self, config: VADConfig | None = None, model=None):
+        self.config = config or VADConfig()
+        self.model = model or PySileroBatchModel()
+        self.streams: dict[Hashable, _Stream] = {}
+        
+        # 統計
+        self.ticks = 0
+        self.batched_chunks = 0
+    
+    def add_stream(self, key: Hashable) -> SileroVAD:
+        """新增一路音訊，返回該路的狀態機"""
+        if key in self.streams:
+            raise ValueError(f"音訊來源已存在: {key}")
+        vad = SileroVAD(self.config, detector=self.model.create_detector())
+        self.streams[key] = _Stream(key, vad)
+        return vad
+    
+    def remove_stream(self, key: Hashable) -> Segment | None:
+        """移除一路音訊，返回該路剩餘的語音"""
+        stream = self.streams.pop(key)
+        return stream.vad.finalize()
+    
+    def feed(self, blocks: Mapping[Hashable, bytes | np.ndarray]) -> list[tuple[Hashable, Segment]]:
+        """
+        餵入各路音訊（長度不限，不足一個 chunk 的部分會留到下次）
+        
+        每個 tick 從每一路各取一個 chunk，湊成一批計算語音機率。
+        
+        Returns:
+            [(音訊來源, 片段), ...]，同一路的片段依時間順序排列
+        """
+        for key, audio in blocks.items():
+            if not isinstance(audio, np.ndarray):
+                audio = np.frombuffer(audio, dtype=np.int16)
+            stream = self.streams[key]
+            stream.pending = np.concatenate(
+                (stream.pending[stream.offset:], to_float32(audio))
+            )
+            stream.offset = 0
+        
+        results = []
+        while True:
+            ready = [s for s in self.streams.values() if s.available() >= CHUNK_SAMPLES]
+            if not ready:
+                break
+            results.extend(self._tick(ready))
+        return results
+    
+    def _tick(self, ready: list[_Stream]) -> list[tuple[Hashable, Segment]]:
+        """處理一批 chunk（每一路一個）"""
+        frames = np.stack([
+            s.pending[s.offset:s.offset + CHUNK_SAMPLES] for s in ready
+        ])
+        for s in ready:
+            s.offset += CHUNK_SAMPLES
+        
+        # 能量預先過濾一次算完整批，只有需要的 chunk 才送進模型
+        mask = ready[0].vad.gate_mask(frames)
+        indices = np.arange(len(ready)) if mask is None else np.flatnonzero(~mask)
+        probs = np.zeros(len(ready), dtype=np.float64)
+        if len(indices):
+            probs[indices] = self.model.batch_probs(
+                [ready[i].vad.vad for i in indices.tolist()], frames[indices]
+            )
+        
+        self.ticks += 1
+        self.batched_chunks += len(indices)
+        
+        results = []
+        for i, stream in enumerate(ready):
+            gated = mask is not None and bool(mask[i])
+            segment = stream.vad.step(frames[i], float(probs[i]), gated)
+            if segment is not None:
+                results.append((stream.key, segment))
+        return results
+    
+    def finalize(self) -> list[tuple[Hashable, Segment]]:
+        """結束所有音訊來源，返回剩餘的語音"""
+        results = []
+        for stream in self.streams.values():
+            stream.pending = np.empty(0, dtype=np.float32)
+            stream.offset = 0
+            segment = stream.vad.finalize()
+            if segment is not None:
+                results.append((stream.key, segment))
+        return results
+    
+    @property
+    def mean_batch_size(self) -> float:
+        """平均每次模型推論處理的 chunk 數"""
+        return self.batched_chunks / self.ticks if self.ticks else 0.0
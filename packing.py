@@ -0,0 +1,85 @@
+"""
+打包辨識
+
+Whisper 每次都把輸入補到 30 秒的 mel 窗口，0.5 秒的「好，可以」也要跑一次完整的 encoder。
+佇列裡堆積好幾個片段時，把它們用短靜音接成一段（不超過一個窗口）一次辨識，
+再依逐字時間戳記把文字分回各個片段。
+
+使用方式：
+    texts = transcribe_packed(backend, [seg.audio for seg in segments], language, task)
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from backends import TranscriptionBackend, Word
+
+SAMPLE_RATE = 16000
+
+# 片段之間插入的靜音（秒），讓 Whisper 在片段交界處斷句
+PACK_GAP = 0.3
+# 打包後的長度上限（秒），留一點餘裕給 Whisper 的 30 秒窗口
+PACK_MAX_DURATION = 29.0
+
+
+@dataclass
+class PackedAudio:
+    """打包後的音訊與每個片段在其中的位置"""
+    audio: np.ndarray
+    # 每個片段的 (開始, 結束)（秒）
+    spans: list[tuple[float, float]]
+
+
+def packed_length(lengths: list[int], gap: float = PACK_GAP) -> int:
+    """打包後的樣本數"""
+    return sum(lengths) + int(gap * SAMPLE_RATE) * max(0, len(lengths) - 1)
+
+
+def pack_audio(audios: list[np.ndarray], gap: float = PACK_GAP) -> PackedAudio:
+    """把多段音訊用靜音接成一段"""
+    gap_samples = int(gap * SAMPLE_RATE)
+    packed = np.zeros(packed_length([len(a) for a in audios], gap), dtype=np.float32)
+    
+    spans = []
+    pos = 0
+    for audio in audios:
+        packed[pos:pos + len(audio)] = audio
+        spans.append((pos / SAMPLE_RATE, (pos + len(audio)) / SAMPLE_RATE))
+        pos += len(audio) + gap_samples
+    return PackedAudio(packed, spans)
+
+
+def split_words(words: list[Word], spans: list[tuple[float, float]]) -> list[str]:
+    """
+    依時間戳記把字詞分回各個片段
+    
+    每個字詞歸到中點所在的片段；落在靜音裡的字詞歸到最近的片段。
+    """
+    texts = [[] for _ in spans]
+    # 相鄰片段之間以靜音中點為界
+    bounds = [(a_end + b_start) / 2 for (_, a_end), (b_start, _) in zip(spans, spans[1:])]
+    for word in words:
+        mid = (word.start + word.end) / 2
+        index = int(np.searchsorted(bounds, mid, side="right"))
+        texts[index].append(word.text)
+    return ["".join(t).strip() for t in texts]
+
+
+def transcribe_packed(
+    backend: TranscriptionBackend,
+    audios: list[np.ndarray],
+    language: str | None = None,
+    task: str = "transcribe",
+    gap: float = PACK_GAP,
+) -> list[str]:
+    """
+    把多個片段打包成一次辨識，返回每個片段的文字
+    
+    後端不支援逐字時間戳記時，改為逐段辨識。
+    """
+    if len(audios) == 1 or not backend.supports_word_timestamps:
+        return [backend.transcribe(a, language=language, task=task).text for a in audios]
+    
+    packed = pack_audio(audios, gap)
+    result = backend.transcribe(packed.audio, language=language, task=task, word_timestamps=True)
+    return split_words(result.words or [], packed.spans)
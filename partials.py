@@ -0,0 +1,134 @@
+"""
+邊說邊顯示的暫時辨識結果
+
+語音還在累積時，每隔一段音訊就把目前的內容重新辨識一次，
+用 local agreement 決定哪些字已經穩定：連續兩次辨識結果開頭相同的部分才確定，
+其餘（尾端）每次都可能變動，以不同樣式顯示。
+
+- 錄音執行緒：每次 vad.feed() 之後呼叫 partials.offer(vad)
+- 辨識執行緒：佇列沒有最終片段時呼叫 partials.take() 取得最新的音訊，
+  辨識後以 partials.update() 取得 (已確定, 未確定) 的文字；
+  最終片段辨識完成後呼叫 partials.finish(segment)
+"""
+import re
+import threading
+
+import numpy as np
+
+from vad import Segment, SileroVAD
+
+# 中日韓文字與全形標點逐字比對，其他文字以「空白 + 單字」為單位
+_CJK = r"\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef\u3000-\u303f"
+_UNIT_PATTERN = re.compile(rf"[{_CJK}]|\s*[^\s{_CJK}]+")
+
+
+def split_units(text: str) -> list[str]:
+    """把文字切成比對單位，"".join() 可以還原（不含頭尾空白）"""
+    return _UNIT_PATTERN.findall(text.strip())
+
+
+class LocalAgreement:
+    """
+    Local agreement：連續兩次假設的共同前綴才確定，確定的字不會再改變
+    
+    每次傳入的是從語音開頭重新辨識的完整假設。
+    """
+    
+    def __init__(self):
+        self.committed: list[str] = []
+        self.previous: list[str] = []
+    
+    def update(self, text: str) -> tuple[str, str]:
+        """
+        加入新的假設
+        
+        Returns:
+            (已確定的文字, 未確定的尾端)
+        """
+        units = split_units(text)
+        n = len(self.committed)
+        # 只比對已確定部分之後的字
+        new, old = units[n:], self.previous[n:]
+        agree = 0
+        for a, b in zip(new, old):
+            if a != b:
+                break
+            agree += 1
+        self.committed.extend(new[:agree])
+        self.previous = units
+        return "".join(self.committed), "".join(units[len(self.committed):])
+    
+    def reset(self):
+        self.committed = []
+        self.previous = []
+
+
+class PartialTranscriber:
+    """
+    暫時結果的快照與 local agreement 狀態（執行緒安全）
+    
+    錄音執行緒只保留最新的一份快照；辨識執行緒忙不過來時，
+    中間的快照會被直接取代，不會堆積。
+    """
+    
+    def __init__(self, interval: float = 0.5, sample_rate: int = 16000):
+        # 語音每多累積 interval 秒就重新辨識一次
+        self.interval_samples = int(interval * sample_rate)
+        self._lock = threading.Lock()
+        self._snapshot: tuple[int, np.ndarray] | None = None
+        # 目前快照所屬語音的開始樣本與上次快照時的長度
+        self._offered_start = -1
+        self._offered_length = 0
+        # 已經送出最終片段的位置，之前的快照都作廢
+        self._finished_sample = 0
+        
+        # 只由辨識執行緒使用
+        self._agreement = LocalAgreement()
+        self._agreement_start = -1
+        self.visible = False  # 畫面上是否有暫時結果
+        
+        # 統計
+        self.passes = 0
+    
+    def offer(self, vad: SileroVAD):
+        """錄音執行緒：語音累積到下一個間隔時保存快照"""
+        current = vad.current_audio()
+        if current is None:
+            return
+        start, audio = current
+        if start != self._offered_start:
+            self._offered_start = start
+            self._offered_length = 0
+        if len(audio) - self._offered_length < self.interval_samples:
+            return
+        self._offered_length = len(audio)
+        with self._lock:
+            self._snapshot = (start, audio)
+    
+    def take(self) -> tuple[int, np.ndarray] | None:
+        """辨識執行緒：取出最新的快照（沒有或已經過時返回 None）"""
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+            if snapshot is None or snapshot[0] < self._finished_sample:
+                return None
+            return snapshot
+    
+    def update(self, start: int, text: str) -> tuple[str, str]:
+        """辨識執行緒：加入快照的辨識結果，返回 (已確定, 未確定)"""
+        if start != self._agreement_start:
+            self._agreement.reset()
+            self._agreement_start = start
+        self.passes += 1
+        committed, tail = self._agreement.update(text)
+        self.visible = bool(committed or tail)
+        return committed, tail
+    
+    def finish(self, segment: Segment):
+        """辨識執行緒：最終片段已經顯示，清掉這段語音的暫時結果"""
+        with self._lock:
+            self._finished_sample = max(self._finished_sample, segment.end_sample)
+            if self._snapshot is not None and self._snapshot[0] < self._finished_sample:
+                self._snapshot = None
+        self._agreement.reset()
+        self._agreement_start = -1
+        self.visible = False
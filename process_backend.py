@@ -0,0 +1,228 @@
+"""
+在獨立行程中辨識
+
+錄音、VAD 與模型推論都在同一個行程時，推論中持有 GIL 的部分（解碼迴圈、tokenizer、
+轉換結果）會讓錄音執行緒拿不到 CPU，stream.read() 延遲、音效卡緩衝區溢位。
+ProcessBackend 把辨識後端放到子行程：
+
+- 音訊透過 multiprocessing.shared_memory 的環狀槽位交給子行程，不經過 pickle
+- 請求（槽位編號、長度、參數）與結果（TranscriptionResult）透過 Pipe 傳遞
+- 多個執行緒可以同時送出請求，子行程依序辨識，由接收執行緒把結果交還給各自的呼叫者
+
+使用方式：
+    backend = ProcessBackend("mlx", "mlx-community/whisper-large-v3-mlx")
+    backend.warmup(language="zh")
+    result = backend.transcribe(audio, language="zh")
+    backend.close()
+"""
+import atexit
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backends import TranscriptionResult, create_backend
+
+SAMPLE_RATE = 16000
+
+# 槽位數量與每個槽位的長度（秒）：打包與合併的片段最長 30 秒，留一點餘裕
+SLOTS = 4
+SLOT_DURATION = 35.0
+
+
+def _serve(conn, shm_name: str, slots: int, slot_samples: int, name: str, model: str | None, options: dict):
+    """子行程：建立後端，依序處理請求"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots, slot_samples), dtype=np.float32, buffer=shm.buf)
+    try:
+        backend = create_backend(name, model, **options)
+        conn.send(("ready", {
+            "name": backend.name,
+            "model": getattr(backend, "model", model),
+            "supports_translate": backend.supports_translate,
+            "supports_language_detection": backend.supports_language_detection,
+            "supports_word_timestamps": backend.supports_word_timestamps,
+        }))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        
+        request_id, command, args = request
+        try:
+            if command == "transcribe":
+                slot, samples, audio, language, task, word_timestamps = args
+                if audio is None:
+                    # 共用記憶體的視圖：辨識完成、回覆之前，主行程不會重複使用這個槽位
+                    audio = ring[slot, :samples]
+                reply = backend.transcribe(audio, language, task, word_timestamps)
+            elif command == "load":
+                reply = (backend.load(), backend.load_seconds)
+            elif command == "warmup":
+                backend.warmup(*args)
+                reply = (backend.load_seconds, backend.warmup_seconds)
+            else:
+                raise ValueError(f"未知的指令: {command}")
+            conn.send((request_id, "ok", reply))
+        except Exception as e:
+            conn.send((request_id, "error", f"{type(e).__name__}: {e}"))
+    
+    del ring
+    shm.close()
+
+
+class ProcessBackend:
+    """
+    在子行程中執行的辨識後端（介面與 TranscriptionBackend 相同，執行緒安全）
+    
+    Args:
+        name / model / options: 傳給子行程的 create_backend()
+        slots: 共用記憶體的槽位數量（同時進行中的請求上限）
+        slot_duration: 每個槽位的長度（秒），更長的音訊改用 Pipe 傳送
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        model: str | None = None,
+        slots: int = SLOTS,
+        slot_duration: float = SLOT_DURATION,
+        **options,
+    ):
+        self.slot_samples = int(slot_duration * SAMPLE_RATE)
+        self._closed = False
+        self._send_lock = threading.Lock()
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_samples * 4)
+        self._ring = np.ndarray((slots, self.slot_samples), dtype=np.float32, buffer=self._shm.buf)
+        self._free: queue.Queue[int] = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        
+        # macOS 預設就是 spawn；明確指定，避免 fork 時複製模型與執行緒狀態
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_serve,
+            args=(child_conn, self._shm.name, slots, self.slot_samples, name, model, options),
+            name=f"transcribe-{name}",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        
+        try:
+            status, info = self._conn.recv()
+        except EOFError:
+            status, info = "error", f"子行程意外結束（exit code {self._process.exitcode}）"
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"辨識行程啟動失敗: {info}")
+        self.name = info["name"]
+        self.model = info["model"]
+        self.supports_translate = info["supports_translate"]
+        self.supports_language_detection = info["supports_language_detection"]
+        self.supports_word_timestamps = info["supports_word_timestamps"]
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        
+        self._ids = itertools.count()
+        # 請求編號 -> [完成事件, 狀態, 結果]
+        self._pending: dict[int, list] = {}
+        self._pending_lock = threading.Lock()
+        
+        # 統計
+        self.pickled = 0  # 超過槽位長度、改用 Pipe 傳送的次數
+        
+        self._receiver = threading.Thread(target=self._receive, name="transcribe-receiver", daemon=True)
+        self._receiver.start()
+        atexit.register(self.close)
+    
+    def _receive(self):
+        """接收執行緒：把子行程的回覆交給等待中的呼叫者"""
+        while True:
+            try:
+                request_id, status, reply = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                waiter = self._pending.pop(request_id, None)
+            if waiter is not None:
+                waiter[1:] = [status, reply]
+                waiter[0].set()
+        
+        # 子行程結束：喚醒所有等待中的呼叫者
+        with self._pending_lock:
+            waiters, self._pending = list(self._pending.values()), {}
+        for waiter in waiters:
+            waiter[1:] = ["error", "辨識行程已結束"]
+            waiter[0].set()
+    
+    def _call(self, command: str, args: tuple):
+        """送出請求並等待結果"""
+        if self._closed:
+            raise RuntimeError("辨識行程已關閉")
+        request_id = next(self._ids)
+        waiter = [threading.Event(), None, None]
+        with self._pending_lock:
+            self._pending[request_id] = waiter
+        with self._send_lock:
+            self._conn.send((request_id, command, args))
+        waiter[0].wait()
+        _, status, reply = waiter
+        if status != "ok":
+            raise RuntimeError(f"辨識行程錯誤: {reply}")
+        return reply
+    
+    def load(self) -> float:
+        elapsed, self.load_seconds = self._call("load", ())
+        return elapsed
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        self.load_seconds, self.warmup_seconds = self._call("warmup", (language, task))
+    
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        if len(audio) > self.slot_samples:
+            # 很少見（--max-speech-duration 0 的長句）：直接經由 Pipe 傳送
+            self.pickled += 1
+            return self._call("transcribe", (0, len(audio), audio, language, task, word_timestamps))
+        
+        slot = self._free.get()
+        try:
+            self._ring[slot, :len(audio)] = audio
+            return self._call("transcribe", (slot, len(audio), None, language, task, word_timestamps))
+        finally:
+            self._free.put(slot)
+    
+    def close(self):
+        """結束子行程並釋放共用記憶體（可以重複呼叫）"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except OSError:
+            pass  # 子行程已經結束
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+        del self._ring
+        self._shm.close()
+        self._shm.unlink()
@@ -19,19 +19,41 @@ MLX Whisper 即時語音辨識（使用 Apple Silicon GPU）
   
   # 列出本地模型
   uv run python realtime.py --list
+  
+  # 各啟動階段的耗時
+  uv run python realtime.py --startup-report
+  
+  # 每個片段輸出一行 JSON 到標準輸出（其他訊息改到標準錯誤）
+  uv run python realtime.py --output jsonl > events.jsonl
+  
+  # 在 http://127.0.0.1:9464/metrics 提供 Prometheus 指標
+  uv run python realtime.py --metrics-port 9464
+  
+  # 錄下音訊與切段結果，事後重播（可加速或 --fast）
+  uv run python realtime.py --record sessions/0601
+  uv run python realtime.py --input replay:sessions/0601:4
 """
 import argparse
+import functools
+import shutil
 import sys
 import threading
 import queue
 import time
-import numpy as np
-import pyaudio
-import mlx_whisper
 from pathlib import Path
-from opencc import OpenCC
+from typing import TYPE_CHECKING
 
-from vad import SileroVAD, VADConfig
+# 這裡只 import 不需要 numpy 的模組，--help、--list 與參數錯誤可以立即返回；
+# numpy、VAD 模型、音訊來源等在 main() 解析完參數後才載入
+from backends import BACKENDS, TranscriptionBackend, TranscriptionResult, startup_summary
+from segment_queue import POLICIES, SegmentQueue
+from startup import StartupTimer
+import tw_convert
+from tw_convert import convert_to_tw
+from worker_pool import ReorderBuffer, create_pool
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # ===========================================
 # 預設設定
@@ -42,16 +64,15 @@ MODELS_DIR = Path(__file__).parent / "models"
 # ===========================================
 # 錄音設定
 # ===========================================
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 16000
 CHUNK = 512  # Silero VAD 需要特定大小，512 是 16kHz 下的標準值
+BLOCK = CHUNK * 4  # 每次從裝置讀取約 128 ms，由 vad.feed() 切成 chunk，減少系統呼叫與 GIL 切換
 
 # ===========================================
 # 簡繁轉換（臺灣繁體）
 # ===========================================
 # s2twp: 簡體中文 -> 繁體中文（台灣），包含常用詞轉換（如「鼠標」→「滑鼠」）
-cc = OpenCC('s2twp')
+# convert_to_tw() 在第一次轉換時才載入字典（tw_convert.py）
 
 
 def should_convert_to_tw(model: str) -> bool:
@@ -60,11 +81,6 @@ def should_convert_to_tw(model: str) -> bool:
     return model.startswith("mlx-community/whisper")
 
 
-def convert_to_tw(text: str) -> str:
-    """將文字轉換成臺灣繁體中文"""
-    return cc.convert(text)
-
-
 def list_local_models() -> list[str]:
     """列出所有可用的本地模型"""
     if not MODELS_DIR.exists():
@@ -113,29 +129,32 @@ def resolve_model(model_name: str | None) -> str:
     return f"mlx-community/{model_name}"
 
 
-def transcribe_audio(audio_data: bytes, model: str, language: str | None, task: str, convert_tw: bool) -> str:
-    """使用 MLX Whisper 辨識"""
-    audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-    
-    kwargs = {
-        "path_or_hf_repo": model,
-        "task": task,
-    }
-    
-    if language:
-        kwargs["language"] = language
-    
-    result = mlx_whisper.transcribe(audio_np, **kwargs)
-    text = result["text"].strip()
+def transcribe_audio(backend: TranscriptionBackend, audio_np: "np.ndarray", language: str | None, task: str, convert_tw: bool) -> TranscriptionResult:
+    """使用辨識後端辨識（audio_np 為 float32，直接來自 VAD 片段）"""
+    result = backend.transcribe(audio_np, language=language, task=task)
     
     # 轉換成臺灣繁體
-    if convert_tw and text:
-        text = convert_to_tw(text)
+    if convert_tw and result.text:
+        result.text = convert_to_tw(result.text)
     
-    return text
+    return result
+
+
+def render_partial(committed: str, tail: str):
+    """在目前這一行顯示暫時結果：已確定的字正常顯示，未確定的尾端淡色"""
+    # 中文字佔兩格，保守地只顯示一行放得下的字數（太長時保留結尾）
+    width = max(10, shutil.get_terminal_size().columns // 2 - 3)
+    overflow = len(committed) + len(tail) - width
+    if overflow > 0:
+        cut = min(overflow, len(committed))
+        committed = committed[cut:]
+        tail = tail[overflow - cut:]
+    sys.stdout.write(f"\033[2K\r✏️ {committed}\033[2m{tail}\033[0m")
+    sys.stdout.flush()
 
 
 def main():
+    startup = StartupTimer()
     parser = argparse.ArgumentParser(
         description="MLX Whisper 即時語音辨識（Apple Silicon GPU 加速）",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -169,6 +188,13 @@ def main():
         default=None,
         help="模型名稱：HF repo（如 mlx-community/whisper-medium-mlx）或本地模型名稱",
     )
+    parser.add_argument(
+        "--backend", "-b",
+        type=str,
+        choices=BACKENDS,
+        default="mlx",
+        help="辨識後端：mlx（Apple Silicon GPU）、faster-whisper（CPU）或 fake（不跑模型，測試用）",
+    )
     parser.add_argument(
         "--task", "-t",
         type=str,
@@ -212,8 +238,130 @@ def main():
         default=0.1,
         help="語音前後的緩衝（秒），預設 0.1",
     )
+    parser.add_argument(
+        "--max-speech-duration",
+        type=float,
+        default=20.0,
+        help="最長語音長度（秒），超過時在停頓處強制切段，0 為不限制，預設 20",
+    )
+    parser.add_argument(
+        "--energy-gate",
+        action="store_true",
+        help="開啟能量預先過濾：明顯靜音的片段不跑 VAD 模型，降低待機 CPU 用量",
+    )
+    parser.add_argument(
+        "--input", "-i",
+        type=str,
+        default="mic",
+        help="音訊來源：mic（麥克風）、WAV/PCM/mp3/m4a 等檔案路徑（壓縮格式需要 ffmpeg）、-（標準輸入 raw PCM）、synth:tone|noise|speech[:秒數] 或 replay:錄音目錄[:倍速]",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="檔案、標準輸入與合成音訊不依實際時間播放，盡快處理（壓力測試用）",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        choices=["text", "jsonl"],
+        default="text",
+        help="輸出格式：text（文字）或 jsonl（每個片段一行 JSON 到標準輸出，其他訊息改到標準錯誤）",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="在 127.0.0.1 的這個埠提供 Prometheus 指標（/metrics）：佇列長度、RTF、各階段延遲等",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="把原始音訊（audio.pcm）與片段、辨識結果的索引（segments.jsonl）錄進這個目錄，可用 --input replay:DIR 重播",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="辨識佇列最多堆積幾句（0 為不限制）",
+    )
+    parser.add_argument(
+        "--queue-policy",
+        type=str,
+        choices=POLICIES,
+        default="merge",
+        help="佇列滿時的處理方式：block（等待）、drop-oldest（丟最舊）、merge（併入上一句）、latest（只留最新）",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="打包辨識：佇列堆積時把多句接成一段（最長 29 秒）一次辨識，再依時間戳記分回各句",
+    )
+    parser.add_argument(
+        "--partials",
+        action="store_true",
+        help="邊說邊顯示：語音還在累積時就定期辨識，已確定的字正常顯示，未確定的尾端淡色",
+    )
+    parser.add_argument(
+        "--partial-interval",
+        type=float,
+        default=0.5,
+        help="邊說邊顯示時，語音每累積多少秒重新辨識一次（預設: 0.5）",
+    )
+    parser.add_argument(
+        "--quality-gate",
+        action="store_true",
+        help="辨識前的品質檢查：語音機率、語音比例或音量太低的短片段（咳嗽、關門聲、鍵盤聲）不送辨識",
+    )
+    parser.add_argument(
+        "--gate-min-peak",
+        type=float,
+        default=0.7,
+        help="品質檢查：片段的最高語音機率下限（預設: 0.7）",
+    )
+    parser.add_argument(
+        "--gate-min-voiced",
+        type=float,
+        default=0.5,
+        help="品質檢查：語音範圍內達到語音門檻的比例下限（預設: 0.5）",
+    )
+    parser.add_argument(
+        "--gate-min-db",
+        type=float,
+        default=-50.0,
+        help="品質檢查：語音範圍的音量下限（dBFS，預設: -50）",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="推測式提早辨識：一停頓就先辨識，靜音確認後立即顯示，減少等待",
+    )
+    parser.add_argument(
+        "--sticky-language",
+        action="store_true",
+        help="沒有指定 --language 時，連續 3 句以高機率偵測到同一種語言就鎖定，之後略過語言偵測",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="辨識執行緒數量，每個執行緒載入一份模型，結果依語音順序顯示（CPU 後端適用，預設: 1）",
+    )
+    parser.add_argument(
+        "--inference-process",
+        action="store_true",
+        help="在獨立行程中辨識（音訊經由共用記憶體傳遞），推論不會和錄音搶 GIL",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="開始監聽時列出各啟動階段的耗時（import、建立後端、模型載入與預熱）",
+    )
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers 至少為 1")
     
     # 列出本地模型
     if args.list:
@@ -234,20 +382,77 @@ def main():
         print("  • mlx-community/whisper-tiny-mlx        翻譯✓")
         return
     
-    # 解析模型
-    model = resolve_model(args.model)
+    # 解析模型（faster-whisper 直接使用模型大小或路徑，如 small、large-v3）
+    if args.backend == "mlx":
+        model = resolve_model(args.model)
+    else:
+        model = args.model or ("small" if args.backend == "faster-whisper" else "fake")
+    
+    startup.add("解析參數", startup.elapsed())
+    
+    # 執行時才需要的模組（先單獨 import numpy，報告中才分得出它的成本）
+    with startup.stage("import numpy"):
+        import numpy  # noqa: F401  只為了單獨量測 import 時間
+    with startup.stage("import vad（pysilero-vad）"):
+        from vad import SileroVAD, VADConfig
+    with startup.stage("import 其他模組"):
+        from audio_source import CaptureTimer, open_source
+        from events import EventWriter, segment_event
+        from metrics import MetricsServer
+        from packing import PACK_GAP, PACK_MAX_DURATION, transcribe_packed
+        from partials import PartialTranscriber
+        from recording import SessionRecorder
+        from segment_gate import SegmentGate
+        from speculative import SpeculationTracker
+        from sticky_language import StickyLanguageBackend
+    
+    # 機器可讀輸出：事件寫到原本的標準輸出，其他文字（含 ANSI 控制碼）改到標準錯誤
+    events = None
+    if args.output == "jsonl":
+        events = EventWriter(sys.stdout)
+        sys.stdout = sys.stderr
+    
+    # 錄下整場的音訊與切段結果
+    recorder = None
+    if args.record:
+        try:
+            recorder = SessionRecorder(args.record, RATE, meta={
+                "input": args.input, "backend": args.backend, "model": model,
+                "language": args.language, "task": args.task,
+            })
+        except FileExistsError as e:
+            parser.error(str(e))
+    
+    # 建立辨識後端
+    with startup.stage("建立辨識後端"):
+        backend = create_pool(args.backend, model, args.workers, process=args.inference_process)
+    if args.task == "translate" and not backend.supports_translate:
+        print(f"⚠️ 此模型不支援翻譯任務: {model}")
     
     # 判斷是否需要轉換成臺灣繁體（翻譯任務輸出英文，不需要轉換）
-    convert_tw = should_convert_to_tw(model) and args.task == "transcribe"
+    # faster-whisper 使用 OpenAI 原版權重，中文常輸出簡體
+    if args.backend == "mlx":
+        convert_tw = should_convert_to_tw(model)
+    else:
+        convert_tw = args.backend == "faster-whisper"
+    convert_tw = convert_tw and args.task == "transcribe"
+    if convert_tw:
+        tw_convert.preload()  # 載入模型的同時在背景載入字典
 
     # translate 任務若未指定語言，自動補上 zh，否則短音訊語言偵測失敗會亂辨識
     if args.task == "translate" and not args.language:
         args.language = "zh"
         print("ℹ️  translate 任務自動設定語言為 zh（可用 --language 覆蓋）")
+    
+    # 自動鎖定語言（包住後端，language=None 時套用鎖定的語言）
+    if args.sticky_language and not args.language:
+        backend = StickyLanguageBackend(backend)
 
     # 顯示設定
     task_display = "轉錄" if args.task == "transcribe" else "翻譯成英文"
     lang_display = args.language if args.language else "自動偵測"
+    if isinstance(backend, StickyLanguageBackend):
+        lang_display += "（連續 3 句相同後鎖定）"
     
     # 判斷模型來源
     if "/" in model and not model.startswith("/"):
@@ -262,16 +467,32 @@ def main():
     print("使用 Apple Silicon GPU 加速")
     print("=" * 50)
     print(f"模型: {model_display} ({model_source})")
+    if args.backend != "mlx":
+        print(f"後端: {backend.name}")
     print(f"任務: {task_display}")
     print(f"語言: {lang_display}")
+    if args.input != "mic":
+        print(f"輸入: {args.input}" + ("（盡快處理）" if args.fast else ""))
     if convert_tw:
-        print(f"簡繁轉換: ✓ 臺灣繁體")
+        print("簡繁轉換: ✓ 臺灣繁體")
+    if recorder:
+        print(f"錄音: {args.record}")
     print("-" * 50)
     print("VAD 設定:")
     print(f"  語音門檻: {args.speech_threshold}")
     print(f"  靜音時長: {args.silence_duration} 秒")
     print(f"  最短語音: {args.min_speech_duration} 秒")
     print(f"  前後緩衝: {args.speech_pad_duration} 秒")
+    if args.max_speech_duration > 0:
+        print(f"  最長語音: {args.max_speech_duration} 秒")
+    if args.energy_gate:
+        print("  能量過濾: ✓")
+    if args.speculative:
+        print("  推測辨識: ✓")
+    if args.quality_gate:
+        print(f"  品質檢查: ✓（語音機率 ≥ {args.gate_min_peak}、語音比例 ≥ {args.gate_min_voiced}、音量 ≥ {args.gate_min_db} dBFS）")
+    if args.partials:
+        print(f"  邊說邊顯示: ✓（每 {args.partial_interval} 秒）")
     print("=" * 50)
     print("\n說話後，文字會即時顯示")
     print("按 Ctrl+C 停止\n")
@@ -284,75 +505,247 @@ def main():
         min_speech_duration=args.min_speech_duration,
         speech_pad_duration=args.speech_pad_duration,
         sample_rate=RATE,
+        max_speech_duration=args.max_speech_duration,
+        energy_gate=args.energy_gate,
+        speculative=args.speculative,
     )
-    vad = SileroVAD(vad_config)
+    with startup.stage("建立 VAD"):
+        vad = SileroVAD(vad_config)
+    
+    # 推測辨識的結果追蹤
+    tracker = SpeculationTracker() if args.speculative else None
+    
+    # 辨識前的品質檢查
+    gate = SegmentGate(args.gate_min_peak, args.gate_min_voiced, args.gate_min_db) if args.quality_gate else None
+    
+    # 邊說邊顯示的暫時結果
+    partials = PartialTranscriber(args.partial_interval, RATE) if args.partials else None
     
-    # 初始化 PyAudio (由 Capture Thread 使用)
-    # 這裡我們不開啟 stream，交由 Capture Thread 處理
+    # 開啟音訊來源（由 Capture Thread 讀取）
+    with startup.stage("開啟音訊來源"):
+        try:
+            source = open_source(args.input, realtime=not args.fast, frames_per_buffer=BLOCK)
+        except (OSError, ValueError) as e:
+            # 找不到檔案、無法辨認的 --input 等：與其他參數錯誤一樣回報，不顯示 traceback
+            parser.error(str(e))
+    # 錄音迴圈的時間抖動（依實際時間讀取時才有意義）
+    capture_timer = CaptureTimer(BLOCK, RATE) if source.realtime or not source.finite else None
+    
+    # 建立佇列（有上限，模型跟不上時依 --queue-policy 處理）
+    transcription_queue = SegmentQueue(
+        args.queue_size, args.queue_policy,
+        on_drop=tracker.discard if tracker else None,
+    )
     
-    # 建立佇列
-    transcription_queue = queue.Queue()
+    # Prometheus 指標端點（數值大多在抓取時才向各元件讀取）
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsServer(args.metrics_port)
+        metrics.gauge("whisper_queue_depth", "辨識佇列中的片段數", transcription_queue.qsize)
+        metrics.gauge("whisper_queue_oldest_age_seconds", "佇列中最舊的片段已經等待的時間（秒）", transcription_queue.oldest_age)
+        drop_help = "沒有辨識的片段數"
+        metrics.counter("whisper_segments_dropped_total", drop_help, lambda: transcription_queue.dropped, reason="queue")
+        metrics.counter("whisper_segments_dropped_total", drop_help, lambda: transcription_queue.merged, reason="merged")
+        if tracker:
+            # 推測片段被丟掉時最終片段仍會辨識，不算遺失，分開計數
+            metrics.counter(
+                "whisper_segments_dropped_total", drop_help,
+                lambda: transcription_queue.speculative_dropped, reason="speculative",
+            )
+        if gate:
+            metrics.counter("whisper_segments_dropped_total", drop_help, lambda: gate.dropped, reason="quality_gate")
+        metrics.counter("whisper_vad_model_calls_total", "VAD 模型呼叫次數", lambda: vad.model_calls)
+        metrics.counter("whisper_vad_gated_chunks_total", "能量過濾略過的 chunk 數", lambda: vad.gated_chunks)
+        if capture_timer:
+            metrics.counter(
+                "whisper_capture_late_total", "錄音讀取間隔超過兩倍區塊長度的次數（緩衝區可能溢位）",
+                lambda: capture_timer.late,
+            )
+        try:
+            metrics.start()
+            print(f"📈 指標: {metrics.url}")
+        except OSError as e:
+            print(f"⚠️ 無法開啟指標端點（埠 {args.metrics_port}）: {e}")
+            metrics = None
     
     # 建立停止訊號
     stop_event = threading.Event()
     
-    def transcription_worker():
-        """辨識執行緒"""
-        print("⏳ 正在預熱模型...")
-        try:
-            # 預熱
-            dummy = np.zeros(RATE, dtype=np.float32)
-            warmup_kwargs = {"path_or_hf_repo": model, "task": args.task}
-            if args.language:
-                warmup_kwargs["language"] = args.language
-            mlx_whisper.transcribe(dummy, **warmup_kwargs)
-            print("✅ 模型預熱完成！開始監聽...\n")
-        except Exception as e:
-            print(f"⚠️ 模型預熱失敗: {e}\n")
+    # 多個辨識執行緒時，結果依語音順序顯示
+    reorder = ReorderBuffer()
+    warmed_up = threading.Event()
+    # 畫面上是否有推測結果（顯示在上一行，確定後會被覆蓋）
+    showing_speculative = False
+    # 下一個事件的編號（--output jsonl）
+    event_index = 0
+    
+    def show_speculative(text: str):
+        """顯示推測結果（由 reorder 依序呼叫）"""
+        nonlocal showing_speculative
+        sys.stdout.write("\033[2K\r")
+        if showing_speculative:
+            # 覆蓋上一次的推測結果
+            sys.stdout.write("\033[1A\033[2K\r")
+            showing_speculative = False
+        if text:
+            # 推測結果用淡色顯示，尚未確定
+            print(f"\033[2m💭 {text}\033[0m")
+            showing_speculative = True
+    
+    def show_final(batch: list, texts: list[str], languages: list, make_events: list):
+        """顯示最終結果並輸出事件（由 reorder 依序呼叫）"""
+        nonlocal showing_speculative, event_index
+        if partials:
+            partials.finish(batch[-1])
+        if recorder:
+            for s, text, language in zip(batch, texts, languages):
+                recorder.result(s, text, language)
+        for make_event in make_events:
+            events.emit(make_event(event_index))
+            event_index += 1
+        if metrics:
+            shown = time.time()
+            for s in batch:
+                metrics.observe("e2e", shown - s.finalized_at)
+        
+        if showing_speculative:
+            # 清掉推測結果，改顯示確定的文字
+            sys.stdout.write("\033[2K\r\033[1A")
+            showing_speculative = False
+        
+        for text in texts:
+            if text:
+                # 清除「辨識中」並顯示結果
+                # 使用 ANSI escape code 清除整行
+                sys.stdout.write("\033[2K\r") 
+                print(f"📝 {text}")
+        if not any(texts):
+            # 如果沒字，也要清除狀態
+            sys.stdout.write("\033[2K\r")
+            print("🎤 等待說話...", end="\r")
+    
+    def transcription_worker(index: int):
+        """辨識執行緒（index 0 負責預熱與暫時結果）"""
+        if index == 0:
+            print("⏳ 正在預熱模型...")
+            try:
+                # 預熱
+                backend.warmup(language=args.language, task=args.task)
+                print(f"✅ 模型預熱完成（{startup_summary(backend)}）！開始監聽...\n")
+            except Exception as e:
+                print(f"⚠️ 模型預熱失敗: {e}\n")
+            if args.startup_report:
+                startup.add("模型載入", backend.load_seconds)
+                startup.add("模型預熱", backend.warmup_seconds)
+                print(startup.report() + "\n")
+            warmed_up.set()
+        else:
+            warmed_up.wait()
+        
+        # 暫時結果只由第一個辨識執行緒處理（local agreement 需要依序更新）
+        worker_partials = partials if index == 0 else None
+        pack_samples = int(PACK_MAX_DURATION * RATE) if args.pack else 0
             
         while not stop_event.is_set():
             try:
-                audio_data = transcription_queue.get(timeout=0.5)
+                # 邊說邊顯示時要經常檢查有沒有新的快照
+                # 打包辨識：把佇列中接在後面的片段一起取出
+                ticket, batch = transcription_queue.get_batch(
+                    0.05 if worker_partials else 0.5,
+                    pack_samples, int(PACK_GAP * RATE),
+                )
             except queue.Empty:
+                # 沒有待辨識的最終片段：辨識進行中的語音
+                snapshot = worker_partials.take() if worker_partials else None
+                if snapshot is not None:
+                    start, audio = snapshot
+                    try:
+                        text = transcribe_audio(backend, audio, args.language, args.task, convert_tw).text
+                        with reorder.lock:
+                            render_partial(*partials.update(start, text))
+                    except Exception as e:
+                        print(f"\n❌ 錯誤: {e}")
                 continue
+            dequeued_at = time.time()
+            segment = batch[0]
+            emit = None
                 
             # 顯示排隊狀況
             q_size = transcription_queue.qsize()
             if q_size > 0:
-                print(f"⏳ (堆積 {q_size} 句) 辨識中...", end="\r")
+                age = transcription_queue.oldest_age()
+                print(f"⏳ (堆積 {q_size} 句，最舊 {age:.1f} 秒) 辨識中...", end="\r")
             else:
                 print("⏳ 辨識中...   ", end="\r")
                 
             try:
-                text = transcribe_audio(audio_data, model, args.language, args.task, convert_tw)
-                if text:
-                    # 清除「辨識中」並顯示結果
-                    # 使用 ANSI escape code 清除整行
-                    sys.stdout.write("\033[2K\r") 
-                    print(f"📝 {text}")
-                else:
-                    # 如果沒字，也要清除狀態
-                    sys.stdout.write("\033[2K\r")
-                    print("🎤 等待說話...", end="\r")
+                if segment.speculative:
+                    # 推測片段：已經有更新的片段就不用辨識
+                    if tracker.is_stale(segment):
+                        continue
+                    
+                    start = time.perf_counter()
+                    text = transcribe_audio(backend, segment.audio, args.language, args.task, convert_tw).text
+                    elapsed = time.perf_counter() - start
+                    tracker.store(segment, text, elapsed)
+                    if gate:
+                        gate.observe(elapsed)
+                    if metrics:
+                        metrics.observe_speculative(segment, elapsed)
+                    emit = functools.partial(show_speculative, text)
+                    continue
+                
+                # 最終片段：推測結果仍有效就直接沿用
+                texts = [tracker.commit(s) if tracker else None for s in batch]
+                pending = [i for i, text in enumerate(texts) if text is None]
+                # 沒有單獨辨識的片段（打包、沿用推測結果）以指定或鎖定的語言記錄
+                language = args.language or getattr(backend, "language", None)
+                languages = [language] * len(batch)
+                start = time.perf_counter()
+                if len(pending) > 1:
+                    packed = transcribe_packed(
+                        backend, [batch[i].audio for i in pending], args.language, args.task
+                    )
+                    for i, text in zip(pending, packed):
+                        texts[i] = convert_to_tw(text) if convert_tw and text else text
+                elif pending:
+                    result = transcribe_audio(
+                        backend, batch[pending[0]].audio, args.language, args.task, convert_tw
+                    )
+                    texts[pending[0]] = result.text
+                    languages[pending[0]] = result.language or language
+                inference = time.perf_counter() - start
+                if gate and pending:
+                    gate.observe(inference)
+                if metrics:
+                    # 打包辨識：依片段長度分攤這次辨識的時間
+                    pending_samples = sum(len(batch[i].audio) for i in pending)
+                    for i, s in enumerate(batch):
+                        share = inference * len(s.audio) / pending_samples if i in pending else None
+                        metrics.observe_segment(s, dequeued_at, share)
+                # 事件等輪到這一句時才編號、輸出
+                make_events = [
+                    functools.partial(
+                        segment_event, segment=s, text=texts[i], language=languages[i],
+                        dequeued_at=dequeued_at, inference=0.0 if i not in pending else inference,
+                        batch=len(batch), speculative_hit=i not in pending,
+                    )
+                    for i, s in enumerate(batch)
+                ] if events else []
+                emit = functools.partial(show_final, batch, texts, languages, make_events)
                     
             except Exception as e:
                 print(f"\n❌ 錯誤: {e}")
             finally:
-                transcription_queue.task_done()
+                # 輪到這一句時才顯示（前面的句子可能還在其他執行緒辨識）
+                reorder.complete(ticket, emit)
+                for _ in batch:
+                    transcription_queue.task_done()
                 
         print("辨識執行緒已停止")
 
     def capture_worker():
         """錄音執行緒"""
-        audio = pyaudio.PyAudio()
-        stream = audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
-        )
-        
         try:
             while not stop_event.is_set():
                 # 這裡單純顯示狀態有點困難，因為這會在背景跑
@@ -360,49 +753,118 @@ def main():
                 # 或者只在沒有堆積時更新
                 
                 try:
-                    data = stream.read(CHUNK, exception_on_overflow=False)
+                    data = source.read(BLOCK)
                 except Exception:
                     break
+                if capture_timer:
+                    capture_timer.tick()
+                if recorder:
+                    recorder.write(data)
                 
-                audio_data = vad.process(data)
+                # 一次讀入的區塊可能結束不只一段語音，全部送出
+                segments = vad.feed(data)
+                if partials:
+                    partials.offer(vad)
                 
-                if audio_data is not None and len(audio_data) > CHUNK * 10:
-                    transcription_queue.put(audio_data)
+                # 輸入結束（檔案播放完畢）：送出最後一段語音
+                if not data:
+                    segments.append(vad.finalize())
+                
+                for segment in segments:
+                    # 太短的片段（約 0.16 秒以下）不送辨識
+                    if segment is not None and len(segment.audio) > CHUNK * 5:
+                        # 推測片段只檢查不計入統計（同一段語音還會以最終片段送來一次）
+                        if not gate:
+                            accepted = True
+                        elif segment.speculative:
+                            accepted = gate.check(segment) is None
+                        else:
+                            accepted = gate.accept(segment)
+                        if recorder and not segment.speculative:
+                            recorder.segment(segment, None if accepted else gate.check(segment))
+                        if not accepted:
+                            # 不送辨識：清掉同一段語音的推測結果
+                            if tracker:
+                                tracker.discard(segment)
+                            continue
+                        if tracker:
+                            tracker.submit(segment)
+                        transcription_queue.put(segment)
+                
+                if not data:
+                    break
                     
         except Exception as e:
             print(f"\n❌ 錄音錯誤: {e}")
         finally:
-            stream.stop_stream()
-            stream.close()
-            audio.terminate()
+            source.close()
+            if vad.config.energy_gate:
+                print(
+                    f"VAD 模型呼叫: {vad.model_calls} 次，"
+                    f"能量過濾略過: {vad.gated_chunks} 次（{vad.gated_ratio:.0%}）"
+                )
             print("錄音執行緒已停止")
 
     # 啟動執行緒
-    t_transcribe = threading.Thread(target=transcription_worker)
+    t_workers = [
+        threading.Thread(target=transcription_worker, args=(i,))
+        for i in range(args.workers)
+    ]
     t_capture = threading.Thread(target=capture_worker)
     
-    t_transcribe.start()
+    for t in t_workers:
+        t.start()
     t_capture.start()
     
     try:
-        while t_transcribe.is_alive() and t_capture.is_alive():
+        while all(t.is_alive() for t in t_workers) and t_capture.is_alive():
             # 主執行緒僅負責監聽 Ctrl+C 並維持程式運作
             # 這裡可以定期顯示「等待說話」，但為了不跟辨識輸出衝突，
             # 我們讓辨識執行緒負責輸出狀態
             time.sleep(0.1)
             
             # 如果佇列空閒，顯示等待中
-            if transcription_queue.empty():
+            if transcription_queue.empty() and not (partials and partials.visible):
                  sys.stdout.write("🎤 等待說話...\r")
                  sys.stdout.flush()
+        
+        # 輸入結束：等佇列裡的片段都辨識完再停止
+        if not t_capture.is_alive():
+            transcription_queue.join()
+        stop_event.set()
     
     except KeyboardInterrupt:
         print("\n\n正在關閉...")
         stop_event.set()
     
+    # 喚醒可能正在等待佇列空位的錄音執行緒（block 策略）
+    transcription_queue.close()
+    
     # 等待執行緒結束
     t_capture.join(timeout=2.0)
-    t_transcribe.join(timeout=2.0)
+    for t in t_workers:
+        t.join(timeout=2.0)
+    print(transcription_queue.summary())
+    if args.workers > 1:
+        print(reorder.summary())
+    if tracker:
+        print(tracker.summary())
+    if gate:
+        print(gate.summary())
+    if isinstance(backend, StickyLanguageBackend):
+        print(backend.summary())
+    if capture_timer:
+        print(capture_timer.summary())
+    if convert_tw:
+        print(tw_convert.summary())
+    if events:
+        events.close()
+        print(events.summary())
+    if metrics:
+        metrics.close()
+    if recorder:
+        recorder.close()
+        print(recorder.summary())
     print("已停止")
 
 
@@ -0,0 +1,217 @@
+"""
+錄下整場辨識（--record DIR）與重播（--input replay:DIR[:速度]）
+
+字幕出錯時，事後通常已經沒有音訊與切段結果可以重現。錄音目錄包含：
+
+- audio.pcm：錄音執行緒讀到的原始音訊（16kHz mono 16-bit little-endian），只會附加寫入
+- segments.jsonl：VAD 片段與辨識結果的索引，每行一筆
+  - {"type": "segment", ...}：VAD 送出的最終片段（樣本位置、語音機率、品質檢查結果）
+  - {"type": "result", ...}：顯示的辨識結果（依說話順序）
+- session.json：取樣率、格式、開始與結束時間、總樣本數
+
+樣本位置從錄音開始算起，和 audio.pcm 的位置一致（第 n 個樣本在第 2n 個 byte）。
+
+錄音執行緒只把讀到的區塊放進佇列（不複製、不碰檔案），寫檔在背景執行緒進行，
+磁碟偶爾卡住時也不會拖慢錄音迴圈。
+
+重播時以 mmap 讀取 audio.pcm，可以依實際時間、加速或盡快（--fast）送進同一條流程：
+    uv run python realtime.py --input replay:sessions/0601 --backend fake --fast
+    uv run python realtime.py --input replay:sessions/0601:4   # 4 倍速
+
+使用方式：
+    recorder = SessionRecorder("sessions/0601")
+    recorder.write(data)                       # 錄音執行緒，每個區塊
+    recorder.segment(segment)                  # VAD 送出最終片段時
+    recorder.result(segment, text, language)   # 顯示結果時
+    recorder.close()
+"""
+import json
+import mmap
+import queue
+import threading
+import time
+from pathlib import Path
+
+from audio_source import RATE, AudioSource
+from vad import Segment
+
+AUDIO_FILE = "audio.pcm"
+INDEX_FILE = "segments.jsonl"
+META_FILE = "session.json"
+
+
+class SessionRecorder:
+    """
+    把音訊與片段索引寫進錄音目錄（寫檔在背景執行緒）
+    
+    Args:
+        directory: 錄音目錄（不存在時建立；已經有錄音時拒絕覆寫）
+        sample_rate: 取樣率
+        meta: 額外寫進 session.json 的資訊（例如模型與參數）
+    """
+    
+    def __init__(self, directory: str, sample_rate: int = RATE, meta: dict | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        audio_path = self.directory / AUDIO_FILE
+        # 任何一個檔案有內容都拒絕：附加寫入會混進上一場的索引，session.json 也會被覆寫
+        for name in (AUDIO_FILE, INDEX_FILE, META_FILE):
+            path = self.directory / name
+            if path.exists() and path.stat().st_size:
+                raise FileExistsError(f"錄音目錄已經有錄音（{name}）: {self.directory}")
+        
+        self.sample_rate = sample_rate
+        self.meta = {
+            "sample_rate": sample_rate,
+            "format": "s16le",
+            "channels": 1,
+            "started_at": time.time(),
+            **(meta or {}),
+        }
+        self._write_meta()
+        self._audio = open(audio_path, "ab")
+        self._index = open(self.directory / INDEX_FILE, "a", encoding="utf-8")
+        
+        # 統計
+        self.samples = 0   # 已寫入的樣本數
+        self.segments = 0
+        self.results = 0
+        
+        # (檔案, 資料)；None 為結束
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+    
+    def write(self, data: bytes):
+        """錄音執行緒：附加一個音訊區塊（只放進佇列）"""
+        if data:
+            self._queue.put((self._audio, data))
+    
+    def segment(self, segment: Segment, gated: str | None = None):
+        """記錄 VAD 送出的最終片段（gated 為品質檢查丟掉的原因）"""
+        self.segments += 1
+        self._put_index({
+            "type": "segment",
+            "start_sample": segment.start_sample,
+            "end_sample": segment.end_sample,
+            "speech_end_sample": segment.speech_end_sample,
+            "mean_prob": round(segment.mean_prob, 4),
+            "max_prob": round(segment.max_prob, 4),
+            "voiced_ratio": round(segment.voiced_ratio, 4),
+            "rms_db": round(segment.rms_db, 2),
+            "finalized_at": round(segment.finalized_at, 3),
+            "gated": gated,
+        })
+    
+    def result(self, segment: Segment, text: str, language: str | None):
+        """記錄顯示的辨識結果"""
+        self.results += 1
+        self._put_index({
+            "type": "result",
+            "start_sample": segment.start_sample,
+            "end_sample": segment.end_sample,
+            "text": text,
+            "language": language,
+            "shown_at": round(time.time(), 3),
+        })
+    
+    def _put_index(self, entry: dict):
+        self._queue.put((self._index, json.dumps(entry, ensure_ascii=False) + "\n"))
+    
+    def _run(self):
+        """寫檔執行緒：一次寫完佇列中的資料"""
+        while True:
+            item = self._queue.get()
+            while item is not None:
+                file, data = item
+                file.write(data)
+                if file is self._audio:
+                    self.samples += len(data) // 2
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._audio.flush()
+            self._index.flush()
+            if item is None:
+                return
+    
+    def _write_meta(self):
+        path = self.directory / META_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        tmp.replace(path)
+    
+    def close(self):
+        """寫完剩下的資料並更新 session.json"""
+        self._queue.put(None)
+        self._thread.join()
+        self._audio.close()
+        self._index.close()
+        self.meta["ended_at"] = time.time()
+        self.meta["samples"] = self.samples
+        self._write_meta()
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        return (
+            f"錄音: {self.directory}（{self.samples / self.sample_rate:.1f} 秒音訊，"
+            f"{self.segments} 個片段，{self.results} 筆結果）"
+        )
+
+
+def read_index(directory: str) -> list[dict]:
+    """讀取錄音目錄的片段索引"""
+    path = Path(directory) / INDEX_FILE
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class RecordingSource(AudioSource):
+    """
+    重播錄音目錄的 audio.pcm（mmap，不會整個讀進記憶體）
+    
+    Args:
+        directory: 錄音目錄
+        realtime: 是否依時間播放（False 為盡快讀完）
+        speed: 依時間播放時的倍速
+    """
+    
+    def __init__(self, directory: str, realtime: bool = True, speed: float = 1.0):
+        super().__init__(realtime)
+        if speed <= 0:
+            raise ValueError(f"重播速度必須大於 0: {speed}")
+        self.directory = Path(directory)
+        self.speed = speed
+        path = self.directory / AUDIO_FILE
+        if not path.exists():
+            raise FileNotFoundError(f"找不到錄音: {path}")
+        meta_path = self.directory / META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("sample_rate", RATE) != RATE:
+                raise ValueError(f"錄音的取樣率需為 {RATE}Hz: {self.directory}")
+        
+        self._file = open(path, "rb")
+        # 空檔案無法 mmap
+        size = path.stat().st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._size = size - size % 2
+        self._offset = 0
+    
+    def _read(self, frames: int) -> bytes:
+        end = min(self._offset + frames * 2, self._size)
+        data = self._map[self._offset:end]
+        self._offset = end
+        return data
+    
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+    
+    def describe(self) -> str:
+        speed = f"，{self.speed:g} 倍速" if self.realtime and self.speed != 1 else ""
+        return f"重播 {self.directory}{speed}"
@@ -0,0 +1,131 @@
+"""
+辨識前的片段品質檢查
+
+咳嗽、關門聲、一陣鍵盤聲偶爾會讓語音機率短暫超過 speech_threshold，
+VAD 照樣送出片段：每一段都要跑一次完整的 Whisper（30 秒窗口），結果常常是幻覺文字
+（「謝謝觀看」、「字幕由 ... 提供」）。SegmentGate 用 VAD 附在片段上的統計，
+在送進辨識佇列之前丟掉明顯不是語音的短片段：
+
+- 最高語音機率太低（max_prob < min_peak_prob）：真正的語音幾乎都會超過 0.9
+- 語音範圍內達到門檻的 chunk 比例太低（voiced_ratio < min_voiced_ratio）：斷斷續續的雜音
+- 音量太小（rms_db < min_rms_db）：遠處的聲音或底噪
+
+語音範圍（語音開始到最後一個語音 chunk，不含前導緩衝）超過 max_duration 秒的片段一律通過，
+避免丟掉真正的句子。
+
+使用方式：
+    gate = SegmentGate()
+    if gate.accept(segment):
+        transcription_queue.put(segment)
+    
+    # 辨識執行緒：記錄每次辨識的耗時，用來估計省下的時間
+    gate.observe(elapsed)
+    print(gate.summary())
+"""
+import threading
+
+from vad import Segment
+
+# 丟掉片段的原因
+REASONS = {
+    "peak": "語音機率過低",
+    "voiced": "語音比例過低",
+    "energy": "音量過低",
+}
+
+
+class SegmentGate:
+    """
+    辨識前的片段品質檢查（執行緒安全）
+    
+    Args:
+        min_peak_prob: 最高語音機率下限（0 為不檢查）
+        min_voiced_ratio: 語音範圍內達到門檻的 chunk 比例下限（0 為不檢查）
+        min_rms_db: 語音範圍的音量下限（dBFS，None 為不檢查）
+        max_duration: 語音範圍超過這個長度（秒）的片段不檢查
+    """
+    
+    def __init__(
+        self,
+        min_peak_prob: float = 0.7,
+        min_voiced_ratio: float = 0.5,
+        min_rms_db: float | None = -50.0,
+        max_duration: float = 2.0,
+    ):
+        self.min_peak_prob = min_peak_prob
+        self.min_voiced_ratio = min_voiced_ratio
+        self.min_rms_db = min_rms_db
+        self.max_duration = max_duration
+        self._lock = threading.Lock()
+        
+        # 統計
+        self.passed = 0
+        self.dropped = 0
+        self.dropped_seconds = 0.0  # 丟掉的音訊長度
+        self.reasons = dict.fromkeys(REASONS, 0)
+        self._calls = 0          # observe() 記錄的辨識次數
+        self._call_seconds = 0.0  # 上述辨識的總耗時
+    
+    def check(self, segment: Segment) -> str | None:
+        """檢查片段，返回丟掉的原因（REASONS 的鍵），可以辨識時返回 None"""
+        # 從語音開始算起，前導緩衝不算在內（否則短暫的雜音也會超過 max_duration）
+        onset = max(segment.start_sample, segment.speech_start_sample)
+        speech_seconds = (segment.speech_end_sample - onset) / segment.sample_rate
+        if speech_seconds > self.max_duration:
+            return None
+        if segment.max_prob < self.min_peak_prob:
+            return "peak"
+        if segment.voiced_ratio < self.min_voiced_ratio:
+            return "voiced"
+        if self.min_rms_db is not None and segment.rms_db < self.min_rms_db:
+            return "energy"
+        return None
+    
+    def accept(self, segment: Segment) -> bool:
+        """檢查片段並記錄統計，可以辨識時返回 True"""
+        reason = self.check(segment)
+        with self._lock:
+            if reason is None:
+                self.passed += 1
+                return True
+            self.dropped += 1
+            self.dropped_seconds += segment.duration
+            self.reasons[reason] += 1
+            return False
+    
+    def observe(self, seconds: float):
+        """記錄一次辨識（一次 Whisper 呼叫）的耗時"""
+        with self._lock:
+            self._calls += 1
+            self._call_seconds += seconds
+    
+    @property
+    def drop_rate(self) -> float:
+        """丟掉的片段比例"""
+        total = self.passed + self.dropped
+        return self.dropped / total if total else 0.0
+    
+    @property
+    def saved_seconds(self) -> float | None:
+        """
+        估計省下的辨識時間（秒）：丟掉的片段數 × 平均每次辨識耗時
+        
+        Whisper 每次都處理完整的 30 秒窗口，短片段的辨識時間和一般句子差不多，
+        所以用每次呼叫的平均耗時估計；還沒有辨識過時為 None。
+        """
+        if not self._calls:
+            return None
+        return self.dropped * self._call_seconds / self._calls
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        reasons = "、".join(f"{REASONS[key]} {count}" for key, count in self.reasons.items() if count)
+        text = (
+            f"品質檢查: 略過 {self.dropped} 段（{self.drop_rate:.0%}，"
+            f"共 {self.dropped_seconds:.1f} 秒音訊"
+            + (f"；{reasons}" if reasons else "")
+            + f"），送出 {self.passed} 段"
+        )
+        if self.saved_seconds is not None:
+            text += f"，估計省下 {self.saved_seconds:.1f} 秒辨識（依平均每次辨識耗時推算）"
+        return text
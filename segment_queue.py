@@ -0,0 +1,250 @@
+"""
+有上限的辨識佇列
+
+模型跟不上說話速度時，無上限的 queue.Queue 會一直堆積：
+畫面上的文字越來越落後，記憶體也跟著每個片段增加。
+SegmentQueue 限制佇列長度，滿了之後依策略處理新片段：
+
+- block：等辨識執行緒取走片段（錄音會跟著停下，可能漏掉聲音）
+- drop-oldest：丟掉最舊的片段
+- merge：新片段併入佇列最後一個片段，一次辨識（不漏字，但合併後的片段較長）
+- latest：清空佇列，只留最新的片段（字幕永遠顯示最新的內容）
+
+不論哪種策略（block 以外），佇列滿時都會先丟掉推測片段（包括新送進來的），
+只是提早辨識的推測片段不會擠掉任何最終片段。
+"""
+import math
+import queue
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+# Segment（vad.py）與 numpy 只在合併、打包取出片段時才需要，這裡不 import：
+# 前端的 --help 會讀取 POLICIES，不需要為此載入 numpy 與 VAD 模型
+if TYPE_CHECKING:
+    from vad import Segment
+
+POLICIES = ["block", "drop-oldest", "merge", "latest"]
+
+# 合併後的片段上限（Whisper 一次處理 30 秒）
+MAX_MERGE_DURATION = 30.0
+
+
+class SegmentQueue(queue.Queue):
+    """
+    有上限的片段佇列，介面與 queue.Queue 相同
+    
+    使用方式：
+        q = SegmentQueue(maxsize=8, policy="merge", on_drop=tracker.discard)
+        q.put(segment)         # 錄音執行緒，佇列滿時依策略處理
+        segment = q.get()      # 辨識執行緒
+        ticket, batch = q.get_batch(timeout=0.5, max_samples=29 * 16000)  # 打包辨識 / 多個辨識執行緒
+        print(q.qsize(), q.oldest_age())
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 8,
+        policy: str = "merge",
+        on_drop: "Callable[[Segment], None] | None" = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的佇列策略: {policy}（可用: {', '.join(POLICIES)}）")
+        super().__init__(maxsize)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.closed = False
+        
+        # 統計
+        self.dropped = 0   # 丟掉的最終片段數（真正沒有辨識的語音）
+        self.speculative_dropped = 0  # 丟掉的推測片段數（最終片段之後還會送進來，不算遺失）
+        self.merged = 0    # 併入其他片段的片段數
+        self.max_depth = 0  # 佇列曾經達到的最大長度
+        self.batches = 0    # get_batch() 取出的次數（下一個編號）
+    
+    # queue.Queue 的內部儲存：(放入時間, 片段)
+    def _init(self, maxsize):
+        self.queue = deque()
+    
+    def _put(self, item):
+        self.queue.append((time.monotonic(), item))
+    
+    def _get(self):
+        return self.queue.popleft()[1]
+    
+    def put(self, item, block=True, timeout=None):
+        """放入片段，佇列滿時依策略處理"""
+        with self.not_full:
+            if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                if self.policy == "block":
+                    self._wait_for_room(block, timeout)
+                else:
+                    self._drop_speculative()
+            
+            if self.closed:
+                self._discard(item)
+                return
+            
+            if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                # 新的推測片段不值得擠掉任何最終片段
+                if getattr(item, "speculative", False):
+                    self._discard(item)
+                    return
+                if self.policy == "merge" and self._merge_into_last(item):
+                    return
+                if self.policy == "latest":
+                    while self.queue:
+                        self._discard(self._pop_at(0))
+                else:
+                    self._discard(self._pop_at(0))
+            
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.max_depth = max(self.max_depth, self._qsize())
+            self.not_empty.notify()
+    
+    def _wait_for_room(self, block: bool, timeout: float | None):
+        """block 策略：等到佇列有空位或佇列關閉"""
+        if not block:
+            raise queue.Full
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._qsize() >= self.maxsize and not self.closed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise queue.Full
+            self.not_full.wait(remaining)
+    
+    def _drop_speculative(self):
+        """丟掉佇列中的推測片段（只是提早辨識，不影響結果）"""
+        for i in range(len(self.queue) - 1, -1, -1):
+            if self._qsize() < self.maxsize:
+                break
+            if getattr(self.queue[i][1], "speculative", False):
+                self._discard(self._pop_at(i))
+    
+    def _merge_into_last(self, item: "Segment") -> bool:
+        """把新片段併入佇列最後一個片段，成功返回 True"""
+        _, last = self.queue[-1]
+        if last.speculative:
+            return False
+        if len(last.audio) + len(item.audio) > MAX_MERGE_DURATION * last.sample_rate:
+            return False
+        
+        self.queue[-1] = (self.queue[-1][0], merge_segments(last, item))
+        self.merged += 1
+        if self.on_drop:
+            # 兩個片段都已經不會單獨辨識
+            self.on_drop(last)
+            self.on_drop(item)
+        return True
+    
+    def _pop_at(self, index: int):
+        """從佇列中移除片段（不會再被 get() 取走，視為已完成，讓 join() 不會卡住）"""
+        _, item = self.queue[index]
+        del self.queue[index]
+        self.unfinished_tasks -= 1
+        if self.unfinished_tasks == 0:
+            self.all_tasks_done.notify_all()
+        return item
+    
+    def _discard(self, item):
+        """丟掉片段"""
+        if getattr(item, "speculative", False):
+            self.speculative_dropped += 1
+        else:
+            self.dropped += 1
+        if self.on_drop:
+            self.on_drop(item)
+    
+    def get_batch(
+        self,
+        timeout: float | None = None,
+        max_samples: int = 0,
+        gap_samples: int = 0,
+    ) -> tuple[int, list]:
+        """
+        取出一個片段並依取出順序編號（多個辨識執行緒時，編號就是語音順序）
+        
+        max_samples > 0 時，一併取出緊接在後面、可以和它一起打包辨識的最終片段：
+        遇到推測片段（或其他非片段的項目）或總長度（含間隔）超過 max_samples 時停止。
+        取出的每個片段都要呼叫一次 task_done()。
+        
+        Raises:
+            queue.Empty: timeout 內沒有片段
+        """
+        from vad import Segment
+        
+        with self.not_empty:
+            # 與 queue.Queue.get() 相同的等待方式
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._qsize():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self.not_empty.wait(remaining)
+            
+            first = self._get()
+            batch = [first]
+            if max_samples and isinstance(first, Segment) and not first.speculative:
+                total = len(first.audio)
+                while self.queue:
+                    item = self.queue[0][1]
+                    if not isinstance(item, Segment) or item.speculative:
+                        break
+                    if total + gap_samples + len(item.audio) > max_samples:
+                        break
+                    batch.append(self._get())
+                    total += gap_samples + len(item.audio)
+            self.not_full.notify(len(batch))
+            
+            ticket = self.batches
+            self.batches += 1
+            return ticket, batch
+    
+    def oldest_age(self) -> float:
+        """佇列中最舊的片段已經等了多久（秒），佇列空時為 0"""
+        with self.mutex:
+            if not self.queue:
+                return 0.0
+            return time.monotonic() - self.queue[0][0]
+    
+    def close(self):
+        """關閉佇列：之後放入的片段直接丟掉，也喚醒等待中的 put()"""
+        with self.mutex:
+            self.closed = True
+            self.not_full.notify_all()
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        text = (
+            f"辨識佇列（{self.policy}，上限 {self.maxsize}）: 最多堆積 {self.max_depth} 句，"
+            f"丟棄 {self.dropped} 句，合併 {self.merged} 句"
+        )
+        if self.speculative_dropped:
+            text += f"，略過推測 {self.speculative_dropped} 句"
+        return text
+
+
+def merge_segments(first: "Segment", second: "Segment") -> "Segment":
+    """把兩個相鄰的片段合併成一個（中間的靜音不保留）"""
+    import numpy as np
+    from vad import Segment
+    
+    n1, n2 = len(first.audio), len(second.audio)
+    # 音量以功率平均
+    power = (n1 * 10 ** (first.rms_db / 10) + n2 * 10 ** (second.rms_db / 10)) / (n1 + n2)
+    return Segment(
+        audio=np.concatenate((first.audio, second.audio)),
+        start_sample=first.start_sample,
+        end_sample=second.end_sample,
+        mean_prob=(first.mean_prob * n1 + second.mean_prob * n2) / (n1 + n2),
+        max_prob=max(first.max_prob, second.max_prob),
+        sample_rate=first.sample_rate,
+        speech_start_sample=first.speech_start_sample,
+        speech_end_sample=second.speech_end_sample,
+        voiced_ratio=(first.voiced_ratio * n1 + second.voiced_ratio * n2) / (n1 + n2),
+        rms_db=10 * math.log10(power) if power > 0 else first.rms_db,
+        # 與佇列中的放入時間相同，保留較早的一段
+        finalized_at=first.finalized_at,
+    )
@@ -0,0 +1,116 @@
+"""
+推測式提早辨識
+
+VAD 在語音剛出現停頓時就先送出推測片段（Segment.speculative），
+辨識執行緒利用等待靜音門檻的這段時間先辨識：
+- 靜音持續到門檻：最終片段直接沿用推測結果（命中），省下一次辨識
+- 停頓後又開始說話：推測結果作廢（落空），之後的片段重新辨識
+"""
+import threading
+
+from vad import Segment
+
+
+class SpeculationTracker:
+    """
+    追蹤推測片段與最終片段的對應關係（執行緒安全）
+    
+    使用方式：
+        # 錄音執行緒：每個送進佇列的片段都要登記
+        tracker.submit(segment)
+        
+        # 辨識執行緒
+        if segment.speculative:
+            if tracker.is_stale(segment):
+                continue  # 已經有更新的片段，不用辨識
+            text = transcribe(segment.audio)
+            tracker.store(segment, text, elapsed)
+        else:
+            text = tracker.commit(segment)
+            if text is None:
+                text = transcribe(segment.audio)
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        # start_sample -> 最新送進佇列的片段
+        self._latest: dict[int, Segment] = {}
+        # start_sample -> (推測片段, 辨識結果, 辨識耗時)
+        self._results: dict[int, tuple[Segment, str, float]] = {}
+        
+        # 統計
+        self.hits = 0          # 最終片段直接沿用推測結果
+        self.misses = 0        # 推測結果作廢
+        self.skipped = 0       # 推測片段在辨識前就被取代，沒有辨識
+        self.saved_seconds = 0.0  # 命中時省下的辨識時間
+    
+    def submit(self, segment: Segment):
+        """登記送進佇列的片段"""
+        with self._lock:
+            self._latest[segment.start_sample] = segment
+    
+    def is_stale(self, segment: Segment) -> bool:
+        """推測片段是否已經被同一段語音更新的片段取代"""
+        with self._lock:
+            stale = self._latest.get(segment.start_sample) is not segment
+            if stale:
+                self.skipped += 1
+            return stale
+    
+    def store(self, segment: Segment, text: str, elapsed: float):
+        """保存推測片段的辨識結果"""
+        with self._lock:
+            if segment.start_sample not in self._latest:
+                # 多個辨識執行緒時，最終片段可能已經先定案（或被丟掉）：結果用不到，也不保留
+                self.misses += 1
+                return
+            if segment.start_sample in self._results:
+                # 上一次的推測沒有用到
+                self.misses += 1
+            self._results[segment.start_sample] = (segment, text, elapsed)
+    
+    def discard(self, segment: Segment):
+        """片段沒有辨識就被丟掉（或併入其他片段）時呼叫"""
+        with self._lock:
+            if self._latest.get(segment.start_sample) is segment:
+                del self._latest[segment.start_sample]
+            if not segment.speculative:
+                self._results.pop(segment.start_sample, None)
+    
+    def commit(self, segment: Segment) -> str | None:
+        """
+        最終片段到達時呼叫
+        
+        Returns:
+            推測結果仍然有效時返回該文字，否則返回 None（需要重新辨識）
+        """
+        with self._lock:
+            self._latest.pop(segment.start_sample, None)
+            cached = self._results.pop(segment.start_sample, None)
+            if cached is None:
+                return None
+            
+            speculative, text, elapsed = cached
+            # 推測片段之後沒有新的語音，結果可以直接沿用
+            if (speculative.speech_end_sample == segment.speech_end_sample
+                    and segment.end_sample >= speculative.end_sample):
+                self.hits += 1
+                self.saved_seconds += elapsed
+                return text
+            
+            self.misses += 1
+            return None
+    
+    @property
+    def hit_rate(self) -> float:
+        """推測命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        return (
+            f"推測辨識: 命中 {self.hits} 次，落空 {self.misses} 次，"
+            f"略過 {self.skipped} 次（命中率 {self.hit_rate:.0%}，"
+            f"省下 {self.saved_seconds:.1f} 秒）"
+        )
@@ -0,0 +1,58 @@
+"""
+啟動時間報告（--startup-report）
+
+前端把 numpy、VAD、辨識後端等模組延到真的需要時才 import，
+--help、--list 與參數錯誤不需要載入它們。StartupTimer 記錄從解析參數到開始監聽的每個階段，
+找出啟動慢在哪裡；更細的逐模組耗時可以用 python -X importtime。
+
+使用方式：
+    startup = StartupTimer()
+    with startup.stage("import numpy"):
+        import numpy as np
+    startup.add("模型載入", backend.load_seconds)
+    print(startup.report())
+"""
+import time
+import unicodedata
+from contextlib import contextmanager
+
+
+def _display_width(text: str) -> int:
+    """終端機上的顯示寬度（中文字佔兩格）"""
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+
+class StartupTimer:
+    """記錄啟動各階段的耗時（本模組只用標準函式庫，import 成本可忽略）"""
+    
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.stages: list[tuple[str, float]] = []
+    
+    @contextmanager
+    def stage(self, name: str):
+        """計時一個階段（包在 with 裡的 import 會綁定到呼叫端的名稱）"""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.stages.append((name, self._clock() - start))
+    
+    def add(self, name: str, seconds: float):
+        """加入在其他地方量測的階段（例如後端的模型載入與預熱）"""
+        self.stages.append((name, seconds))
+    
+    def elapsed(self) -> float:
+        """從建立到現在的時間（秒）"""
+        return self._clock() - self.started
+    
+    def report(self) -> str:
+        """各階段的耗時與佔整體的比例（依記錄的順序）"""
+        total = self.elapsed()
+        width = max((_display_width(name) for name, _ in self.stages), default=0)
+        lines = [f"⏱️  啟動時間（共 {total * 1000:.0f} ms）:"]
+        for name, seconds in self.stages:
+            padding = " " * (width - _display_width(name))
+            lines.append(f"  {name}{padding}  {seconds * 1000:8.1f} ms  {seconds / total if total else 0:4.0%}")
+        return "\n".join(lines)
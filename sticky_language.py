@@ -0,0 +1,154 @@
+"""
+自動鎖定語言
+
+沒有指定 --language 時，每一句都要先跑一次語言偵測（Whisper 多跑一次 encoder + 一步 decoder），
+短句的偵測結果也不穩定（「OK」可能被判成英文、日文）。
+StickyLanguageBackend 包住任何辨識後端：
+
+- 連續 confirm 句都以高機率（>= min_probability）偵測為同一種語言時，鎖定該語言，之後不再偵測
+- 鎖定後辨識結果信心不足（avg_logprob < min_logprob）時解除鎖定，下一句重新偵測
+- 鎖定超過 recheck_interval 秒時重新偵測一次；結果相同就立即再鎖定
+
+使用方式：
+    backend = StickyLanguageBackend(create_backend("mlx", model))
+    result = backend.transcribe(audio)   # language=None 時自動套用鎖定的語言
+    print(backend.summary())
+"""
+import threading
+import time
+
+import numpy as np
+
+from backends import TranscriptionBackend, TranscriptionResult
+
+SAMPLE_RATE = 16000
+
+
+class StickyLanguageBackend:
+    """
+    自動鎖定語言的辨識後端（介面與 TranscriptionBackend 相同，執行緒安全）
+    
+    多個辨識執行緒（--workers）共用同一份鎖定狀態；辨識本身不在鎖內進行。
+    """
+    
+    def __init__(
+        self,
+        backend: TranscriptionBackend,
+        confirm: int = 3,
+        min_probability: float = 0.8,
+        min_logprob: float = -1.0,
+        recheck_interval: float = 60.0,
+        min_duration: float = 1.0,
+        clock=time.monotonic,
+    ):
+        self.backend = backend
+        self.confirm = confirm
+        self.min_probability = min_probability
+        self.min_logprob = min_logprob
+        self.recheck_interval = recheck_interval
+        # 太短的音訊偵測結果不可靠，不列入連續次數
+        self.min_duration_samples = int(min_duration * SAMPLE_RATE)
+        self._clock = clock
+        self._lock = threading.Lock()
+        
+        self.language: str | None = None  # 目前鎖定的語言
+        self._locked_at = 0.0
+        self._candidate: str | None = None
+        self._streak = 0
+        
+        # 統計
+        self.hits = 0          # 使用鎖定語言、略過偵測的次數
+        self.detections = 0    # 實際偵測的次數
+        self.unlocks = 0       # 因信心不足解除鎖定的次數
+        self.rechecks = 0      # 定期重新偵測的次數
+        self._detect_seconds: list[float] = []
+    
+    def __getattr__(self, name):
+        # name、model、supports_*、load_seconds 等沿用原本的後端
+        return getattr(self.backend, name)
+    
+    def load(self) -> float:
+        return self.backend.load()
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        self.backend.warmup(language, task)
+    
+    def current_language(self) -> str | None:
+        """目前要使用的語言（None 表示需要偵測）"""
+        if self.language and self._clock() - self._locked_at >= self.recheck_interval:
+            # 定期重新偵測：偵測結果相同就立即再鎖定
+            self._candidate, self._streak = self.language, self.confirm - 1
+            self.language = None
+            self.rechecks += 1
+        return self.language
+    
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        if language is not None:
+            return self.backend.transcribe(audio, language, task, word_timestamps)
+        
+        with self._lock:
+            locked = self.current_language()
+        result = self.backend.transcribe(audio, locked, task, word_timestamps)
+        with self._lock:
+            if locked:
+                self.hits += 1
+                low_confidence = result.avg_logprob is not None and result.avg_logprob < self.min_logprob
+                # 其他執行緒可能已經解除鎖定或改鎖其他語言
+                if result.text and low_confidence and self.language == locked:
+                    # 信心不足：可能換了語言，下一句重新偵測
+                    self.language = None
+                    self._candidate, self._streak = None, 0
+                    self.unlocks += 1
+            else:
+                self._observe(result, len(audio))
+        return result
+    
+    def _observe(self, result: TranscriptionResult, samples: int):
+        """記錄一次偵測結果，連續 confirm 次相同時鎖定"""
+        self.detections += 1
+        if result.detect_seconds is not None:
+            self._detect_seconds.append(result.detect_seconds)
+        if samples < self.min_duration_samples or not result.text:
+            return
+        
+        probability = result.language_probability
+        if probability is None or probability < self.min_probability:
+            self._candidate, self._streak = None, 0
+            return
+        if result.language == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = result.language, 1
+        if self._streak >= self.confirm:
+            self.language = self._candidate
+            self._locked_at = self._clock()
+    
+    @property
+    def hit_rate(self) -> float:
+        """略過語言偵測的比例"""
+        total = self.hits + self.detections
+        return self.hits / total if total else 0.0
+    
+    @property
+    def saved_seconds(self) -> float | None:
+        """估計省下的偵測時間（秒）：略過次數 × 平均偵測耗時；後端無法計時時為 None"""
+        if not self._detect_seconds:
+            return None
+        return self.hits * float(np.mean(self._detect_seconds))
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        text = (
+            f"語言鎖定（{self.language or '未鎖定'}）: 略過偵測 {self.hits} 次，"
+            f"偵測 {self.detections} 次（命中率 {self.hit_rate:.0%}），"
+            f"信心不足解除 {self.unlocks} 次，定期重新偵測 {self.rechecks} 次"
+        )
+        if self.saved_seconds is not None:
+            text += f"，約省下 {self.saved_seconds:.2f} 秒"
+        return text
@@ -20,34 +20,34 @@
 
   # 列出可用模型
   uv run python subtitle/subtitle.py --list
+  
+  # 各啟動階段的耗時
+  uv run python subtitle/subtitle.py --startup-report
 """
 import argparse
+import functools
 import signal
 import sys
 import threading
 import queue
 import time
 from collections import deque
-import numpy as np
-import pyaudio
-import mlx_whisper
 from pathlib import Path
-from opencc import OpenCC
+from typing import TYPE_CHECKING
 
 # 加入父目錄到 path 以便 import vad
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from vad import SileroVAD, VADConfig
-
-import AppKit
-from AppKit import (
-    NSApplication, NSWindow, NSTextField, NSColor, NSFont,
-    NSWindowStyleMaskBorderless, NSBackingStoreBuffered,
-    NSScreenSaverWindowLevel,
-    NSMakeRect, NSScreen,
-    NSTextAlignmentCenter,
-    NSApplicationActivationPolicyAccessory
-)
-from PyObjCTools import AppHelper
+# 這裡只 import 不需要 numpy 的模組，--help、--list 與參數錯誤可以立即返回；
+# numpy、VAD 模型、AppKit 等由 import_runtime_modules() 在解析完參數後載入
+from backends import BACKENDS, startup_summary
+from segment_queue import POLICIES, SegmentQueue
+from startup import StartupTimer
+import tw_convert
+from tw_convert import convert_to_tw
+from worker_pool import ReorderBuffer, create_pool
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # ===========================================
 # 📐 視窗設定（可自行調整）
@@ -73,10 +73,9 @@ TEXT_COLOR = "white"          # white / yellow / green / cyan
 # ===========================================
 # 🎙️ 錄音設定
 # ===========================================
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 16000
 CHUNK = 512  # Silero VAD 需要特定大小
+BLOCK = CHUNK * 4  # 每次從裝置讀取約 128 ms，由 vad.feed() 切成 chunk
 
 # ===========================================
 # 預設設定
@@ -88,16 +87,68 @@ MODELS_DIR = Path(__file__).parent.parent / "models"
 # 簡繁轉換（臺灣繁體）
 # ===========================================
 # s2twp: 簡體中文 -> 繁體中文（台灣），包含常用詞轉換（如「鼠標」→「滑鼠」）
-cc = OpenCC('s2twp')
+# convert_to_tw() 在第一次轉換時才載入字典（tw_convert.py）
 
 # 全域變數
 running = True
 model = None
+backend = None  # 辨識後端（--backend）
 task = "transcribe"
 language = None
 vad_config = None
 convert_tw = False
 screen_index = 0
+tracker = None  # 推測辨識的結果追蹤（--speculative）
+gate = None  # 辨識前的品質檢查（--quality-gate）
+partials = None  # 邊說邊顯示的暫時結果（--partials）
+pack = False  # 打包辨識（--pack）
+workers = 1  # 辨識執行緒數量（--workers）
+source = None  # 音訊來源（--input）
+capture_timer = None  # 錄音迴圈的時間抖動
+startup_timer = None  # 啟動時間報告（--startup-report）
+
+
+def import_runtime_modules(startup: StartupTimer):
+    """
+    載入執行時才需要的模組，綁定為全域名稱供視窗與執行緒使用
+    
+    --help、--list 與參數錯誤不會走到這裡，不需要載入 numpy、VAD 模型與 AppKit。
+    """
+    global SileroVAD, VADConfig, CaptureTimer, open_source
+    global PACK_GAP, PACK_MAX_DURATION, transcribe_packed
+    global PartialTranscriber, SegmentGate, SpeculationTracker, StickyLanguageBackend
+    global AppKit, AppHelper, NSApplication, NSWindow, NSTextField, NSColor, NSFont
+    global NSWindowStyleMaskBorderless, NSBackingStoreBuffered, NSScreenSaverWindowLevel
+    global NSMakeRect, NSScreen, NSTextAlignmentCenter, NSApplicationActivationPolicyAccessory
+    global NSMutableAttributedString, NSMutableParagraphStyle
+    global NSFontAttributeName, NSForegroundColorAttributeName, NSParagraphStyleAttributeName
+    
+    # 先單獨 import numpy，報告中才分得出它的成本
+    with startup.stage("import numpy"):
+        import numpy  # noqa: F401  只為了單獨量測 import 時間
+    with startup.stage("import vad（pysilero-vad）"):
+        from vad import SileroVAD, VADConfig
+    with startup.stage("import 其他模組"):
+        from audio_source import CaptureTimer, open_source
+        from packing import PACK_GAP, PACK_MAX_DURATION, transcribe_packed
+        from partials import PartialTranscriber
+        from segment_gate import SegmentGate
+        from speculative import SpeculationTracker
+        from sticky_language import StickyLanguageBackend
+    with startup.stage("import AppKit"):
+        import AppKit
+        from AppKit import (
+            NSApplication, NSWindow, NSTextField, NSColor, NSFont,
+            NSWindowStyleMaskBorderless, NSBackingStoreBuffered,
+            NSScreenSaverWindowLevel,
+            NSMakeRect, NSScreen,
+            NSTextAlignmentCenter,
+            NSApplicationActivationPolicyAccessory,
+            NSMutableAttributedString, NSMutableParagraphStyle,
+            NSFontAttributeName, NSForegroundColorAttributeName,
+            NSParagraphStyleAttributeName,
+        )
+        from PyObjCTools import AppHelper
 
 
 def should_convert_to_tw(model_path: str) -> bool:
@@ -106,11 +157,6 @@ def should_convert_to_tw(model_path: str) -> bool:
     return model_path.startswith("mlx-community/whisper")
 
 
-def convert_to_tw(text: str) -> str:
-    """將文字轉換成臺灣繁體中文"""
-    return cc.convert(text)
-
-
 def list_local_models() -> list[str]:
     """列出所有可用的本地模型"""
     if not MODELS_DIR.exists():
@@ -218,6 +264,7 @@ class SubtitleWindow:
         else:
             font = NSFont.boldSystemFontOfSize_(FONT_SIZE)
         self.label.setFont_(font)
+        self.font = font
         
         self.label.setTextColor_(get_text_color())
         self.label.setBackgroundColor_(NSColor.clearColor())
@@ -234,13 +281,74 @@ class SubtitleWindow:
         
         # 歷史文字記錄
         self.text_history = deque(maxlen=MAX_LINES)
+        # 尚未確定的文字（推測結果），以淡色顯示在最下方
+        self.tentative_text = None
+        # 暫時結果中已經確定的開頭（正常顏色，接在淡色文字前面）
+        self.tentative_stable = ""
     
     def add_text(self, text):
         """新增一行文字，並更新顯示"""
         self.text_history.append(text)
+        self.tentative_text = None
+        self.tentative_stable = ""
         combined_text = "\n".join(self.text_history)
         self._update_label(combined_text)
     
+    def set_tentative(self, text):
+        """顯示尚未確定的文字（淡色），None 表示清除"""
+        self.tentative_text = text
+        self.tentative_stable = ""
+        self.refresh()
+    
+    def set_partial(self, committed, tail):
+        """顯示邊說邊辨識的暫時結果：已確定的字正常顯示，尾端淡色"""
+        self.tentative_text = tail
+        self.tentative_stable = committed
+        self.refresh()
+    
+    def refresh(self):
+        """重繪歷史文字與尚未確定的文字"""
+        # 歷史已滿時，尚未確定的文字會擠掉最舊的一行
+        tentative = self.tentative_text or ""
+        stable = self.tentative_stable
+        history = list(self.text_history)
+        if tentative or stable:
+            history = history[-(MAX_LINES - 1):] if MAX_LINES > 1 else []
+        combined_text = "\n".join(history)
+        if not combined_text and not (tentative or stable):
+            combined_text = "🎤 等待說話..."
+        
+        if not (tentative or stable):
+            self._update_label(combined_text)
+            return
+        
+        def update():
+            paragraph = NSMutableParagraphStyle.alloc().init()
+            paragraph.setAlignment_(NSTextAlignmentCenter)
+            color = get_text_color()
+            attributes = {
+                NSFontAttributeName: self.font,
+                NSForegroundColorAttributeName: color,
+                NSParagraphStyleAttributeName: paragraph,
+            }
+            tentative_attributes = dict(attributes)
+            tentative_attributes[NSForegroundColorAttributeName] = (
+                color.colorWithAlphaComponent_(0.5)
+            )
+            
+            prefix = combined_text + "\n" if combined_text else ""
+            prefix += stable
+            string = NSMutableAttributedString.alloc().initWithString_attributes_(
+                prefix, attributes
+            )
+            string.appendAttributedString_(
+                NSMutableAttributedString.alloc().initWithString_attributes_(
+                    tentative, tentative_attributes
+                )
+            )
+            self.label.setAttributedStringValue_(string)
+        AppHelper.callAfter(update)
+    
     def update_text(self, text):
         """更新字幕文字（執行緒安全），用於狀態訊息"""
         self._update_label(text)
@@ -258,21 +366,11 @@ class SubtitleWindow:
         AppHelper.callAfter(do_close)
 
 
-def transcribe_audio(audio_data: bytes) -> str:
-    global model, task, language, convert_tw
-    
-    audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-    
-    kwargs = {
-        "path_or_hf_repo": model,
-        "task": task,
-    }
-    
-    if language:
-        kwargs["language"] = language
+def transcribe_audio(audio_np: "np.ndarray") -> str:
+    """使用辨識後端辨識（audio_np 為 float32，直接來自 VAD 片段）"""
+    global backend, task, language, convert_tw
     
-    result = mlx_whisper.transcribe(audio_np, **kwargs)
-    text = result["text"].strip()
+    text = backend.transcribe(audio_np, language=language, task=task).text
     
     # 轉換成臺灣繁體
     if convert_tw and text:
@@ -281,62 +379,133 @@ def transcribe_audio(audio_data: bytes) -> str:
     return text
 
 
-# 建立線程安全的佇列，用於存放待辨識的音訊資料
-transcription_queue = queue.Queue()
+# 建立線程安全的佇列，用於存放待辨識的音訊資料（main() 依 --queue-size / --queue-policy 重新建立）
+transcription_queue = SegmentQueue()
+# 多個辨識執行緒（--workers）時，結果依語音順序顯示；其他辨識執行緒等第一個執行緒預熱完成
+reorder = ReorderBuffer()
+warmed_up = threading.Event()
 
-def transcription_thread(subtitle_window):
+def show_tentative(subtitle_window, text: str):
+    """以淡色顯示推測結果，靜音確認後才變成正式字幕（由 reorder 依序呼叫）"""
+    if running:
+        subtitle_window.set_tentative(text or None)
+
+
+def show_final(subtitle_window, batch: list, texts: list[str]):
+    """顯示最終結果（由 reorder 依序呼叫）"""
+    if partials:
+        partials.finish(batch[-1])
+    
+    for text in texts:
+        if text and running:
+            subtitle_window.add_text(text)
+    if not any(texts) and running:
+        # 如果辨識出空字串（例如只有雜訊），清掉推測結果並恢復顯示歷史訊息
+        # （沒有歷史資料時會顯示等待中）
+        subtitle_window.set_tentative(None)
+
+
+def transcription_thread(subtitle_window, index: int = 0):
     """
     消費者執行緒：從佇列取出音訊並進行辨識
     這樣做可以確保錄音不會因為辨識速度慢而中斷（避免漏字）
+    
+    --workers 大於 1 時有多個辨識執行緒，index 0 負責預熱與暫時結果，
+    結果經由 reorder 依語音順序顯示
     """
-    global running, model, task, language, convert_tw
+    global running, backend, task, language, convert_tw, tracker, gate, pack, partials
     
-    print("🚀 辨識執行緒已啟動")
+    print(f"🚀 辨識執行緒 {index + 1} 已啟動")
     
-    # 預熱模型 (確保模型載入記憶體)
-    print("⏳ 正在預熱模型...")
-    try:
-        dummy = np.zeros(RATE, dtype=np.float32)
-        warmup_kwargs = {"path_or_hf_repo": model, "task": task}
-        if language:
-            warmup_kwargs["language"] = language
-        mlx_whisper.transcribe(dummy, **warmup_kwargs)
-        print("✅ 模型預熱完成")
-    except Exception as e:
-        print(f"⚠️ 模型預熱失敗: {e}")
+    if index == 0:
+        # 預熱模型 (確保模型載入記憶體)
+        print("⏳ 正在預熱模型...")
+        try:
+            backend.warmup(language=language, task=task)
+            print(f"✅ 模型預熱完成（{startup_summary(backend)}）")
+        except Exception as e:
+            print(f"⚠️ 模型預熱失敗: {e}")
+        if startup_timer:
+            startup_timer.add("模型載入", backend.load_seconds)
+            startup_timer.add("模型預熱", backend.warmup_seconds)
+            print(startup_timer.report())
+        warmed_up.set()
+    else:
+        warmed_up.wait()
+    
+    # 暫時結果只由第一個辨識執行緒處理（local agreement 需要依序更新）
+    worker_partials = partials if index == 0 else None
+    pack_samples = int(PACK_MAX_DURATION * RATE) if pack else 0
     
     while running:
         try:
             # 從佇列取得音訊，timeout 設為 0.5 秒以便能定期檢查 running 狀態
-            audio_data = transcription_queue.get(timeout=0.5)
+            # （邊說邊顯示時要經常檢查有沒有新的快照）
+            # 打包辨識：把佇列中接在後面的片段一起取出
+            ticket, batch = transcription_queue.get_batch(
+                0.05 if worker_partials else 0.5,
+                pack_samples, int(PACK_GAP * RATE),
+            )
         except queue.Empty:
+            # 沒有待辨識的最終片段：辨識進行中的語音
+            snapshot = worker_partials.take() if worker_partials else None
+            if snapshot is not None:
+                start, audio = snapshot
+                try:
+                    text = transcribe_audio(audio)
+                    with reorder.lock:
+                        committed, tail = partials.update(start, text)
+                        if running:
+                            subtitle_window.set_partial(committed, tail)
+                except Exception as e:
+                    print(f"辨識錯誤: {e}")
             continue
+        segment = batch[0]
+        emit = None
             
         # 僅在終端機顯示排隊狀況，不影響字幕視窗滾動
         q_size = transcription_queue.qsize()
         if q_size > 0:
-            print(f"⏳ 佇列堆積: {q_size} 句")
+            print(f"⏳ 佇列堆積: {q_size} 句（最舊 {transcription_queue.oldest_age():.1f} 秒）")
         
         try:
-            text = transcribe_audio(audio_data)
-            if text and running:
-                subtitle_window.add_text(text)
-            elif not text and running:
-                # 如果辨識出空字串（例如只有雜訊），恢復顯示歷史訊息
-                # 這裡簡單重繪最後的狀態，或者依靠 add_text 來處理
-                # 目前 add_text 會重繪整個歷史，所以我們手動觸發一次重繪歷史
-                combined_text = "\n".join(subtitle_window.text_history)
-                # 如果沒有歷史資料，就顯示等待中
-                if not combined_text:
-                    combined_text = "🎤 等待說話..."
-                subtitle_window._update_label(combined_text)
+            if segment.speculative:
+                # 推測片段：已經有更新的片段就不用辨識
+                if tracker.is_stale(segment):
+                    continue
+                
+                start = time.perf_counter()
+                text = transcribe_audio(segment.audio)
+                elapsed = time.perf_counter() - start
+                tracker.store(segment, text, elapsed)
+                if gate:
+                    gate.observe(elapsed)
+                emit = functools.partial(show_tentative, subtitle_window, text)
+                continue
+            
+            # 最終片段：推測結果仍有效就直接沿用
+            texts = [tracker.commit(s) if tracker else None for s in batch]
+            pending = [i for i, text in enumerate(texts) if text is None]
+            start = time.perf_counter()
+            if len(pending) > 1:
+                packed = transcribe_packed(backend, [batch[i].audio for i in pending], language, task)
+                for i, text in zip(pending, packed):
+                    texts[i] = convert_to_tw(text) if convert_tw and text else text
+            elif pending:
+                texts[pending[0]] = transcribe_audio(batch[pending[0]].audio)
+            if gate and pending:
+                gate.observe(time.perf_counter() - start)
+            emit = functools.partial(show_final, subtitle_window, batch, texts)
                 
         except Exception as e:
             print(f"辨識錯誤: {e}")
             subtitle_window.update_text(f"錯誤: {str(e)}")
         
         finally:
-            transcription_queue.task_done()
+            # 輪到這一句時才顯示（前面的句子可能還在其他執行緒辨識）
+            reorder.complete(ticket, emit)
+            for _ in batch:
+                transcription_queue.task_done()
 
 
 def capture_thread(subtitle_window):
@@ -344,16 +513,7 @@ def capture_thread(subtitle_window):
     生產者執行緒：專注於錄音和 VAD 偵測
     將偵測到的語音片段放入佇列，絕不阻塞
     """
-    global running, model, task, language, vad_config
-    
-    audio = pyaudio.PyAudio()
-    stream = audio.open(
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=RATE,
-        input=True,
-        frames_per_buffer=CHUNK
-    )
+    global running, model, task, language, vad_config, tracker, gate, source, partials, capture_timer
     
     # 建立 VAD
     vad = SileroVAD(vad_config)
@@ -363,31 +523,58 @@ def capture_thread(subtitle_window):
     try:
         while running:
             try:
-                data = stream.read(CHUNK, exception_on_overflow=False)
+                data = source.read(BLOCK)
             except Exception:
                 break
+            if capture_timer:
+                capture_timer.tick()
 
             if not running:
                 break
 
             # 使用 VAD 處理
-            audio_data = vad.process(data)
+            # 一次讀入的區塊可能結束不只一段語音，全部送出
+            segments = vad.feed(data)
+            if partials:
+                partials.offer(vad)
+            
+            # 輸入結束（檔案播放完畢）：送出最後一段語音，字幕視窗保持開啟
+            if not data:
+                segments.append(vad.finalize())
+            
+            for segment in segments:
+                # 太短的片段（約 0.16 秒以下）不送辨識
+                if segment is not None and len(segment.audio) > CHUNK * 5:
+                    # 推測片段只檢查不計入統計（同一段語音還會以最終片段送來一次）
+                    if gate and not (
+                        gate.check(segment) is None if segment.speculative else gate.accept(segment)
+                    ):
+                        # 不送辨識：清掉同一段語音的推測結果
+                        if tracker:
+                            tracker.discard(segment)
+                        continue
+                    # 將語音片段放入佇列，讓辨識執行緒處理
+                    if tracker:
+                        tracker.submit(segment)
+                    transcription_queue.put(segment)
+                    # 不要在這裡更新 UI 說「辨識中」，交給消費者執行緒處理，
+                    # 這樣才能精確反映「正在處理」的狀態。
+                    # 但如果 Queue 塞車嚴重，我們可以在這裡顯示一點提示（選擇性）
             
-            if audio_data is not None and len(audio_data) > CHUNK * 10:
-                # 將語音資料放入佇列，讓辨識執行緒處理
-                transcription_queue.put(audio_data)
-                # 不要在這裡更新 UI 說「辨識中」，交給消費者執行緒處理，
-                # 這樣才能精確反映「正在處理」的狀態。
-                # 但如果 Queue 塞車嚴重，我們可以在這裡顯示一點提示（選擇性）
+            if not data:
+                break
     
     except Exception as e:
         if running:
             subtitle_window.update_text(f"錯誤: {str(e)}")
     
     finally:
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        source.close()
+        if vad.config.energy_gate:
+            print(
+                f"VAD 模型呼叫: {vad.model_calls} 次，"
+                f"能量過濾略過: {vad.gated_chunks} 次（{vad.gated_ratio:.0%}）"
+            )
 
 
 def signal_handler(signum, frame):
@@ -399,8 +586,10 @@ def signal_handler(signum, frame):
 
 
 def main():
-    global running, model, task, language, vad_config, convert_tw, screen_index
+    global running, model, backend, task, language, vad_config, convert_tw, screen_index, tracker, gate, source
+    global transcription_queue, pack, partials, workers, capture_timer, startup_timer
     
+    startup = StartupTimer()
     parser = argparse.ArgumentParser(
         description="即時字幕浮動視窗（Apple Silicon GPU 加速）",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -428,6 +617,13 @@ def main():
         default=None,
         help="模型名稱：HF repo 或本地模型名稱",
     )
+    parser.add_argument(
+        "--backend", "-b",
+        type=str,
+        choices=BACKENDS,
+        default="mlx",
+        help="辨識後端：mlx（Apple Silicon GPU）、faster-whisper（CPU）或 fake（不跑模型，測試用）",
+    )
     parser.add_argument(
         "--task", "-t",
         type=str,
@@ -477,9 +673,111 @@ def main():
         default=0.1,
         help="語音前後的緩衝（秒），預設 0.1",
     )
+    parser.add_argument(
+        "--max-speech-duration",
+        type=float,
+        default=20.0,
+        help="最長語音長度（秒），超過時在停頓處強制切段，0 為不限制，預設 20",
+    )
+    parser.add_argument(
+        "--energy-gate",
+        action="store_true",
+        help="開啟能量預先過濾：明顯靜音的片段不跑 VAD 模型，降低待機 CPU 用量",
+    )
+    parser.add_argument(
+        "--input", "-i",
+        type=str,
+        default="mic",
+        help="音訊來源：mic（麥克風）、WAV/PCM/mp3/m4a 等檔案路徑（壓縮格式需要 ffmpeg）、-（標準輸入 raw PCM）、synth:tone|noise|speech[:秒數] 或 replay:錄音目錄[:倍速]",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="檔案、標準輸入與合成音訊不依實際時間播放，盡快處理（壓力測試用）",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="辨識佇列最多堆積幾句（0 為不限制）",
+    )
+    parser.add_argument(
+        "--queue-policy",
+        type=str,
+        choices=POLICIES,
+        default="latest",
+        help="佇列滿時的處理方式：block（等待）、drop-oldest（丟最舊）、merge（併入上一句）、latest（只留最新）",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="打包辨識：佇列堆積時把多句接成一段（最長 29 秒）一次辨識，再依時間戳記分回各句",
+    )
+    parser.add_argument(
+        "--partials",
+        action="store_true",
+        help="邊說邊顯示：語音還在累積時就定期辨識，已確定的字正常顯示，未確定的尾端淡色",
+    )
+    parser.add_argument(
+        "--partial-interval",
+        type=float,
+        default=0.5,
+        help="邊說邊顯示時，語音每累積多少秒重新辨識一次（預設: 0.5）",
+    )
+    parser.add_argument(
+        "--quality-gate",
+        action="store_true",
+        help="辨識前的品質檢查：語音機率、語音比例或音量太低的短片段（咳嗽、關門聲、鍵盤聲）不送辨識",
+    )
+    parser.add_argument(
+        "--gate-min-peak",
+        type=float,
+        default=0.7,
+        help="品質檢查：片段的最高語音機率下限（預設: 0.7）",
+    )
+    parser.add_argument(
+        "--gate-min-voiced",
+        type=float,
+        default=0.5,
+        help="品質檢查：語音範圍內達到語音門檻的比例下限（預設: 0.5）",
+    )
+    parser.add_argument(
+        "--gate-min-db",
+        type=float,
+        default=-50.0,
+        help="品質檢查：語音範圍的音量下限（dBFS，預設: -50）",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="推測式提早辨識：一停頓就先以淡色顯示字幕，靜音確認後立即定案",
+    )
+    parser.add_argument(
+        "--sticky-language",
+        action="store_true",
+        help="沒有指定 --language 時，連續 3 句以高機率偵測到同一種語言就鎖定，之後略過語言偵測",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="辨識執行緒數量，每個執行緒載入一份模型，字幕依語音順序顯示（CPU 後端適用，預設: 1）",
+    )
+    parser.add_argument(
+        "--inference-process",
+        action="store_true",
+        help="在獨立行程中辨識（音訊經由共用記憶體傳遞），推論不會和錄音搶 GIL",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="模型預熱完成時列出各啟動階段的耗時（import、建立後端、模型載入與預熱）",
+    )
     
     args = parser.parse_args()
-
+    if args.workers < 1:
+        parser.error("--workers 至少為 1")
+    
     # 列出模型
     if args.list:
         local_models = list_local_models()
@@ -499,19 +797,44 @@ def main():
         print("  • mlx-community/whisper-tiny-mlx        翻譯✓")
         return
     
-    # 解析模型
-    model = resolve_model(args.model)
+    # 解析模型（faster-whisper 直接使用模型大小或路徑，如 small、large-v3）
+    if args.backend == "mlx":
+        model = resolve_model(args.model)
+    else:
+        model = args.model or ("small" if args.backend == "faster-whisper" else "fake")
     task = args.task
     language = args.language
     screen_index = args.screen
+    startup.add("解析參數", startup.elapsed())
+    import_runtime_modules(startup)
+    if args.startup_report:
+        startup_timer = startup
+    
+    # 建立辨識後端
+    workers = args.workers
+    with startup.stage("建立辨識後端"):
+        backend = create_pool(args.backend, model, workers, process=args.inference_process)
+    if task == "translate" and not backend.supports_translate:
+        print(f"⚠️ 此模型不支援翻譯任務: {model}")
     
     # 判斷是否需要轉換成臺灣繁體（翻譯任務輸出英文，不需要轉換）
-    convert_tw = should_convert_to_tw(model) and task == "transcribe"
+    # faster-whisper 使用 OpenAI 原版權重，中文常輸出簡體
+    if args.backend == "mlx":
+        convert_tw = should_convert_to_tw(model)
+    else:
+        convert_tw = args.backend == "faster-whisper"
+    convert_tw = convert_tw and task == "transcribe"
+    if convert_tw:
+        tw_convert.preload()  # 載入模型的同時在背景載入字典
 
     # translate 任務若未指定語言，自動補上 zh，否則短音訊語言偵測失敗會亂辨識
     if task == "translate" and not language:
         language = "zh"
         print("ℹ️  translate 任務自動設定語言為 zh（可用 --language 覆蓋）")
+    
+    # 自動鎖定語言（包住後端，language=None 時套用鎖定的語言）
+    if args.sticky_language and not language:
+        backend = StickyLanguageBackend(backend)
 
     # 建立 VAD 設定
     vad_config = VADConfig(
@@ -520,11 +843,35 @@ def main():
         min_speech_duration=args.min_speech_duration,
         speech_pad_duration=args.speech_pad_duration,
         sample_rate=RATE,
+        max_speech_duration=args.max_speech_duration,
+        energy_gate=args.energy_gate,
+        speculative=args.speculative,
+    )
+    tracker = SpeculationTracker() if args.speculative else None
+    gate = SegmentGate(args.gate_min_peak, args.gate_min_voiced, args.gate_min_db) if args.quality_gate else None
+    pack = args.pack
+    partials = PartialTranscriber(args.partial_interval, RATE) if args.partials else None
+    transcription_queue = SegmentQueue(
+        args.queue_size, args.queue_policy,
+        on_drop=tracker.discard if tracker else None,
     )
     
+    # 開啟音訊來源（由錄音執行緒讀取）
+    with startup.stage("開啟音訊來源"):
+        try:
+            source = open_source(args.input, realtime=not args.fast, frames_per_buffer=BLOCK)
+        except (OSError, ValueError) as e:
+            # 找不到檔案、無法辨認的 --input 等：與其他參數錯誤一樣回報，不顯示 traceback
+            parser.error(str(e))
+    # 錄音迴圈的時間抖動（依實際時間讀取時才有意義）
+    if source.realtime or not source.finite:
+        capture_timer = CaptureTimer(BLOCK, RATE)
+    
     # 顯示設定
     task_display = "轉錄" if task == "transcribe" else "翻譯成英文"
     lang_display = language if language else "自動偵測"
+    if isinstance(backend, StickyLanguageBackend):
+        lang_display += "（連續 3 句相同後鎖定）"
     
     if "/" in model and not model.startswith("/"):
         model_display = model
@@ -538,18 +885,32 @@ def main():
     print("使用 Apple Silicon GPU 加速")
     print("=" * 50)
     print(f"模型: {model_display} ({model_source})")
+    if args.backend != "mlx":
+        print(f"後端: {backend.name}")
     print(f"任務: {task_display}")
     print(f"語言: {lang_display}")
+    if args.input != "mic":
+        print(f"輸入: {args.input}" + ("（盡快處理）" if args.fast else ""))
     if convert_tw:
-        print(f"簡繁轉換: ✓ 臺灣繁體")
+        print("簡繁轉換: ✓ 臺灣繁體")
     print("-" * 50)
     print("VAD 設定:")
     print(f"  語音門檻: {args.speech_threshold}")
     print(f"  靜音時長: {args.silence_duration} 秒")
     print(f"  最短語音: {args.min_speech_duration} 秒")
     print(f"  前後緩衝: {args.speech_pad_duration} 秒")
+    if args.max_speech_duration > 0:
+        print(f"  最長語音: {args.max_speech_duration} 秒")
+    if args.energy_gate:
+        print("  能量過濾: ✓")
+    if args.speculative:
+        print("  推測辨識: ✓")
+    if args.quality_gate:
+        print(f"  品質檢查: ✓（語音機率 ≥ {args.gate_min_peak}、語音比例 ≥ {args.gate_min_voiced}、音量 ≥ {args.gate_min_db} dBFS）")
+    if args.partials:
+        print(f"  邊說邊顯示: ✓（每 {args.partial_interval} 秒）")
     print("=" * 50)
-    print(f"\n視窗設定：")
+    print("\n視窗設定：")
     print(f"  螢幕：第 {screen_index} 個（0=主螢幕）")
     print(f"  寬度：螢幕的 {int(WINDOW_WIDTH_RATIO * 100)}%")
     print(f"  顯示行數：{MAX_LINES} 行")
@@ -571,15 +932,17 @@ def main():
     app.setActivationPolicy_(NSApplicationActivationPolicyAccessory)
     
     # 建立字幕視窗
-    subtitle_window = SubtitleWindow()
+    with startup.stage("建立字幕視窗"):
+        subtitle_window = SubtitleWindow()
     
     # 啟動錄音執行緒 (Capture)
     capture_t = threading.Thread(target=capture_thread, args=(subtitle_window,), daemon=True)
     capture_t.start()
     
     # 啟動辨識執行緒 (Transcription)
-    transcribe_t = threading.Thread(target=transcription_thread, args=(subtitle_window,), daemon=True)
-    transcribe_t.start()
+    for i in range(workers):
+        transcribe_t = threading.Thread(target=transcription_thread, args=(subtitle_window, i), daemon=True)
+        transcribe_t.start()
     
     # 設定定時器來檢查是否需要關閉
     def check_running():
@@ -593,6 +956,20 @@ def main():
     # 執行主迴圈
     AppHelper.runEventLoop()
     
+    transcription_queue.close()
+    print(transcription_queue.summary())
+    if workers > 1:
+        print(reorder.summary())
+    if tracker:
+        print(tracker.summary())
+    if gate:
+        print(gate.summary())
+    if isinstance(backend, StickyLanguageBackend):
+        print(backend.summary())
+    if capture_timer:
+        print(capture_timer.summary())
+    if convert_tw:
+        print(tw_convert.summary())
     print("已關閉")
 
 
@@ -0,0 +1,331 @@
+"""
+長音檔離線辨識（串流讀取）
+
+一次把整個檔案讀進記憶體再交給 mlx_whisper.transcribe()，幾個小時的錄音又慢又吃記憶體。
+這裡改成與 realtime.py 相同的流程：分塊讀取（ffmpeg 邊解碼邊讀）→ SileroVAD 切段 →
+同一個辨識後端，每辨識完一段就寫出 SRT 或 JSONL。
+
+讀取與 VAD 在背景執行緒進行，和辨識同時跑；兩者之間的佇列有上限（佇列滿時讀取會等待），
+每段語音最長 --max-speech-duration 秒，所以記憶體用量與檔案長度無關。
+
+使用方式:
+  # 輸出 lecture.srt
+  uv run python transcribe_file.py lecture.wav
+  
+  # 任何 ffmpeg 能解碼的格式，輸出 JSONL 到標準輸出
+  uv run python transcribe_file.py talk.mp4 --format jsonl -o -
+  
+  # 指定語言、打包短句一次辨識（速度較快）
+  uv run python transcribe_file.py meeting.m4a --language zh --pack
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+# 與 realtime.py 相同的模型解析、簡繁轉換與辨識方式
+from backends import BACKENDS, TranscriptionBackend, startup_summary
+from realtime import BLOCK, CHUNK, RATE, resolve_model, should_convert_to_tw, transcribe_audio
+from segment_queue import SegmentQueue
+from tw_convert import convert_to_tw
+from worker_pool import create_pool
+
+if TYPE_CHECKING:
+    from vad import VADConfig
+
+FORMATS = ["srt", "jsonl"]
+# 讀取與辨識之間最多堆積幾段（決定記憶體上限）
+QUEUE_SIZE = 8
+
+
+class AudioReadError(Exception):
+    """讀取或解碼音訊時的錯誤（與辨識時的錯誤分開回報）"""
+
+
+def format_timestamp(seconds: float) -> str:
+    """SRT 時間格式（HH:MM:SS,mmm）"""
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+class SubtitleWriter:
+    """
+    依序寫出辨識結果（每段寫完就 flush，辨識到一半也能看到結果）
+    
+    srt 略過沒有文字的片段；jsonl 每個片段一行。
+    """
+    
+    def __init__(self, stream: TextIO, fmt: str):
+        self.stream = stream
+        self.format = fmt
+        self.count = 0  # 已寫出的字幕（或 JSON）筆數
+    
+    def write(self, start: float, end: float, text: str, language: str | None, segment):
+        if self.format == "srt":
+            text = text.strip()
+            if not text:
+                return
+            self.count += 1
+            self.stream.write(
+                f"{self.count}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n"
+            )
+        else:
+            self.count += 1
+            self.stream.write(json.dumps({
+                "index": self.count - 1,
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "start_sample": segment.start_sample,
+                "end_sample": segment.end_sample,
+                "text": text,
+                "language": language,
+            }, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def peak_memory_mb() -> float:
+    """行程的最大常駐記憶體（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以 bytes 為單位，Linux 以 KB 為單位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def resolve_backend_model(backend: str, model: str | None, task: str) -> tuple[str, bool]:
+    """與 realtime.py 相同的模型解析，返回 (模型, 是否轉換成臺灣繁體)"""
+    if backend == "mlx":
+        model = resolve_model(model)
+        convert_tw = should_convert_to_tw(model)
+    else:
+        model = model or ("small" if backend == "faster-whisper" else "fake")
+        # faster-whisper 使用 OpenAI 原版權重，中文常輸出簡體
+        convert_tw = backend == "faster-whisper"
+    # 翻譯任務輸出英文，不需要轉換
+    return model, convert_tw and task == "transcribe"
+
+
+def default_output(spec: str, fmt: str) -> str:
+    """輸入是檔案時輸出到同名的 .srt / .jsonl，否則輸出到標準輸出"""
+    path = Path(spec)
+    if spec == "-" or (":" in spec and not path.exists()):
+        return "-"
+    return str(path.with_suffix(f".{fmt}"))
+
+
+@dataclass
+class StreamStats:
+    """一個檔案的處理結果"""
+    audio_seconds: float   # 讀到的音訊長度
+    speech_seconds: float  # 送去辨識的片段總長度
+    wall_seconds: float    # 實際耗時
+    entries: int           # 寫出的字幕（或 JSON）筆數
+
+
+def add_vad_arguments(parser: argparse.ArgumentParser):
+    """VAD 與打包辨識的參數（batch_transcribe.py 共用）"""
+    parser.add_argument("--speech-threshold", type=float, default=0.5, help="語音偵測門檻（預設: 0.5）")
+    parser.add_argument("--silence-duration", type=float, default=0.6, help="語音結束後的靜音時長（秒，預設: 0.6）")
+    parser.add_argument("--min-speech-duration", type=float, default=0.2, help="最短語音長度（秒，預設: 0.2）")
+    parser.add_argument("--speech-pad-duration", type=float, default=0.1, help="語音前後的緩衝（秒，預設: 0.1）")
+    parser.add_argument("--max-speech-duration", type=float, default=20.0, help="最長語音長度（秒，預設: 20；也決定記憶體上限）")
+    parser.add_argument("--pack", action="store_true", help="打包辨識：把相鄰的短句接成一段（最長 29 秒）一次辨識")
+
+
+def make_vad_config(args: argparse.Namespace) -> "VADConfig":
+    """依參數建立 VAD 設定"""
+    from vad import VADConfig
+    
+    return VADConfig(
+        speech_threshold=args.speech_threshold,
+        min_silence_duration=args.silence_duration,
+        min_speech_duration=args.min_speech_duration,
+        speech_pad_duration=args.speech_pad_duration,
+        sample_rate=RATE,
+        max_speech_duration=args.max_speech_duration,
+    )
+
+
+def transcribe_stream(
+    source,
+    backend: TranscriptionBackend,
+    writer: SubtitleWriter,
+    vad_config: "VADConfig",
+    language: str | None,
+    task: str,
+    convert_tw: bool,
+    pack: bool = False,
+    on_progress=None,
+) -> StreamStats:
+    """
+    從音訊來源分塊讀取、切段並辨識，每辨識完一段就寫出
+    
+    讀取與 VAD 在背景執行緒進行，和辨識之間的佇列有上限，記憶體用量與音訊長度無關。
+    on_progress(目前位置秒數) 在每次寫出後呼叫。
+    
+    Raises:
+        AudioReadError: 讀取或解碼音訊時的錯誤
+    """
+    from packing import PACK_GAP, PACK_MAX_DURATION, transcribe_packed
+    from vad import SileroVAD
+    
+    vad = SileroVAD(vad_config)
+    pad_samples = int(vad_config.speech_pad_duration * RATE)
+    # 佇列滿時讀取執行緒等待（block），不會丟掉任何一段
+    segments = SegmentQueue(QUEUE_SIZE, "block")
+    samples_read = 0
+    read_error = None
+    
+    def reader():
+        """讀取執行緒：分塊讀取並切段"""
+        nonlocal samples_read, read_error
+        try:
+            with source:
+                while True:
+                    data = source.read(BLOCK)
+                    samples_read += len(data) // 2
+                    found = vad.feed(data)
+                    if not data:
+                        found.append(vad.finalize())
+                    for segment in found:
+                        # 太短的片段（約 0.16 秒以下）不送辨識
+                        if segment is not None and len(segment.audio) > CHUNK * 5:
+                            segments.put(segment)
+                    if not data:
+                        break
+        except Exception as e:
+            read_error = e
+        finally:
+            segments.put(None)
+    
+    pack_samples = int(PACK_MAX_DURATION * RATE) if pack else 0
+    wall_start = time.perf_counter()
+    speech_seconds = 0.0
+    
+    t_reader = threading.Thread(target=reader, name="reader", daemon=True)
+    t_reader.start()
+    try:
+        while True:
+            _, batch = segments.get_batch(None, pack_samples, int(PACK_GAP * RATE))
+            if batch[0] is None:
+                break  # 讀取結束（結束標記不會和片段打包在一起）
+            
+            if len(batch) > 1:
+                texts = transcribe_packed(backend, [s.audio for s in batch], language, task)
+                texts = [convert_to_tw(t) if convert_tw and t else t for t in texts]
+                languages = [language] * len(batch)
+            else:
+                result = transcribe_audio(backend, batch[0].audio, language, task, convert_tw)
+                texts, languages = [result.text], [result.language or language]
+            
+            for segment, text, segment_language in zip(batch, texts, languages):
+                # 結束時間取最後一個語音 chunk 加上緩衝，不含等待靜音的部分
+                end_sample = min(segment.end_sample, segment.speech_end_sample + pad_samples)
+                writer.write(segment.start_sample / RATE, end_sample / RATE, text, segment_language, segment)
+                speech_seconds += segment.duration
+                segments.task_done()
+            if on_progress:
+                on_progress(batch[-1].end_sample / RATE)
+    finally:
+        # 中斷時讓讀取執行緒不再等待佇列空位
+        segments.close()
+    
+    t_reader.join()
+    if read_error:
+        raise AudioReadError(str(read_error)) from read_error
+    return StreamStats(
+        audio_seconds=samples_read / RATE,
+        speech_seconds=speech_seconds,
+        wall_seconds=time.perf_counter() - wall_start,
+        entries=writer.count,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="長音檔離線辨識（分塊讀取 + VAD 切段，邊辨識邊寫出 SRT / JSONL）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", help="音訊檔（WAV、raw PCM 或 ffmpeg 能解碼的格式）、-（標準輸入）或 synth:KIND[:秒數]")
+    parser.add_argument("--model", "-m", type=str, default=None, help="模型名稱：HF repo 或本地模型名稱（同 realtime.py）")
+    parser.add_argument("--backend", "-b", choices=BACKENDS, default="mlx", help="辨識後端（預設: mlx）")
+    parser.add_argument("--task", "-t", choices=["transcribe", "translate"], default="transcribe", help="任務類型")
+    parser.add_argument("--language", "-l", type=str, default=None, help="語言代碼（如 zh、en、ja），不指定則自動偵測")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="srt", help="輸出格式（預設: srt）")
+    parser.add_argument("--output", "-o", type=str, default=None, help="輸出檔（- 為標準輸出，預設為輸入檔的同名 .srt / .jsonl）")
+    add_vad_arguments(parser)
+    args = parser.parse_args()
+    if args.max_speech_duration <= 0:
+        parser.error("--max-speech-duration 必須大於 0（不限制時記憶體用量會隨語音長度增加）")
+    
+    model, convert_tw = resolve_backend_model(args.backend, args.model, args.task)
+    if args.task == "translate" and not args.language:
+        args.language = "zh"
+    
+    # 執行時才需要的模組（--help 與參數錯誤不用載入 numpy 與 VAD 模型）
+    from audio_source import open_source
+    
+    try:
+        source = open_source(args.input, realtime=False, frames_per_buffer=BLOCK)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    output = args.output or default_output(args.input, args.format)
+    
+    backend = create_pool(args.backend, model)
+    print(f"📂 {source.describe()} -> {'標準輸出' if output == '-' else output}", file=sys.stderr)
+    print(f"⏳ 載入模型 {model}...", file=sys.stderr)
+    backend.load()
+    backend.warmup(language=args.language, task=args.task)
+    print(f"✅ 模型就緒（{startup_summary(backend)}）", file=sys.stderr)
+    
+    stream = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    writer = SubtitleWriter(stream, args.format)
+    wall_start = time.perf_counter()
+    
+    def show_progress(position: float):
+        elapsed = time.perf_counter() - wall_start
+        print(
+            f"⏳ {format_timestamp(position)[:8]}  已寫出 {writer.count} 筆"
+            f"（{position / elapsed:.1f} 倍速）",
+            end="\r", file=sys.stderr,
+        )
+    
+    try:
+        stats = transcribe_stream(
+            source, backend, writer, make_vad_config(args),
+            args.language, args.task, convert_tw, args.pack, show_progress,
+        )
+    except KeyboardInterrupt:
+        print("\n\n正在關閉...", file=sys.stderr)
+        return
+    except BrokenPipeError:
+        # 輸出端已關閉（例如 -o - | head）：不顯示錯誤，之後的 flush 也不再寫到已關閉的管線
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except AudioReadError as e:
+        print(f"\n❌ 讀取錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ 辨識錯誤: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    
+    print(
+        f"\n✅ 完成: 音訊 {format_timestamp(stats.audio_seconds)[:8]}（語音 {stats.speech_seconds:.1f} 秒），"
+        f"耗時 {stats.wall_seconds:.1f} 秒（{stats.audio_seconds / stats.wall_seconds if stats.wall_seconds else 0:.1f} 倍速），"
+        f"寫出 {stats.entries} 筆，峰值記憶體 {peak_memory_mb():.0f} MB",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+簡體 -> 臺灣繁體（s2twp）轉換
+
+與 opencc-python-reimplemented 的 OpenCC('s2twp').convert() 輸出完全相同，但：
+
+- 延遲載入：第一次轉換時才讀字典，import 不需要任何成本
+- 預先建好的查表結構：每個字典只保留「詞 -> 第一個對應」與「開頭的字 -> 最長的詞長度」，
+  從每個位置只查到以該字開頭的最長詞為止，不用像 OpenCC 一樣每次都查到字典中
+  最長的詞長度（16 字）；單字字典直接逐字查表。建好的結構以 marshal 快取在 ~/.cache
+- LRU 快取：以標點切開的片段為單位（「謝謝」「好的」這類短句經常重複）
+
+OpenCC 的比對規則（保持輸出一致的關鍵）：在整段文字中找最長的詞（同樣長度取最左邊），
+換掉後左右兩段各自遞迴，且只能找不超過上一次長度的詞；同一組字典（STPhrases + STCharacters）
+依序套用，前一本沒有對到的片段才交給下一本；每一組字典處理完整段文字後再交給下一組。
+
+使用方式：
+    from tw_convert import convert_to_tw
+    convert_to_tw("鼠标和软件")  # -> "滑鼠和軟體"
+"""
+import hashlib
+import json
+import marshal
+import re
+import threading
+import time
+from functools import lru_cache
+from importlib.util import find_spec
+from pathlib import Path
+
+CONVERSION = "s2twp"
+CACHE_DIR = Path.home() / ".cache" / "whisper-live-client-for-mac"
+CACHE_SIZE = 4096
+
+# 與 OpenCC 相同的分隔字元（來自 OpenCC PhraseExtract.cpp，字典中的詞不會包含這些字元）
+_SPLIT_PATTERN = re.compile(
+    r'(\s+|-|,|\.|\?|!|\*|　|，|。|、|；|：|？|！|…|“|”|‘|’|『|』|「|」|﹁|﹂|—|－|（|）|《|》|〈|〉|～|．|／|＼|︒|︑|︔|︓|︿|﹀|︹|︺|︙|︐|［|﹇|］|﹈|︕|︖|︰|︳|︴|︽|︾|︵|︶|｛|︷|｝|︸|﹃|﹄|【|︻|】|︼)'
+)
+
+# 載入後的轉換鏈：[[(詞 -> 對應, 開頭的字 -> 最長詞長度；只有單字時為 None), ...], ...]，外層為依序套用的每一組字典
+_chain = None
+_load_lock = threading.Lock()
+# 統計：載入字典的耗時（秒）與是否來自快取
+load_seconds = 0.0
+loaded_from_cache = False
+
+
+def _opencc_dir() -> Path:
+    """opencc-python-reimplemented 的安裝位置（只讀它的設定與字典檔，不 import）"""
+    spec = find_spec("opencc")
+    if spec is None or spec.origin is None:
+        raise ImportError("簡繁轉換需要 opencc-python-reimplemented：uv pip install opencc-python-reimplemented")
+    return Path(spec.origin).parent
+
+
+def _chain_files(root: Path) -> list[list[Path]]:
+    """依設定檔列出轉換鏈的字典檔"""
+    config = json.loads((root / "config" / f"{CONVERSION}.json").read_text(encoding="utf-8"))
+    chain = []
+    for step in config["conversion_chain"]:
+        spec = step["dict"]
+        dicts = spec["dicts"] if spec["type"] == "group" else [spec]
+        chain.append([root / "dictionary" / d["file"] for d in dicts])
+    return chain
+
+
+def _read_dictionary(path: Path) -> tuple[dict[str, str], dict[str, int] | None]:
+    """讀取字典（與 OpenCC 相同的解析方式，一對多時取第一個），並記錄每個開頭的字的最長詞長度"""
+    mapping = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            key, value = line.strip().split("\t")
+            mapping[key] = value.split(" ")[0]
+    max_lengths = {}
+    for key in mapping:
+        if len(key) > max_lengths.get(key[0], 0):
+            max_lengths[key[0]] = len(key)
+    if max(max_lengths.values()) == 1:
+        return mapping, None  # 只有單字
+    return mapping, max_lengths
+
+
+def _load():
+    """載入轉換鏈（多個執行緒同時呼叫時只載入一次）"""
+    with _load_lock:
+        if _chain is None:
+            _build()
+
+
+def _build():
+    """讀取字典並建立查表結構（優先使用快取）"""
+    global _chain, load_seconds, loaded_from_cache
+    start = time.perf_counter()
+    files = _chain_files(_opencc_dir())
+    
+    # 字典檔的路徑、大小與修改時間都相同才使用快取
+    fingerprint = hashlib.sha1(repr([
+        (str(p), p.stat().st_size, p.stat().st_mtime_ns) for step in files for p in step
+    ]).encode()).hexdigest()[:16]
+    cache_path = CACHE_DIR / f"{CONVERSION}-{fingerprint}.marshal"
+    
+    chain = None
+    if cache_path.exists():
+        try:
+            chain = marshal.loads(cache_path.read_bytes())
+            loaded_from_cache = True
+        except (OSError, ValueError, EOFError, TypeError):
+            chain = None
+    if chain is None:
+        chain = [[_read_dictionary(p) for p in step] for step in files]
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(".tmp")
+            tmp.write_bytes(marshal.dumps(chain))
+            tmp.replace(cache_path)
+        except OSError:
+            pass  # 無法寫入快取不影響轉換
+    _chain = chain
+    load_seconds = time.perf_counter() - start
+
+
+def _match_lengths(text: str, i: int, mapping: dict[str, str], max_lengths: dict[str, int]) -> list[int]:
+    """從位置 i 開始，所有在字典中的詞長度（由短到長）"""
+    limit = min(max_lengths.get(text[i], 0), len(text) - i)
+    return [n for n in range(1, limit + 1) if text[i:i + n] in mapping]
+
+
+def _apply_group(text: str, group: list[tuple[dict[str, str], dict[str, int] | None]]) -> str:
+    """套用一組字典（同 OpenCC 的 StringTree.create_parse_tree + inorder）"""
+    # 已經換掉的範圍：開始 -> (結束, 對應)
+    matched: dict[int, tuple[int, str]] = {}
+    # 還沒換掉的範圍：(開始, 結束, 長度上限)
+    pending = [(0, len(text), None)]
+    
+    for mapping, max_lengths in group:
+        if max_lengths is None:
+            # 只有單字的字典（STCharacters、TWVariants）：最長的詞就是單字，
+            # 結果等於逐字查表，沒有對到的連續字元留給下一本字典
+            unmatched = []
+            for a, b, _ in pending:
+                start = a
+                for i in range(a, b):
+                    value = mapping.get(text[i])
+                    if value is not None:
+                        matched[i] = (i + 1, value)
+                        if start < i:
+                            unmatched.append((start, i, None))
+                        start = i + 1
+                if start < b:
+                    unmatched.append((start, b, None))
+            pending = unmatched
+            continue
+        
+        lengths = {}  # 位置 -> 該位置可以對到的詞長度，同一本字典內重複使用
+        unmatched = []
+        stack = pending
+        while stack:
+            a, b, limit = stack.pop()
+            longest = b - a if limit is None else min(b - a, limit)
+            best_start, best_length = -1, 0
+            for i in range(a, b):
+                if best_length == longest or b - i <= best_length:
+                    break  # 後面的位置不可能對到更長的詞
+                if i not in lengths:
+                    lengths[i] = _match_lengths(text, i, mapping, max_lengths)
+                cap = b - i
+                if limit is not None and limit < cap:
+                    cap = limit
+                for n in reversed(lengths[i]):
+                    if n <= cap:
+                        # 同樣長度取最左邊：只有更長才取代
+                        if n > best_length:
+                            best_start, best_length = i, n
+                        break
+            if best_length == 0:
+                unmatched.append((a, b, None))
+                continue
+            end = best_start + best_length
+            matched[best_start] = (end, mapping[text[best_start:end]])
+            # 左右兩段只能找不超過這次長度的詞
+            if best_start > a:
+                stack.append((a, best_start, best_length))
+            if end < b:
+                stack.append((end, b, best_length))
+        pending = unmatched
+    
+    # 依位置組回整段文字
+    parts = [(start, value) for start, (_, value) in matched.items()]
+    parts += [(a, text[a:b]) for a, b, _ in pending]
+    parts.sort()
+    return "".join(value for _, value in parts)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _convert_piece(piece: str) -> str:
+    """轉換一段不含分隔字元的文字"""
+    for group in _chain:
+        piece = _apply_group(piece, group)
+    return piece
+
+
+def convert_to_tw(text: str) -> str:
+    """將文字轉換成臺灣繁體中文（s2twp）"""
+    if _chain is None:
+        _load()
+    parts = _SPLIT_PATTERN.split(text)
+    # 偶數位置是文字，奇數位置是分隔字元
+    return "".join(
+        _convert_piece(part) if i % 2 == 0 and part else part
+        for i, part in enumerate(parts)
+    )
+
+
+def preload():
+    """在背景執行緒載入字典，讓第一句不用等待"""
+    if _chain is None:
+        threading.Thread(target=_load, name="tw-convert-load", daemon=True).start()
+
+
+def summary() -> str:
+    """統計摘要"""
+    info = _convert_piece.cache_info()
+    total = info.hits + info.misses
+    source = "快取" if loaded_from_cache else "字典檔"
+    return (
+        f"簡繁轉換: 載入 {load_seconds * 1000:.0f} ms（{source}），"
+        f"片段快取命中 {info.hits}/{total}（{info.hits / total if total else 0:.0%}）"
+    )
+
+
+def cache_info():
+    """LRU 快取的命中統計"""
+    return _convert_piece.cache_info()
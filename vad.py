@@ -4,11 +4,24 @@ Silero VAD 語音活動偵測模組
 使用 Silero VAD 模型來偵測語音，比簡單的音量門檻更準確。
 能區分人聲和背景噪音（鍵盤聲、空調聲等）。
 """
-from collections import deque
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+import math
+import time
 
+import numpy as np
 from pysilero_vad import SileroVoiceActivityDetector
 
+# int16 PCM 轉成 float32（-1.0~1.0）的比例，與 Whisper 的輸入格式相同
+INT16_SCALE = 1.0 / 32768.0
+
+# 語音片段緩衝區的初始長度（秒），不夠時會自動加倍
+# （大多數片段只有幾秒，不必一開始就配置到最長語音長度）
+INITIAL_SEGMENT_DURATION = 1.0
+
+# 完全無聲時的音量（dBFS）
+SILENCE_DB = -100.0
+
 
 @dataclass
 class VADConfig:
@@ -27,6 +40,130 @@ class VADConfig:
     
     # 取樣率
     sample_rate: int = 16000
+    
+    # 最長語音長度（秒），0 表示不限制
+    # 超過時會在回溯範圍內語音機率最低的 chunk 之後強制切開，剩下的部分接到下一段
+    max_speech_duration: float = 0.0
+    
+    # 強制切開時往回找切點的範圍（秒）
+    split_lookback_duration: float = 3.0
+    
+    # 推測式提早送出：語音剛出現停頓時就先送出目前的音訊（Segment.speculative），
+    # 讓辨識和等待靜音門檻同時進行
+    speculative: bool = False
+    
+    # 停頓多久後送出推測片段（秒），必須比 min_silence_duration 短
+    speculative_silence_duration: float = 0.1
+    
+    # 能量預先過濾：明顯是靜音的 chunk 不送進 Silero 模型，直接視為非語音
+    energy_gate: bool = False
+    
+    # 音量低於此值（dBFS）的 chunk 視為靜音（數位靜音、麥克風靜音）
+    gate_rms_db: float = -55.0
+    
+    # 音量低於 gate_noise_db 且過零率高於 gate_zcr 的 chunk 視為底噪（嘶嘶聲）
+    gate_noise_db: float = -45.0
+    gate_zcr: float = 0.4
+
+
+@dataclass
+class Segment:
+    """
+    VAD 切出的語音片段
+    
+    audio 是 float32（-1.0~1.0）陣列，直接指向 VAD 內部的緩衝區（不複製），
+    可以原封不動交給 Whisper。片段送出後 VAD 就不會再寫入這塊緩衝區。
+    """
+    # 語音音訊（float32，含前導緩衝與結尾靜音）
+    audio: np.ndarray
+    
+    # 在整條音訊串流中的樣本位置（從 VAD 建立或 reset() 起算）
+    start_sample: int
+    end_sample: int
+    
+    # 片段內各 chunk 的語音機率統計（不含前導緩衝）
+    mean_prob: float
+    max_prob: float
+    
+    sample_rate: int = 16000
+    
+    # 語音開始的位置（start_sample 加上前導緩衝）
+    speech_start_sample: int = 0
+    
+    # 最後一個語音 chunk 的結束位置（之後都是結尾靜音）
+    speech_end_sample: int = 0
+    
+    # 推測片段：語音剛停頓時提早送出，之後還會有同一個 start_sample 的最終片段
+    speculative: bool = False
+    
+    # 語音範圍（語音開始到最後一個語音 chunk）內的統計，辨識前的品質檢查用（segment_gate.py）
+    # voiced_ratio：語音機率達到門檻的 chunk 比例；rms_db：音量（dBFS）
+    voiced_ratio: float = 1.0
+    rms_db: float = 0.0
+    
+    # VAD 送出片段的時間（time.time()），輸出事件時計算佇列等待用
+    finalized_at: float = 0.0
+    
+    @property
+    def duration(self) -> float:
+        """片段長度（秒）"""
+        return (self.end_sample - self.start_sample) / self.sample_rate
+    
+    @property
+    def start_time(self) -> float:
+        """片段開始時間（秒）"""
+        return self.start_sample / self.sample_rate
+    
+    @property
+    def end_time(self) -> float:
+        """片段結束時間（秒）"""
+        return self.end_sample / self.sample_rate
+
+
+class AudioRingBuffer:
+    """
+    預先配置的 float32 環形緩衝區
+    
+    只保留最近 capacity 個樣本，寫入時不會配置新記憶體。
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer = np.zeros(max(1, capacity), dtype=np.float32)
+        self.clear()
+    
+    def clear(self):
+        """清空緩衝區"""
+        self.write_pos = 0
+        self.size = 0
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def write(self, samples: np.ndarray):
+        """寫入樣本，超過容量時覆蓋最舊的資料"""
+        n = len(samples)
+        if n >= self.capacity:
+            # 只需要保留最後 capacity 個樣本
+            self.buffer[:self.capacity] = samples[n - self.capacity:]
+            self.write_pos = 0
+            self.size = self.capacity
+            return
+        
+        first = min(n, self.capacity - self.write_pos)
+        self.buffer[self.write_pos:self.write_pos + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+        self.write_pos = (self.write_pos + n) % self.capacity
+        self.size = min(self.capacity, self.size + n)
+    
+    def read_into(self, out: np.ndarray) -> int:
+        """依時間順序把緩衝區內容複製到 out，返回樣本數"""
+        start = (self.write_pos - self.size) % self.capacity
+        first = min(self.size, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:self.size] = self.buffer[:self.size - first]
+        return self.size
 
 
 class SileroVAD:
@@ -36,19 +173,28 @@ class SileroVAD:
     使用方式：
         vad = SileroVAD()
         
-        # 持續餵入音訊 chunk
+        # 持續餵入音訊，長度不限，不足一個 chunk 的部分會留到下次
         while True:
-            chunk = stream.read(...)
-            result = vad.process(chunk)
+            block = stream.read(...)
             
-            if result is not None:
-                # result 是完整的語音片段
-                transcribe(result)
+            for segment in vad.feed(block):
+                # segment.audio 是完整語音片段的 float32 陣列
+                transcribe(segment.audio)
+        
+        # 或是直接處理一連串的音訊區塊
+        for segment in vad.iter_segments(blocks):
+            transcribe(segment.audio)
     """
     
-    def __init__(self, config: VADConfig | None = None):
+    def __init__(self, config: VADConfig | None = None, detector=None):
+        """
+        Args:
+            config: VAD 設定
+            detector: 語音機率模型，預設建立新的 SileroVoiceActivityDetector；
+                需要提供 chunk_samples()、chunk_bytes()、process_samples()、reset()
+        """
         self.config = config or VADConfig()
-        self.vad = SileroVoiceActivityDetector()
+        self.vad = detector if detector is not None else SileroVoiceActivityDetector()
         
         # 計算 chunk 大小（Silero VAD 需要特定大小）
         self.chunk_samples = self.vad.chunk_samples()
@@ -66,37 +212,156 @@ class SileroVAD:
             self.config.speech_pad_duration * chunks_per_second
         )
         
+        # 預先配置的緩衝區
+        # 前導緩衝：保留最近的非語音音訊（至少一個 chunk）
+        self.pre_buffer = AudioRingBuffer(
+            max(1, self.pad_chunks) * self.chunk_samples
+        )
+        # int16 -> float32 轉換用的暫存區
+        self._chunk_buffer = np.empty(self.chunk_samples, dtype=np.float32)
+        # feed() 用來保留不足一個 chunk 的尾端樣本
+        self._pending = np.empty(self.chunk_samples, dtype=np.float32)
+        self._initial_segment_samples = int(
+            INITIAL_SEGMENT_DURATION * self.config.sample_rate
+        )
+        
+        # 最長語音長度（換算成 chunk 數，0 表示不限制）
+        self.max_speech_chunks = math.ceil(
+            self.config.max_speech_duration * self.config.sample_rate / self.chunk_samples
+        )
+        self.split_lookback_chunks = max(
+            1, int(self.config.split_lookback_duration * chunks_per_second)
+        )
+        # 有長度上限時，緩衝區加倍到上限為止（0 表示不限制）
+        self._max_segment_samples = self.max_speech_chunks * self.chunk_samples
+        
+        # 停頓多少個 chunk 後送出推測片段（0 表示關閉）
+        self.speculative_chunks = 0
+        if self.config.speculative:
+            speculative_chunks = max(
+                1, int(self.config.speculative_silence_duration * chunks_per_second)
+            )
+            if speculative_chunks < self.silence_chunks_threshold:
+                self.speculative_chunks = speculative_chunks
+        
+        # 能量預先過濾的門檻（換算成均方值，避免每個 chunk 算 log）
+        self._gate_silence_power = 10 ** (self.config.gate_rms_db / 10)
+        self._gate_noise_power = 10 ** (self.config.gate_noise_db / 10)
+        
+        # 統計：實際呼叫模型與被預先過濾略過的 chunk 數
+        self.model_calls = 0
+        self.gated_chunks = 0
+        
         # 狀態
         self.reset()
     
     def reset(self):
         """重置狀態"""
+        self._clear_segment()
+        # 已處理的樣本數，用來標記片段在串流中的位置
+        self.position = 0
+        self._pending_length = 0
+    
+    def _clear_segment(self):
+        """清除目前片段的狀態"""
         self.is_speaking = False
         self.silence_chunks = 0
         self.speech_chunks = 0
-        self.audio_buffer = []
-        # 保留最近的音訊作為前導緩衝
-        self.pre_buffer = deque(maxlen=max(1, self.pad_chunks))
+        self.pre_buffer.clear()
+        
+        # 片段緩衝區在送出後交給呼叫端，下一段語音開始時再重新配置
+        self.segment_buffer = None
+        self.segment_length = 0
+        self.segment_start = 0
+        # 片段開頭的前導緩衝樣本數
+        self.segment_prefix = 0
+        # 語音開始後每個 chunk 的語音機率
+        self.segment_probs = None
+        self.segment_chunks = 0
     
-    def process(self, audio_bytes: bytes) -> bytes | None:
+    def process(self, audio_bytes: bytes) -> Segment | None:
         """
         處理音訊 chunk
         
         Args:
             audio_bytes: 16kHz 16-bit mono PCM 音訊資料
-            
+        
         Returns:
-            如果偵測到完整的語音片段，返回該片段的 bytes
+            如果偵測到完整的語音片段，返回該片段的 Segment
             否則返回 None
         """
-        # 確保 chunk 大小正確
-        if len(audio_bytes) != self.chunk_bytes:
+        # 確保 chunk 大小正確（且沒有 feed() 留下的尾端樣本）
+        if len(audio_bytes) != self.chunk_bytes or self._pending_length:
             # 如果大小不對，嘗試分割處理
             return self._process_variable_chunk(audio_bytes)
         
+        np.multiply(
+            np.frombuffer(audio_bytes, dtype=np.int16), INT16_SCALE,
+            out=self._chunk_buffer, dtype=np.float32,
+        )
+        return self._process_samples(
+            self._chunk_buffer, self._is_gated(self._chunk_buffer)
+        )
+    
+    @property
+    def gated_ratio(self) -> float:
+        """被能量預先過濾略過的 chunk 比例"""
+        total = self.model_calls + self.gated_chunks
+        return self.gated_chunks / total if total else 0.0
+    
+    def gate_mask(self, frames: np.ndarray) -> np.ndarray | None:
+        """
+        向量化計算哪些 chunk 明顯是靜音，可以略過模型
+        
+        Args:
+            frames: (n_chunks, chunk_samples) 的 float32 陣列
+        
+        Returns:
+            布林陣列（True 表示略過），未開啟能量預先過濾時返回 None
+        """
+        if not self.config.energy_gate or len(frames) == 0:
+            return None
+        
+        power = np.einsum("ij,ij->i", frames, frames) / frames.shape[1]
+        crossings = np.count_nonzero(
+            np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1
+        )
+        zcr = crossings / (frames.shape[1] - 1)
+        
+        return (power < self._gate_silence_power) | (
+            (power < self._gate_noise_power) & (zcr > self.config.gate_zcr)
+        )
+    
+    def _is_gated(self, samples: np.ndarray) -> bool:
+        """單一 chunk 是否被能量預先過濾略過"""
+        mask = self.gate_mask(samples.reshape(1, -1))
+        return mask is not None and bool(mask[0])
+    
+    def _process_samples(self, samples: np.ndarray, gated: bool = False) -> Segment | None:
+        """
+        處理一個 float32 chunk（長度必須是 chunk_samples）
+        
+        gated 為 True 時不呼叫模型，直接當成機率 0 的靜音處理，
+        前導緩衝和靜音計數照常更新。
+        """
         # 取得語音機率
-        prob = self.vad(audio_bytes)
+        prob = 0.0 if gated else self.vad.process_samples(samples)
+        return self.step(samples, prob, gated)
+    
+    def step(self, samples: np.ndarray, prob: float, gated: bool = False) -> Segment | None:
+        """
+        用已經算好的語音機率推進狀態機
+        
+        MultiStreamVAD 批次算完多路的語音機率後，用這個方法更新各路的狀態。
+        """
+        if gated:
+            self.gated_chunks += 1
+        else:
+            self.model_calls += 1
+        
         is_speech = prob >= self.config.speech_threshold
+        chunk_start = self.position
+        self.position += self.chunk_samples
         
         if is_speech:
             if not self.is_speaking:
@@ -105,58 +370,426 @@ class SileroVAD:
                 self.silence_chunks = 0
                 self.speech_chunks = 0
                 # 加入前導緩衝
-                self.audio_buffer = list(self.pre_buffer)
+                self._start_segment(chunk_start)
             
-            self.audio_buffer.append(audio_bytes)
+            self._append(samples, prob)
             self.speech_chunks += 1
             self.silence_chunks = 0
-        else:
-            # 更新前導緩衝
-            self.pre_buffer.append(audio_bytes)
             
-            if self.is_speaking:
-                # 正在說話但遇到靜音
-                self.audio_buffer.append(audio_bytes)
-                self.silence_chunks += 1
+            if self._too_long():
+                return self._split_segment()
+        elif self.is_speaking:
+            # 正在說話但遇到靜音
+            self._append(samples, prob)
+            self.silence_chunks += 1
+            
+            if self.silence_chunks >= self.silence_chunks_threshold:
+                # 靜音夠長，語音結束
+                self.is_speaking = False
                 
-                if self.silence_chunks >= self.silence_chunks_threshold:
-                    # 靜音夠長，語音結束
-                    self.is_speaking = False
-                    
-                    # 檢查語音是否夠長
-                    if self.speech_chunks >= self.min_speech_chunks:
-                        result = b''.join(self.audio_buffer)
-                        self.reset()
-                        return result
-                    else:
-                        # 太短，忽略
-                        self.reset()
+                # 檢查語音是否夠長
+                if self.speech_chunks >= self.min_speech_chunks:
+                    segment = self._build_segment()
+                    self._clear_segment()
+                    return segment
+                else:
+                    # 太短，忽略
+                    self._clear_segment()
+            elif self._too_long():
+                return self._split_segment()
+            elif (self.silence_chunks == self.speculative_chunks
+                    and self.speech_chunks >= self.min_speech_chunks):
+                # 剛出現停頓，先把目前的音訊送去辨識
+                return self._build_segment(speculative=True)
+        else:
+            # 更新前導緩衝
+            # （說話中的靜音不需要保留，片段結束時前導緩衝會被清空）
+            self.pre_buffer.write(samples)
         
         return None
     
-    def _process_variable_chunk(self, audio_bytes: bytes) -> bytes | None:
-        """處理不是標準大小的 chunk"""
-        result = None
+    def _start_segment(self, chunk_start: int):
+        """配置新的片段緩衝區，並放入前導緩衝"""
+        self._allocate_segment(len(self.pre_buffer) + self.chunk_samples)
+        self.segment_prefix = self.pre_buffer.read_into(self.segment_buffer)
+        self.segment_length = self.segment_prefix
+        self.segment_start = chunk_start - self.segment_length
+    
+    def _allocate_segment(self, min_samples: int):
+        """配置新的片段緩衝區與機率陣列"""
+        capacity = max(self._initial_segment_samples, min_samples)
+        self.segment_buffer = np.empty(capacity, dtype=np.float32)
+        self.segment_probs = np.empty(
+            capacity // self.chunk_samples + 1, dtype=np.float64
+        )
+        self.segment_length = 0
+        self.segment_chunks = 0
+    
+    def _append(self, samples: np.ndarray, prob: float):
+        """把 chunk 寫入片段緩衝區，空間不夠時加倍（有最長語音長度時不超過上限）"""
+        end = self.segment_length + len(samples)
+        if end > len(self.segment_buffer):
+            capacity = 2 * len(self.segment_buffer)
+            if self._max_segment_samples:
+                capacity = min(capacity, self._max_segment_samples)
+            grown = np.empty(max(end, capacity), dtype=np.float32)
+            grown[:self.segment_length] = self.segment_buffer[:self.segment_length]
+            self.segment_buffer = grown
+        self.segment_buffer[self.segment_length:end] = samples
+        self.segment_length = end
         
-        # 分割成標準大小的 chunks
+        if self.segment_chunks == len(self.segment_probs):
+            self.segment_probs = np.concatenate(
+                (self.segment_probs, np.empty_like(self.segment_probs))
+            )
+        self.segment_probs[self.segment_chunks] = prob
+        self.segment_chunks += 1
+    
+    def _build_segment(self, n_chunks: int | None = None, speculative: bool = False) -> Segment:
+        """
+        把目前的片段緩衝區包成 Segment（不複製音訊）
+        
+        n_chunks 指定只取語音開始後的前幾個 chunk，預設為全部。
+        推測片段之後緩衝區只會往後寫，已送出的範圍不會再被修改。
+        """
+        if n_chunks is None:
+            n_chunks = self.segment_chunks
+        return self._make_segment(
+            self.segment_buffer,
+            self.segment_probs[:n_chunks],
+            self.segment_start,
+            self.segment_start + self.segment_prefix,
+            speculative,
+        )
+    
+    def _make_segment(
+        self,
+        buffer: np.ndarray,
+        probs: np.ndarray,
+        start_sample: int,
+        onset_sample: int,
+        speculative: bool = False,
+    ) -> Segment:
+        """
+        建立 Segment
+        
+        Args:
+            buffer: 從 start_sample 開始的音訊（取用需要的長度，不複製）
+            probs: 語音開始（onset_sample）後每個 chunk 的語音機率
+        """
+        end_sample = onset_sample + len(probs) * self.chunk_samples
+        speech = np.flatnonzero(probs >= self.config.speech_threshold)
+        if len(speech):
+            span = int(speech[-1]) + 1
+            speech_end = onset_sample + span * self.chunk_samples
+            voiced_ratio = len(speech) / span
+            voiced = buffer[onset_sample - start_sample:speech_end - start_sample]
+            power = float(np.dot(voiced, voiced)) / len(voiced)
+            rms_db = 10 * math.log10(power) if power > 0 else SILENCE_DB
+        else:
+            speech_end = start_sample
+            voiced_ratio = 0.0
+            rms_db = SILENCE_DB
+        return Segment(
+            audio=buffer[:end_sample - start_sample],
+            start_sample=start_sample,
+            end_sample=end_sample,
+            mean_prob=float(probs.mean()) if len(probs) else 0.0,
+            max_prob=float(probs.max()) if len(probs) else 0.0,
+            sample_rate=self.config.sample_rate,
+            speech_start_sample=onset_sample,
+            speech_end_sample=speech_end,
+            speculative=speculative,
+            voiced_ratio=voiced_ratio,
+            rms_db=rms_db,
+            finalized_at=time.time(),
+        )
+    
+    def _too_long(self) -> bool:
+        """片段是否達到最長語音長度"""
+        return bool(self.max_speech_chunks) and (
+            self.segment_length >= self.max_speech_chunks * self.chunk_samples
+        )
+    
+    def _split_segment(self) -> Segment:
+        """
+        片段太長時強制切開
+        
+        在最近 split_lookback_chunks 個 chunk 中找語音機率最低的位置，
+        送出它（含）之前的音訊，之後的部分搬到新的緩衝區繼續累積。
+        """
+        window_start = max(0, self.segment_chunks - self.split_lookback_chunks)
+        window = self.segment_probs[window_start:self.segment_chunks]
+        cut = window_start + int(np.argmin(window)) + 1
+        head = self._build_segment(cut)
+        
+        # 剩下的部分成為新片段的開頭（不需要前導緩衝）
+        old_buffer = self.segment_buffer
+        old_probs = self.segment_probs
+        tail_start = self.segment_prefix + cut * self.chunk_samples
+        tail_length = self.segment_length - tail_start
+        tail_chunks = self.segment_chunks - cut
+        
+        self._allocate_segment(tail_length)
+        self.segment_buffer[:tail_length] = old_buffer[tail_start:tail_start + tail_length]
+        self.segment_probs[:tail_chunks] = old_probs[cut:cut + tail_chunks]
+        self.segment_length = tail_length
+        self.segment_chunks = tail_chunks
+        self.segment_prefix = 0
+        self.segment_start = head.end_sample
+        self.speech_chunks = int(np.count_nonzero(
+            self.segment_probs[:tail_chunks] >= self.config.speech_threshold
+        ))
+        return head
+    
+    def _process_variable_chunk(self, audio_bytes: bytes) -> Segment | None:
+        """
+        處理不是標準大小的 chunk
+        
+        為了相容舊介面只返回最後一個片段；一次讀入大區塊時請改用 feed()。
+        """
+        segments = self.feed(audio_bytes)
+        return segments[-1] if segments else None
+    
+    def feed(self, audio: bytes | np.ndarray) -> list[Segment]:
+        """
+        餵入任意長度的音訊
+        
+        不足一個 chunk 的尾端樣本會保留到下一次呼叫，
+        一次餵入的音訊中結束的所有片段都會依序返回。
+        
+        Args:
+            audio: 16kHz 16-bit mono PCM bytes，或 int16 / float32 陣列
+        
+        Returns:
+            這次餵入後結束的語音片段（可能是空列表）
+        """
+        if not isinstance(audio, np.ndarray):
+            audio = np.frombuffer(audio, dtype=np.int16)
+        samples = to_float32(audio)
+        
+        segments = []
         offset = 0
-        while offset + self.chunk_bytes <= len(audio_bytes):
-            chunk = audio_bytes[offset:offset + self.chunk_bytes]
-            chunk_result = self.process(chunk)
-            if chunk_result is not None:
-                result = chunk_result
-            offset += self.chunk_bytes
         
-        return result
+        # 先補齊上次留下的尾端
+        if self._pending_length:
+            take = min(self.chunk_samples - self._pending_length, len(samples))
+            self._pending[self._pending_length:self._pending_length + take] = samples[:take]
+            self._pending_length += take
+            offset = take
+            if self._pending_length < self.chunk_samples:
+                return segments
+            
+            self._pending_length = 0
+            segment = self._process_samples(
+                self._pending, self._is_gated(self._pending)
+            )
+            if segment is not None:
+                segments.append(segment)
+        
+        # 完整的 chunk 直接處理（不複製），能量預先過濾一次算完整個區塊
+        n_chunks = (len(samples) - offset) // self.chunk_samples
+        frames = samples[offset:offset + n_chunks * self.chunk_samples].reshape(
+            n_chunks, self.chunk_samples
+        )
+        mask = self.gate_mask(frames)
+        for i in range(n_chunks):
+            segment = self._process_samples(
+                frames[i], mask is not None and bool(mask[i])
+            )
+            if segment is not None:
+                segments.append(segment)
+        offset += n_chunks * self.chunk_samples
+        
+        # 保留剩下的樣本
+        remaining = len(samples) - offset
+        if remaining:
+            self._pending[:remaining] = samples[offset:]
+            self._pending_length = remaining
+        
+        return segments
+    
+    def iter_segments(self, blocks: Iterable[bytes | np.ndarray]) -> Iterator[Segment]:
+        """
+        逐一處理音訊區塊，產生所有語音片段，結束時會呼叫 finalize()
+        
+        Args:
+            blocks: 任意長度的音訊區塊（格式同 feed()）
+        """
+        for block in blocks:
+            yield from self.feed(block)
+        
+        segment = self.finalize()
+        if segment is not None:
+            yield segment
     
-    def finalize(self) -> bytes | None:
+    def current_audio(self) -> tuple[int, np.ndarray] | None:
+        """
+        進行中（還沒送出）的語音：(開始樣本, 目前累積的音訊)
+        
+        返回緩衝區的 view，不複製：之後的 chunk 只會寫在後面，
+        已返回的內容不會被改寫。沒有在說話時返回 None。
+        """
+        if not self.is_speaking or not self.segment_length:
+            return None
+        return self.segment_start, self.segment_buffer[:self.segment_length]
+    
+    def finalize(self) -> Segment | None:
         """
         結束處理，返回任何剩餘的語音
+        
+        不足一個 chunk 的尾端樣本會被丟棄。
         """
-        if self.is_speaking and self.speech_chunks >= self.min_speech_chunks:
-            result = b''.join(self.audio_buffer)
-            self.reset()
-            return result
+        self._pending_length = 0
+        if (self.is_speaking and self.segment_length
+                and self.speech_chunks >= self.min_speech_chunks):
+            segment = self._build_segment()
+            self._clear_segment()
+            return segment
         
-        self.reset()
+        self._clear_segment()
         return None
+    
+    def segment_array(self, audio: np.ndarray) -> list[tuple[int, int]]:
+        """
+        離線切割整段音訊，一次返回所有語音片段的樣本範圍
+        
+        結果與把同一段音訊逐 chunk 餵給新建的 SileroVAD 再呼叫 finalize() 完全相同
+        （離線模式不產生推測片段）。會重置 VAD 狀態，不要和串流處理共用同一個實例。
+        
+        Args:
+            audio: 16kHz mono 音訊，int16 PCM 或 float32（-1.0~1.0）
+        
+        Returns:
+            [(start_sample, end_sample), ...]
+        """
+        return [
+            (segment.start_sample, segment.end_sample)
+            for segment in self.split_array(audio)
+        ]
+    
+    def split_array(self, audio: np.ndarray) -> list[Segment]:
+        """
+        離線切割整段音訊，返回 Segment 列表
+        
+        Segment.audio 直接指向輸入陣列（float32 輸入時不複製）。
+        """
+        samples = to_float32(audio)
+        probs = self.compute_probs(samples)
+        
+        segments = []
+        for start, onset, end in self._find_segments(probs):
+            segments.append(self._make_segment(
+                samples[start * self.chunk_samples:],
+                probs[onset:end],
+                start * self.chunk_samples,
+                onset * self.chunk_samples,
+            ))
+        
+        self.reset()
+        return segments
+    
+    def compute_probs(self, samples: np.ndarray) -> np.ndarray:
+        """
+        計算每個 chunk 的語音機率（會先重置模型狀態）
+        
+        結尾不足一個 chunk 的樣本會被忽略，與串流處理相同。
+        """
+        self.vad.reset()
+        n_chunks = len(samples) // self.chunk_samples
+        frames = samples[:n_chunks * self.chunk_samples].reshape(
+            n_chunks, self.chunk_samples
+        )
+        
+        # 被能量預先過濾的 chunk 機率為 0，不呼叫模型
+        probs = np.zeros(n_chunks, dtype=np.float64)
+        mask = self.gate_mask(frames)
+        indices = np.arange(n_chunks) if mask is None else np.flatnonzero(~mask)
+        self.model_calls += len(indices)
+        self.gated_chunks += n_chunks - len(indices)
+        
+        # pysilero-vad 沒有批次介面，這裡用最精簡的迴圈逐 chunk 推論
+        process_samples = self.vad.process_samples
+        for i in indices.tolist():
+            probs[i] = process_samples(frames[i])
+        return probs
+    
+    def _find_segments(self, probs: np.ndarray) -> list[tuple[int, int, int]]:
+        """
+        用向量化的方式在機率陣列上套用與 process() 相同的狀態機
+        
+        Returns:
+            [(含前導緩衝的起點, 語音起點, 終點), ...]，單位是 chunk，終點不含
+        """
+        n_chunks = len(probs)
+        speech_idx = np.flatnonzero(probs >= self.config.speech_threshold)
+        if len(speech_idx) == 0:
+            return []
+        
+        # 連續靜音達到門檻才算結束（門檻為 0 時，遇到第一個靜音 chunk 就結束）
+        silence_limit = max(1, self.silence_chunks_threshold)
+        gaps = np.diff(speech_idx) - 1
+        breaks = np.flatnonzero(gaps >= silence_limit)
+        first = np.concatenate(([0], breaks + 1))
+        last = np.concatenate((breaks, [len(speech_idx) - 1]))
+        
+        onsets = speech_idx[first]
+        # 片段包含結尾的靜音；音訊提早結束時相當於 finalize()
+        ends = np.minimum(speech_idx[last] + silence_limit + 1, n_chunks)
+        speech_counts = last - first + 1
+        
+        # 每段結束後前導緩衝會清空，所以前導緩衝不會跨過上一段的終點
+        previous_ends = np.concatenate(([0], ends[:-1]))
+        pre_chunks = np.minimum(max(1, self.pad_chunks), onsets - previous_ends)
+        starts = onsets - pre_chunks
+        
+        if not self.max_speech_chunks:
+            keep = speech_counts >= self.min_speech_chunks
+            return list(zip(
+                starts[keep].tolist(), onsets[keep].tolist(), ends[keep].tolist()
+            ))
+        
+        # 有最長長度限制時，只有太長的片段需要逐段模擬強制切開
+        natural_ends = speech_idx[last] + silence_limit + 1 <= n_chunks
+        result = []
+        for start, onset, end, count, natural in zip(
+            starts.tolist(), onsets.tolist(), ends.tolist(),
+            speech_counts.tolist(), natural_ends.tolist(),
+        ):
+            if end - start < self.max_speech_chunks:
+                if count >= self.min_speech_chunks:
+                    result.append((start, onset, end))
+                continue
+            result.extend(self._split_long(probs, start, onset, end, natural))
+        return result
+    
+    def _split_long(
+        self, probs: np.ndarray, start: int, onset: int, end: int, natural: bool
+    ) -> list[tuple[int, int, int]]:
+        """模擬 _split_segment()，把超過最長長度的片段切開（單位是 chunk）"""
+        pieces = []
+        while True:
+            # 片段長度第一次達到上限的 chunk
+            trigger = max(onset, start + self.max_speech_chunks - 1)
+            # 在最後一個 chunk 正常結束時，不會再檢查長度
+            if trigger > end - 1 or (trigger == end - 1 and natural):
+                break
+            window_start = max(onset, trigger + 1 - self.split_lookback_chunks)
+            cut = window_start + int(np.argmin(probs[window_start:trigger + 1])) + 1
+            pieces.append((start, onset, cut))
+            start = onset = cut
+        
+        # 最後剩下的部分和一般片段一樣要檢查語音長度
+        speech = int(np.count_nonzero(probs[onset:end] >= self.config.speech_threshold))
+        if end > onset and speech >= self.min_speech_chunks:
+            pieces.append((start, onset, end))
+        return pieces
+
+
+def to_float32(audio: np.ndarray) -> np.ndarray:
+    """把 int16 PCM 轉成 float32（-1.0~1.0），float32 輸入直接返回"""
+    if audio.dtype == np.float32:
+        return audio
+    if audio.dtype == np.int16:
+        return np.multiply(audio, INT16_SCALE, dtype=np.float32)
+    return audio.astype(np.float32)
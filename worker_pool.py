@@ -0,0 +1,147 @@
+"""
+多個辨識執行緒
+
+一個辨識執行緒一次只能辨識一句；CPU 後端或放得下兩份小模型的機器上，
+可以用 --workers N 同時辨識多句：
+
+- BackendPool：N 個後端實例，每次辨識借用一個閒置的實例
+- ReorderBuffer：SegmentQueue.get_batch() 取出片段時依序編號，辨識完成後依編號顯示，
+  後面的句子先辨識完也會等前面的句子顯示之後才出現
+
+使用方式：
+    backend = create_pool("faster-whisper", "small", workers=2)
+    reorder = ReorderBuffer()
+    
+    # 每個辨識執行緒
+    ticket, batch = transcription_queue.get_batch(timeout=0.5)
+    text = backend.transcribe(batch[0].audio).text
+    reorder.complete(ticket, functools.partial(print, text))
+"""
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from backends import TranscriptionBackend, TranscriptionResult, create_backend
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class BackendPool:
+    """
+    多個後端實例（介面與 TranscriptionBackend 相同，執行緒安全）
+    
+    transcribe() 借用一個閒置的實例，全部都在忙時等待。
+    """
+    
+    def __init__(self, backends: list[TranscriptionBackend]):
+        self.backends = backends
+        self._idle: queue.Queue[TranscriptionBackend] = queue.Queue()
+        for backend in backends:
+            self._idle.put(backend)
+    
+    def __getattr__(self, name):
+        # name、model、supports_* 等沿用第一個實例
+        return getattr(self.backends[0], name)
+    
+    @property
+    def load_seconds(self) -> float:
+        return sum(b.load_seconds for b in self.backends)
+    
+    @property
+    def warmup_seconds(self) -> float:
+        return sum(b.warmup_seconds for b in self.backends)
+    
+    def load(self) -> float:
+        return sum(b.load() for b in self.backends)
+    
+    def warmup(self, language: str | None = None, task: str = "transcribe") -> None:
+        for backend in self.backends:
+            backend.warmup(language, task)
+    
+    def transcribe(
+        self,
+        audio: "np.ndarray",
+        language: str | None = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+    ) -> TranscriptionResult:
+        backend = self._idle.get()
+        try:
+            return backend.transcribe(audio, language, task, word_timestamps)
+        finally:
+            self._idle.put(backend)
+
+
+def create_pool(
+    name: str,
+    model: str | None = None,
+    workers: int = 1,
+    process: bool = False,
+    **options,
+) -> TranscriptionBackend:
+    """
+    建立 workers 個後端實例（1 個時直接返回該後端）
+    
+    faster-whisper 會把 CPU 核心平均分給每個實例，避免互相搶核心。
+    process=True 時每個實例各在一個子行程中執行（ProcessBackend）。
+    """
+    if workers > 1 and name == "faster-whisper":
+        options.setdefault("cpu_threads", max(1, (os.cpu_count() or 1) // workers))
+    
+    def create():
+        if process:
+            from process_backend import ProcessBackend
+            return ProcessBackend(name, model, **options)
+        return create_backend(name, model, **options)
+    
+    if workers <= 1:
+        return create()
+    return BackendPool([create() for _ in range(workers)])
+
+
+class ReorderBuffer:
+    """
+    依取出佇列的順序顯示辨識結果（執行緒安全）
+    
+    佇列是先進先出，取出的順序就是語音的順序；
+    SegmentQueue.get_batch() 取出時編號，complete() 依編號呼叫顯示函式。
+    顯示函式都在 lock 內執行，不會和其他顯示交錯。
+    """
+    
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._next_emit = 0
+        # 編號 -> 顯示函式（None 表示沒有東西要顯示）
+        self._ready: dict[int, Callable[[], None] | None] = {}
+        
+        # 統計
+        self.waited = 0         # 辨識完成後要等前面的句子才能顯示的次數
+        self.wait_seconds = 0.0  # 上述等待的總時間
+        self._completed_at: dict[int, float] = {}
+    
+    def complete(self, ticket: int, emit: Callable[[], None] | None = None):
+        """辨識完成：輪到這個編號時呼叫 emit()（之前的編號都顯示過之後）"""
+        with self.lock:
+            self._ready[ticket] = emit
+            if ticket != self._next_emit:
+                self.waited += 1
+                self._completed_at[ticket] = time.perf_counter()
+            while self._next_emit in self._ready:
+                emit = self._ready.pop(self._next_emit)
+                completed_at = self._completed_at.pop(self._next_emit, None)
+                if completed_at is not None:
+                    self.wait_seconds += time.perf_counter() - completed_at
+                self._next_emit += 1
+                if emit is not None:
+                    try:
+                        emit()
+                    except Exception as e:
+                        print(f"\n❌ 顯示錯誤: {e}")
+    
+    def summary(self) -> str:
+        """統計摘要"""
+        return f"依序顯示: {self.waited} 句先辨識完、等待前面的句子（共 {self.wait_seconds:.1f} 秒）"